@@ -0,0 +1,224 @@
+import asyncio
+import contextvars
+import os
+import secrets
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from cache import create_cache
+from crud import RegistrationOutcome
+import async_crud
+
+# Admission queue for registrations to "hot" events.
+#
+# When many clients register for the same event at once, each direct attempt
+# is its own transaction contending for the same events row. In queue mode
+# the attempts become tickets in a per-event FIFO instead, and one processor
+# per event settles up to ADMISSION_BATCH_SIZE of them per transaction
+# (crud.register_batch_for_event), handing out the remaining seats in
+# arrival order.
+#
+# ADMISSION_QUEUE=auto queues an event's registrations for ADMISSION_HOT_SECONDS
+# once ADMISSION_HOT_THRESHOLD direct attempts for it are in flight at the
+# same time, or until its processor drains the queue; "always" queues every
+# registration and "off" none.
+#
+# The queue is per process; batches from several workers still allocate
+# correctly, since each claims its seats with a conditional UPDATE. Ticket
+# results go to a cache: set ADMISSION_TICKET_URL (redis://...) so any
+# worker can answer a poll for a ticket issued by another.
+
+ADMISSION_QUEUE = os.getenv("ADMISSION_QUEUE", "auto").lower()
+ADMISSION_HOT_THRESHOLD = int(os.getenv("ADMISSION_HOT_THRESHOLD", 8))
+ADMISSION_HOT_SECONDS = float(os.getenv("ADMISSION_HOT_SECONDS", 30))
+ADMISSION_BATCH_SIZE = int(os.getenv("ADMISSION_BATCH_SIZE", 200))
+# How long a processor waits for more arrivals before settling a batch
+ADMISSION_BATCH_WAIT = float(os.getenv("ADMISSION_BATCH_WAIT", 0.01))
+ADMISSION_TICKET_TTL = float(os.getenv("ADMISSION_TICKET_TTL", 600))
+# How long POST /events/{id}/register awaits its ticket before answering 202
+ADMISSION_AWAIT_SECONDS = float(os.getenv("ADMISSION_AWAIT_SECONDS", 5))
+
+QUEUE_MODES = ("off", "auto", "always")
+
+if ADMISSION_QUEUE not in QUEUE_MODES:
+    raise ValueError(f"ADMISSION_QUEUE must be one of {', '.join(QUEUE_MODES)}")
+
+PENDING = "pending"
+FAILED = "failed"
+
+class Ticket:
+    """One queued registration attempt"""
+
+    __slots__ = ("id", "event_id", "user_id", "waitlist", "done")
+
+    def __init__(self, event_id: int, user_id: int, waitlist: bool = False):
+        self.id = secrets.token_urlsafe(16)
+        self.event_id = event_id
+        self.user_id = user_id
+        self.waitlist = waitlist  # join the waitlist if the event is full
+        self.done = asyncio.get_running_loop().create_future()
+
+class EventQueue:
+    """Tickets waiting for one event, and the task settling them"""
+
+    def __init__(self):
+        self.tickets: Deque[Ticket] = deque()
+        self.processor: Optional[asyncio.Task] = None
+        self.hot_until = 0.0
+        self.in_flight = 0
+
+class AdmissionQueue:
+    def __init__(
+        self,
+        session_factory,
+        on_registered: Optional[Callable[[int], Awaitable[None]]] = None,
+        mode: str = ADMISSION_QUEUE,
+        batch_size: int = ADMISSION_BATCH_SIZE,
+        batch_wait: float = ADMISSION_BATCH_WAIT
+    ):
+        self.session_factory = session_factory
+        self.on_registered = on_registered
+        self.mode = mode
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.events: Dict[int, EventQueue] = {}
+        self.pending: Dict[str, Ticket] = {}  # tickets of this process not settled yet
+        self.batches = 0
+        self.results = create_cache(
+            os.getenv("ADMISSION_TICKET_URL"),
+            prefix="ticket:",
+            max_entries=100000,
+            default_ttl=ADMISSION_TICKET_TTL
+        )
+
+    def _queue(self, event_id: int) -> EventQueue:
+        if event_id not in self.events:
+            self.events[event_id] = EventQueue()
+        return self.events[event_id]
+
+    def _release(self, event_id: int) -> None:
+        """Forget an event's state once it is idle and no longer hot"""
+        queue = self.events.get(event_id)
+        if (
+            queue is not None and not queue.tickets and not queue.in_flight
+            and queue.hot_until <= time.monotonic()
+            and (queue.processor is None or queue.processor.done() or queue.processor is asyncio.current_task())
+        ):
+            del self.events[event_id]
+
+    def is_queued(self, event_id: int) -> bool:
+        """Whether registrations for the event currently go through the queue"""
+        if self.mode == "always":
+            return True
+        if self.mode == "off":
+            return False
+        queue = self.events.get(event_id)
+        return queue is not None and (queue.hot_until > time.monotonic() or bool(queue.tickets))
+
+    def track(self, event_id: int) -> "DirectAttempt":
+        """Context manager counting a direct attempt; enough at once make the event hot"""
+        return DirectAttempt(self, event_id)
+
+    async def submit(self, event_id: int, user_id: int, waitlist: bool = False) -> Ticket:
+        """Queue a registration attempt and return its ticket"""
+        ticket = Ticket(event_id, user_id, waitlist)
+        await self.results.set(ticket.id, self._result(ticket, PENDING))
+        self.pending[ticket.id] = ticket
+        queue = self._queue(event_id)
+        queue.tickets.append(ticket)
+        if queue.processor is None or queue.processor.done():
+            # A fresh context: the batches' SQL is not part of the request that started the processor
+            queue.processor = asyncio.create_task(self._process(event_id, queue), context=contextvars.Context())
+        return ticket
+
+    async def result(self, ticket_id: str) -> Optional[Dict[str, Any]]:
+        """A ticket's stored result, or None if unknown or expired"""
+        return await self.results.get(ticket_id)
+
+    async def wait(self, ticket_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """A ticket's result, waiting up to `timeout` seconds if this process is settling it"""
+        ticket = self.pending.get(ticket_id)
+        if ticket is not None and timeout > 0:
+            try:
+                return await asyncio.wait_for(asyncio.shield(ticket.done), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return await self.result(ticket_id)
+
+    async def close(self) -> None:
+        """Settle every queued ticket (at shutdown)"""
+        processors = [queue.processor for queue in self.events.values() if queue.processor]
+        await asyncio.gather(*processors, return_exceptions=True)
+
+    async def _process(self, event_id: int, queue: EventQueue) -> None:
+        while queue.tickets:
+            # Let concurrent arrivals join the batch
+            await asyncio.sleep(self.batch_wait)
+            batch = [queue.tickets.popleft() for _ in range(min(self.batch_size, len(queue.tickets)))]
+            await self._settle(event_id, batch)
+        # Drained: drop the event's state, hot or not, unless direct attempts still hold it
+        if self.events.get(event_id) is queue and not queue.in_flight:
+            del self.events[event_id]
+
+    async def _settle(self, event_id: int, batch: List[Ticket]) -> None:
+        try:
+            async with self.session_factory() as db:
+                outcomes = await async_crud.register_batch_for_event(
+                    db, event_id, [t.user_id for t in batch], waitlist={t.user_id for t in batch if t.waitlist}
+                )
+        except Exception as e:
+            print(f"❌ Admission batch for event {event_id} failed: {e}")
+            outcomes = [(FAILED, None)] * len(batch)
+        self.batches += 1
+
+        for ticket, (outcome, registration) in zip(batch, outcomes):
+            if outcome != RegistrationOutcome.REGISTERED:
+                registration = None  # a waitlisted ticket's position is looked up on demand
+            result = self._result(ticket, getattr(outcome, "value", outcome), registration)
+            await self.results.set(ticket.id, result)
+            del self.pending[ticket.id]
+            if not ticket.done.done():
+                ticket.done.set_result(result)
+        if self.on_registered and any(outcome == RegistrationOutcome.REGISTERED for outcome, _ in outcomes):
+            await self.on_registered(event_id)
+
+    @staticmethod
+    def _result(ticket: Ticket, status: str, registration=None) -> Dict[str, Any]:
+        return {
+            "ticket_id": ticket.id,
+            "event_id": ticket.event_id,
+            "user_id": ticket.user_id,
+            "status": status,
+            "registration": None if registration is None else {
+                "id": registration.id,
+                "user_id": registration.user_id,
+                "event_id": registration.event_id,
+                "registered_at": registration.registered_at.isoformat(),
+            },
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "mode": self.mode,
+            "batches": self.batches,
+            "hot_events": sorted(event_id for event_id, queue in self.events.items() if queue.hot_until > now),
+            "queued": sum(len(queue.tickets) for queue in self.events.values()),
+        }
+
+class DirectAttempt:
+    def __init__(self, admission: AdmissionQueue, event_id: int):
+        self.admission = admission
+        self.event_id = event_id
+        self.queue = admission._queue(event_id)
+
+    def __enter__(self):
+        self.queue.in_flight += 1
+        if self.queue.in_flight >= ADMISSION_HOT_THRESHOLD:
+            self.queue.hot_until = time.monotonic() + ADMISSION_HOT_SECONDS
+        return self
+
+    def __exit__(self, *exc):
+        self.queue.in_flight -= 1
+        self.admission._release(self.event_id)
@@ -0,0 +1,77 @@
+import functools
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud
+
+# Async variants of the CRUD operations in crud.py, for use from the FastAPI
+# handlers with an AsyncSession.
+#
+# Each variant runs its sync counterpart through AsyncSession.run_sync: the
+# query logic stays in crud.py while the I/O goes through the async driver,
+# so a slow query only suspends its own request instead of blocking the
+# event loop.
+
+def _async_variant(func):
+    @functools.wraps(func)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(func, *args, **kwargs)
+    return wrapper
+
+# User CRUD operations
+create_user = _async_variant(crud.create_user)
+get_user_by_email = _async_variant(crud.get_user_by_email)
+get_user_by_id = _async_variant(crud.get_user_by_id)
+delete_user = _async_variant(crud.delete_user)
+update_user = _async_variant(crud.update_user)
+update_user_password_hash = _async_variant(crud.update_user_password_hash)
+get_users = _async_variant(crud.get_users)
+get_all_users = _async_variant(crud.get_all_users)
+get_recent_users = _async_variant(crud.get_recent_users)
+count_users = _async_variant(crud.count_users)
+
+# Event CRUD operations
+get_events = _async_variant(crud.get_events)
+get_event_by_id = _async_variant(crud.get_event_by_id)
+get_events_by_creator = _async_variant(crud.get_events_by_creator)
+get_all_events_with_creators = _async_variant(crud.get_all_events_with_creators)
+get_recent_events = _async_variant(crud.get_recent_events)
+count_events = _async_variant(crud.count_events)
+create_event = _async_variant(crud.create_event)
+bulk_create_events = _async_variant(crud.bulk_create_events)
+get_events_by_id_range = _async_variant(crud.get_events_by_id_range)
+update_event = _async_variant(crud.update_event)
+update_event_fields = _async_variant(crud.update_event_fields)
+delete_event = _async_variant(crud.delete_event)
+search_events = _async_variant(crud.search_events)
+count_matching_events = _async_variant(crud.count_matching_events)
+get_events_page = _async_variant(crud.get_events_page)
+get_events_by_relevance = _async_variant(crud.get_events_by_relevance)
+get_nearby_events = _async_variant(crud.get_nearby_events)
+
+# Event registration CRUD operations
+register_for_event = _async_variant(crud.register_for_event)
+register_many = _async_variant(crud.register_many)
+register_batch_for_event = _async_variant(crud.register_batch_for_event)
+unregister_from_event = _async_variant(crud.unregister_from_event)
+delete_registration = _async_variant(crud.delete_registration)
+get_user_registrations = _async_variant(crud.get_user_registrations)
+get_event_registrations = _async_variant(crud.get_event_registrations)
+get_all_registrations_with_details = _async_variant(crud.get_all_registrations_with_details)
+count_registrations = _async_variant(crud.count_registrations)
+is_user_registered = _async_variant(crud.is_user_registered)
+get_event_registration_count = _async_variant(crud.get_event_registration_count)
+get_event_registration_counts = _async_variant(crud.get_event_registration_counts)
+
+# Event waitlists
+join_waitlist = _async_variant(crud.join_waitlist)
+leave_waitlist = _async_variant(crud.leave_waitlist)
+get_user_waitlist = _async_variant(crud.get_user_waitlist)
+
+# Denormalized registration counters
+reconcile_registration_counts = _async_variant(crud.reconcile_registration_counts)
+
+# Precomputed statistics
+get_stat_totals = _async_variant(crud.get_stat_totals)
+get_daily_stats = _async_variant(crud.get_daily_stats)
+reconcile_stats = _async_variant(crud.reconcile_stats)
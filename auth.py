@@ -1,19 +1,18 @@
-﻿from datetime import datetime, timedelta
+﻿from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
-from dotenv import load_dotenv
 
-from database import get_db
+from database import get_async_db
 from models import User, UserRole
-from crud import get_user_by_email
-
-# Load environment variables
-load_dotenv()
+from cache import create_cache
+import async_crud
 
 # Security configuration
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -24,9 +23,43 @@ CREATOR_SIGNUP_CODE = os.getenv("CREATOR_SIGNUP_CODE", "CREATE2024")  # Secret c
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY environment variable is not set")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Raising BCRYPT_ROUNDS also raises the minimum, so weaker hashes are
+# transparently rehashed on the user's next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# bcrypt is deliberately slow, so it runs in a bounded thread pool instead of
+# on the event loop. Jobs beyond the workers plus the queue limit are rejected
+# with 429 rather than piling up behind a login storm.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 32))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS
+)
 security = HTTPBearer()
 
+# Resolved principals for get_current_user, keyed by token subject. Set
+# USER_CACHE_URL (redis://...) to share the cache and its invalidations
+# between workers; otherwise entries are per process and bounded by the TTL.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", 10000))
+
+user_cache = create_cache(
+    os.getenv("USER_CACHE_URL"),
+    prefix="user:",
+    max_entries=USER_CACHE_MAX_ENTRIES,
+    default_ttl=USER_CACHE_TTL
+)
+
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_jobs_in_flight = 0
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -35,19 +68,50 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def _run_password_job(func, *args):
+    """Run a bcrypt operation in the password pool, rejecting when saturated"""
+    global _password_jobs_in_flight
+    if _password_jobs_in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    
+    _password_jobs_in_flight += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_jobs_in_flight -= 1
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await _run_password_job(pwd_context.hash, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop"""
+    return await _run_password_job(pwd_context.verify, plain_password, hashed_password)
+
 def verify_creator_code(code: str) -> bool:
     """Verify creator signup code"""
     return code == CREATOR_SIGNUP_CODE
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
-    """Authenticate a user"""
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    """Authenticate a user, upgrading their password hash if the policy changed"""
+    user = await async_crud.get_user_by_email(db, email)
     if not user:
         return None
     if not user.is_active:
         return None
-    if not verify_password(password, user.hashed_password):
+    
+    valid, new_hash = await _run_password_job(
+        pwd_context.verify_and_update, password, user.hashed_password
+    )
+    if not valid:
         return None
+    if new_hash:
+        user = await async_crud.update_user_password_hash(db, user.id, new_hash)
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -64,7 +128,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """Get the current authenticated user"""
     credentials_exception = HTTPException(
@@ -81,9 +145,14 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = get_user_by_email(db, email=email)
-    if user is None:
-        raise credentials_exception
+    principal = await user_cache.get(f"email:{email.lower()}")
+    if principal is not None:
+        user = _user_from_principal(principal)
+    else:
+        user = await async_crud.get_user_by_email(db, email=email)
+        if user is None:
+            raise credentials_exception
+        await cache_user(user)
     
     if not user.is_active:
         raise HTTPException(
@@ -93,6 +162,29 @@ async def get_current_user(
     
     return user
 
+def _user_from_principal(principal: dict) -> User:
+    """Rebuild a detached User from its cached principal"""
+    return User(**{**principal, "created_at": datetime.fromisoformat(principal["created_at"])})
+
+async def cache_user(user: User) -> None:
+    """Store a user's principal in the authenticated-user cache"""
+    principal = {
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "is_active": user.is_active,
+        "role": user.role,
+        "created_at": user.created_at.isoformat(),
+    }
+    await user_cache.set(f"email:{user.email.lower()}", principal)
+
+async def invalidate_cached_user(*emails: str) -> None:
+    """Drop cached principals after a user changes or is deleted.
+
+    Pass every address the user may be cached under (old and new email).
+    """
+    await user_cache.delete(*(f"email:{email.lower()}" for email in emails if email))
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Get current active user"""
     if not current_user.is_active:
@@ -0,0 +1,137 @@
+"""Load benchmark: sync vs async database sessions inside async handlers.
+
+Serves the same query through two routes of one in-process FastAPI app:
+
+  /sync   async handler using the sync SessionLocal (the old pattern, which
+          blocks the event loop for the duration of every query)
+  /async  async handler using AsyncSessionLocal (the pattern main.py uses)
+
+and fires concurrent requests at each, reporting throughput, latency and the
+worst event-loop stall observed while the load was running.
+
+Each request waits `--query-ms` inside the database (MySQL `SLEEP()`, or an
+equivalent function registered on SQLite connections) to stand in for query
+and network time, which is what the event loop is blocked on in production.
+
+Usage:
+    python bench_async_db.py                       # temporary SQLite file
+    DATABASE_URL=mysql+pymysql://... python bench_async_db.py --requests 500
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, text
+
+from database import engine, async_engine, Base, SessionLocal, AsyncSessionLocal
+import models  # noqa: F401 - register models on Base.metadata
+import crud
+import async_crud
+
+# A query that spends :seconds waiting inside the database
+SLOW_QUERY = "SELECT SLEEP(:seconds)"
+
+def _sqlite_sleep(seconds: float) -> int:
+    time.sleep(seconds)
+    return 0
+
+def _register_sqlite_sleep(dbapi_connection, connection_record):
+    dbapi_connection.create_function("SLEEP", 1, _sqlite_sleep)
+
+def build_app(seconds: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync")
+    async def sync_route():
+        db = SessionLocal()
+        try:
+            db.execute(text(SLOW_QUERY), {"seconds": seconds}).scalar()
+            events, total = crud.get_events(db, skip=0, limit=10)
+            return {"total": total}
+        finally:
+            db.close()
+
+    @app.get("/async")
+    async def async_route():
+        async with AsyncSessionLocal() as db:
+            (await db.execute(text(SLOW_QUERY), {"seconds": seconds})).scalar()
+            events, total = await async_crud.get_events(db, skip=0, limit=10)
+            return {"total": total}
+
+    return app
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the worst delay between scheduled and actual wake-ups"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+async def run_load(app: FastAPI, path: str, requests: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(measure_loop_lag(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        worst_lag = await lag_task
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "max_loop_lag_ms": worst_lag * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--query-ms", type=float, default=20.0, help="Database time per request")
+    args = parser.parse_args()
+
+    backend = engine.dialect.name
+    if backend == "sqlite":
+        event.listen(engine, "connect", _register_sqlite_sleep)
+        event.listen(async_engine.sync_engine, "connect", _register_sqlite_sleep)
+    elif backend != "mysql":
+        raise SystemExit(f"Unsupported backend for this benchmark: {backend}")
+
+    Base.metadata.create_all(bind=engine)
+    app = build_app(args.query_ms / 1000)
+
+    print(f"📊 {args.requests} requests, concurrency {args.concurrency}, backend {backend}")
+    for path in ("/sync", "/async"):
+        result = asyncio.run(run_load(app, path, args.requests, args.concurrency))
+        print(
+            f"{path:<7} {result['throughput']:8.1f} req/s   "
+            f"p50 {result['p50_ms']:7.1f} ms   p95 {result['p95_ms']:7.1f} ms   "
+            f"max loop stall {result['max_loop_lag_ms']:7.1f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Benchmark: POST /registrations/bulk against one POST /events/{id}/register per pair.
+
+Seeds `--users` users and `--events` roomy events, then registers `--pairs`
+random (user, event) pairs twice over disjoint users: once with a request per
+pair (each with that user's token, `--concurrency` at a time), and once as
+admin through the bulk endpoint in requests of `--batch` pairs. Reports
+wall time, registrations per second, request latency and SQL statements
+per registration for each path. Requests go to an in-process app (httpx
+ASGI transport, no network).
+
+Usage:
+    python bench_bulk_register.py                       # temporary SQLite file
+    python bench_bulk_register.py --pairs 20000 --batch 500 --concurrency 50
+    DATABASE_URL=mysql+pymysql://... python bench_bulk_register.py
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+# Measure the plain single-call path, without the admission queue batching it
+os.environ.setdefault("ADMISSION_QUEUE", "off")
+os.environ.setdefault("SLOW_QUERY_MS", "0")
+
+import httpx
+from datetime import datetime, timedelta
+from sqlalchemy import event, func, insert
+
+from database import engine, async_engine, SessionLocal
+from models import User, Event, UserRole
+
+def seed(users: int, events: int) -> tuple:
+    """Insert users (plus an admin) and events; returns (user ids, event ids, admin email)"""
+    with SessionLocal() as db:
+        first_user = (db.query(func.max(User.id)).scalar() or 0) + 1
+        db.execute(insert(User), [
+            {"id": first_user + i, "email": f"bulk-bench{first_user + i}@example.com", "full_name": "Bench", "hashed_password": "x"}
+            for i in range(users)
+        ])
+        admin_email = f"bulk-bench-admin{first_user}@example.com"
+        db.execute(insert(User), [{
+            "email": admin_email, "full_name": "Bench Admin", "hashed_password": "x", "role": UserRole.ADMIN.value
+        }])
+        first_event = (db.query(func.max(Event.id)).scalar() or 0) + 1
+        db.execute(insert(Event), [
+            {
+                "id": first_event + i, "name": f"Bulk bench {i}", "location": "Bench",
+                "date_time": datetime.utcnow() + timedelta(days=30), "capacity": 10000,
+                "created_by": first_user,
+            }
+            for i in range(events)
+        ])
+        db.commit()
+    return list(range(first_user, first_user + users)), list(range(first_event, first_event + events)), admin_email
+
+def pairs_for(rng: random.Random, user_ids: list, event_ids: list, count: int) -> list:
+    """`count` distinct random (user, event) pairs"""
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add((rng.choice(user_ids), rng.choice(event_ids)))
+    return sorted(chosen, key=lambda _: rng.random())
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+async def run(client: httpx.AsyncClient, requests: list, concurrency: int) -> tuple:
+    """Send (path, body, headers) requests `concurrency` at a time; returns (latencies, responses)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def send(path, body, headers):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(path, json=body, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            return response
+
+    responses = await asyncio.gather(*(send(*request) for request in requests))
+    return latencies, responses
+
+async def main_async(args) -> None:
+    from auth import create_access_token
+    from main import app
+
+    rng = random.Random(args.seed)
+    user_ids, event_ids, admin_email = seed(args.users, args.events)
+    half = len(user_ids) // 2
+    single_pairs = pairs_for(rng, user_ids[:half], event_ids, args.pairs)
+    bulk_pairs = pairs_for(rng, user_ids[half:], event_ids, args.pairs)
+    token = lambda user_id: {"Authorization": f"Bearer {create_access_token({'sub': f'bulk-bench{user_id}@example.com'})}"}
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': admin_email})}"}
+
+    paths = {
+        "single": [(f"/events/{event_id}/register", None, token(user_id)) for user_id, event_id in single_pairs],
+        "bulk": [
+            ("/registrations/bulk", {"registrations": [
+                {"user_id": user_id, "event_id": event_id} for user_id, event_id in bulk_pairs[i:i + args.batch]
+            ]}, admin)
+            for i in range(0, len(bulk_pairs), args.batch)
+        ],
+    }
+    counter = StatementCounter()
+    transport = httpx.ASGITransport(app=app)
+    print(f"{'path':<8} {'requests':>8} {'registered':>10} {'seconds':>8} {'reg/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'SQL/reg':>8}")
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        for name, requests in paths.items():
+            statements = counter.count
+            started = time.perf_counter()
+            latencies, responses = await run(client, requests, args.concurrency)
+            elapsed = time.perf_counter() - started
+            if name == "single":
+                registered = sum(response.status_code == 200 for response in responses)
+            else:
+                registered = sum(response.json()["registered"] for response in responses if response.status_code == 200)
+            latencies.sort()
+            print(
+                f"{name:<8} {len(requests):>8} {registered:>10} {elapsed:>8.2f} {registered / elapsed:>9.1f} "
+                f"{statistics.median(latencies) * 1000:>8.1f} {latencies[math.ceil(0.95 * len(latencies)) - 1] * 1000:>8.1f} "
+                f"{(counter.count - statements) / max(registered, 1):>8.2f}"
+            )
+    await async_engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=4000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=2000, help="Registrations per path")
+    parser.add_argument("--batch", type=int, default=200, help="Pairs per bulk request (max 1000)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+
+    run_migrations()
+    print(f"📊 {args.pairs} registrations per path on {engine.dialect.name}, bulk batches of {args.batch}, concurrency {args.concurrency}")
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
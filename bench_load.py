@@ -0,0 +1,223 @@
+"""Load benchmark: a concurrent request mix against the API.
+
+Drives these scenarios concurrently, picked by weight (see --mix):
+
+  events_page    GET /events, following next_cursor page by page
+  events_search  GET /events?search=<topic>
+  event_detail   GET /events/{id}, Zipf-skewed towards the popular events
+  login          POST /auth/login (bcrypt; expect 429s under saturation)
+  register       POST /events/{id}/register, skewed like event_detail
+  admin          GET /admin/stats, /admin/users, /admin/events, /admin/registrations
+
+and reports throughput and p50/p95/p99 latency per scenario, with the
+status codes seen. Data comes from seed.py: by default a temporary SQLite
+file is seeded first. Requests go to an in-process app (httpx ASGI
+transport, no network), or to a running server with --url, in which case
+DATABASE_URL must point at that server's database (seeded beforehand).
+Runs are repeatable for a given --seed; --json saves the results.
+
+Usage:
+    python bench_load.py                                   # temporary SQLite file
+    python bench_load.py --duration 60 --concurrency 100 --users 200000
+    DATABASE_URL=mysql+pymysql://... python bench_load.py --no-seed
+    DATABASE_URL=mysql+pymysql://... python bench_load.py --no-seed --url http://127.0.0.1:8080
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+import httpx
+
+import seed
+from database import engine
+
+DEFAULT_MIX = "events_page=30,events_search=15,event_detail=25,login=5,register=15,admin=10"
+ADMIN_PATHS = ["/admin/stats", "/admin/users?limit=50", "/admin/events?limit=50", "/admin/registrations?limit=50"]
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+class Scenarios:
+    """The request scenarios, sharing tokens and event ids gathered at setup"""
+
+    def __init__(self, client: httpx.AsyncClient, user_ids: list, event_ids: list, tokens: list, admin_token: str):
+        self.client = client
+        self.user_ids = user_ids
+        self.event_ids = event_ids  # most popular first
+        self.event_weights = seed.zipf_weights(len(event_ids), 1.1)
+        self.tokens = tokens
+        self.admin_headers = {"Authorization": f"Bearer {admin_token}"}
+        self.cursors = {}  # worker -> next_cursor of its last page
+
+    def _user(self, rng: random.Random) -> dict:
+        return {"Authorization": f"Bearer {rng.choice(self.tokens)}"}
+
+    async def events_page(self, rng, worker):
+        params = {"limit": 20, "include_total": "false"}
+        if self.cursors.get(worker):
+            params["cursor"] = self.cursors[worker]
+        response = await self.client.get("/events", params=params)
+        if response.status_code == 200:
+            self.cursors[worker] = response.json().get("next_cursor")
+        return response
+
+    async def events_search(self, rng, worker):
+        return await self.client.get("/events", params={"search": rng.choice(seed.TOPICS), "limit": 20})
+
+    async def event_detail(self, rng, worker):
+        event_id = seed.pick(rng, self.event_ids, self.event_weights)
+        return await self.client.get(f"/events/{event_id}", headers=self._user(rng))
+
+    async def login(self, rng, worker):
+        email = f"seed-user{rng.choice(self.user_ids)}@example.com"
+        return await self.client.post("/auth/login", json={"email": email, "password": seed.SEED_PASSWORD})
+
+    async def register(self, rng, worker):
+        event_id = seed.pick(rng, self.event_ids, self.event_weights)
+        return await self.client.post(f"/events/{event_id}/register", headers=self._user(rng))
+
+    async def admin(self, rng, worker):
+        return await self.client.get(rng.choice(ADMIN_PATHS), headers=self.admin_headers)
+
+async def setup(client: httpx.AsyncClient, sessions: int, rng: random.Random) -> Scenarios:
+    """Log in the admin and `sessions` random seeded users"""
+    with engine.connect() as connection:
+        user_ids = [
+            int(email[len("seed-user"):-len("@example.com")]) for email in connection.exec_driver_sql(
+                "SELECT email FROM users WHERE email LIKE 'seed-user%@example.com'"
+            ).scalars()
+        ]
+    if not user_ids:
+        raise SystemExit("❌ No seeded users found; run seed.py first or drop --no-seed")
+
+    async def token(email: str) -> str:
+        response = await client.post("/auth/login", json={"email": email, "password": seed.SEED_PASSWORD})
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    tokens = [await token(f"seed-user{user_id}@example.com") for user_id in rng.sample(user_ids, min(sessions, len(user_ids)))]
+    return Scenarios(client, user_ids, seed.hot_event_ids(10_000), tokens, await token(seed.ADMIN_EMAIL))
+
+async def run(scenarios: Scenarios, mix: dict, duration: float, concurrency: int, seed_value: int) -> dict:
+    names, weights = list(mix), list(mix.values())
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    deadline = time.perf_counter() + duration
+
+    async def worker(index: int):
+        rng = random.Random(seed_value * 1000 + index)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await getattr(scenarios, name)(rng, index)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = e.__class__.__name__
+            latencies[name].append(time.perf_counter() - started)
+            statuses[name][status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for name in names:
+        values = sorted(latencies[name])
+        if not values:
+            continue
+        results[name] = {
+            "requests": len(values),
+            "throughput": len(values) / elapsed,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000,
+            "statuses": {str(status): count for status, count in sorted(statuses[name].items(), key=str)},
+        }
+    everything = sorted(value for values in latencies.values() for value in values)
+    results["total"] = {
+        "requests": len(everything),
+        "throughput": len(everything) / elapsed,
+        "p50_ms": percentile(everything, 50) * 1000,
+        "p95_ms": percentile(everything, 95) * 1000,
+        "p99_ms": percentile(everything, 99) * 1000,
+        "max_ms": everything[-1] * 1000,
+    }
+    return results
+
+def report(results: dict) -> None:
+    print(f"{'scenario':<14} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  statuses")
+    for name, result in results.items():
+        statuses = " ".join(f"{status}:{count}" for status, count in result.get("statuses", {}).items())
+        print(
+            f"{name:<14} {result['requests']:>8} {result['throughput']:>8.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['max_ms']:>8.1f}  {statuses}"
+        )
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if not hasattr(Scenarios, name.strip()) or name.strip().startswith("_"):
+            raise argparse.ArgumentTypeError(f"unknown scenario: {name}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+async def main_async(args) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        from main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+    async with client:
+        scenarios = await setup(client, args.sessions, random.Random(args.seed))
+        if args.warmup:
+            await run(scenarios, args.mix, args.warmup, args.concurrency, args.seed + 1)
+        return await run(scenarios, args.mix, args.duration, args.concurrency, args.seed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Benchmark a running server instead of an in-process app")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of unmeasured load first")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--sessions", type=int, default=50, help="Logged-in users to spread requests over")
+    parser.add_argument("--no-seed", action="store_true", help="Use the data already in the database")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--events", type=int, default=2_000)
+    parser.add_argument("--registrations", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for data and request order")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+
+    run_migrations()
+    if not args.no_seed:
+        print(f"🌱 Seeding {engine.dialect.name}...")
+        seed.seed(args.users, args.events, args.registrations, rng=random.Random(args.seed))
+
+    mix = ", ".join(f"{name}={weight:g}" for name, weight in args.mix.items())
+    print(f"📊 {args.duration:g}s at concurrency {args.concurrency} against {args.url or 'in-process app'} ({engine.dialect.name}); mix {mix}")
+    results = asyncio.run(main_async(args))
+    report(results)
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"arguments": vars(args), "results": results}, output, indent=2)
+
+if __name__ == "__main__":
+    main()
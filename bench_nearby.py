@@ -0,0 +1,108 @@
+"""Latency benchmark for /events/nearby queries (crud.get_nearby_events).
+
+Seeds `--events` events with coordinates clustered around a handful of cities
+(plus a uniform background across the globe), then runs `--queries` radius
+queries centred on random points near those cities and reports latency
+percentiles against `--budget-ms`.
+
+Usage:
+    python bench_nearby.py                         # 1M events, temporary SQLite file
+    python bench_nearby.py --events 100000 --radius-km 5
+    DATABASE_URL=mysql+pymysql://... python bench_nearby.py
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+)
+
+from sqlalchemy import insert
+
+from database import engine, Base, SessionLocal
+from models import User, Event
+import crud
+import geo
+
+CITIES = [
+    (18.52, 73.85), (19.08, 72.88), (28.61, 77.21), (12.97, 77.59),
+    (51.51, -0.13), (40.71, -74.01), (35.68, 139.69), (-33.87, 151.21),
+]
+BATCH = 20000
+
+def seed(events: int, rng: random.Random) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [{"email": "bench@example.com", "full_name": "Bench", "hashed_password": "x"}])
+        creator_id = db.query(User.id).scalar()
+        start = datetime.utcnow()
+        for offset in range(0, events, BATCH):
+            rows = []
+            for i in range(offset, min(events, offset + BATCH)):
+                if i % 10 == 0:
+                    latitude, longitude = rng.uniform(-80, 80), rng.uniform(-180, 180)
+                else:
+                    city = CITIES[i % len(CITIES)]
+                    latitude, longitude = city[0] + rng.gauss(0, 0.3), city[1] + rng.gauss(0, 0.3)
+                rows.append({
+                    "name": f"Event {i}",
+                    "location": "Bench",
+                    "date_time": start + timedelta(hours=i % 5000),
+                    "capacity": 100,
+                    "created_by": creator_id,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "geohash": geo.encode(latitude, longitude),
+                })
+            db.execute(insert(Event), rows)
+        db.commit()
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--radius-km", type=float, default=10.0)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="Target p95 latency")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    Base.metadata.create_all(bind=engine)
+
+    print(f"🌱 Seeding {args.events} events on {engine.dialect.name}...")
+    started = time.perf_counter()
+    seed(args.events, rng)
+    print(f"✅ Seeded in {time.perf_counter() - started:.1f}s")
+
+    latencies = []
+    results = 0
+    db = SessionLocal()
+    try:
+        for _ in range(args.queries):
+            city = rng.choice(CITIES)
+            latitude, longitude = city[0] + rng.gauss(0, 0.2), city[1] + rng.gauss(0, 0.2)
+            started = time.perf_counter()
+            nearby = crud.get_nearby_events(db, latitude, longitude, args.radius_km, limit=args.limit)
+            latencies.append(time.perf_counter() - started)
+            results += len(nearby)
+            db.expunge_all()
+    finally:
+        db.close()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(
+        f"📊 radius {args.radius_km} km, {args.queries} queries, {results / args.queries:.1f} results/query   "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} ms   p95 {p95:6.1f} ms   max {latencies[-1] * 1000:6.1f} ms"
+    )
+    print(("✅" if p95 <= args.budget_ms else "❌") + f" p95 budget {args.budget_ms:.0f} ms")
+
+if __name__ == "__main__":
+    main()
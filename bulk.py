@@ -0,0 +1,213 @@
+import codecs
+import csv
+import io
+import json
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from schemas import EventCreate
+import async_crud
+
+# Bulk event import and export.
+#
+# Imports are parsed from the request body as it arrives, one record at a
+# time, validated against EventCreate and inserted IMPORT_BATCH_SIZE rows per
+# multi-row INSERT, each batch in its own transaction. A bad row is reported
+# with its line number and skipped; the rest of its batch is still inserted.
+# Exports page through the table by id and stream each page as it is read.
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 500))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+# Bounds on one CSV record, so an unbalanced quote can't buffer the whole upload
+IMPORT_MAX_RECORD_LINES = int(os.getenv("IMPORT_MAX_RECORD_LINES", 100))
+IMPORT_MAX_RECORD_BYTES = int(os.getenv("IMPORT_MAX_RECORD_BYTES", 65536))
+
+EXPORT_COLUMNS = [
+    "id", "name", "description", "location", "date_time", "capacity",
+    "latitude", "longitude", "registered_count", "created_by", "created_at",
+]
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines, keeping line endings"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        # Split on "\n" only: str.splitlines() also breaks on characters that
+        # are valid inside CSV fields and JSON strings
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+class _CsvRecords:
+    """Assembles CSV records from lines; a record ends at a newline outside quotes.
+
+    A quoted field may span lines, but a record that is still open after
+    IMPORT_MAX_RECORD_LINES lines or IMPORT_MAX_RECORD_BYTES is reported as an
+    unterminated quote at its first line, and the lines after that one are
+    parsed again, so one stray quote costs a single row.
+    """
+
+    def __init__(self):
+        self.header = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.lines: List[Tuple[int, str]] = []
+        self.size = 0
+        self.quotes = 0
+
+    def feed(self, number: int, line: str) -> Iterator[Tuple[int, Any]]:
+        pending = deque([(number, line)])
+        while pending:
+            number, line = pending.popleft()
+            self.lines.append((number, line))
+            self.size += len(line)
+            self.quotes += line.count('"')
+            if self.quotes % 2 == 0:
+                yield from self._parse()
+            elif len(self.lines) > IMPORT_MAX_RECORD_LINES or self.size > IMPORT_MAX_RECORD_BYTES:
+                start, replay = self.lines[0][0], self.lines[1:]
+                self._reset()
+                yield start, ValueError("Unterminated quoted field")
+                pending.extendleft(reversed(replay))
+
+    def finish(self) -> Iterator[Tuple[int, Any]]:
+        while self.lines:
+            start, replay = self.lines[0][0], self.lines[1:]
+            self._reset()
+            yield start, ValueError("Unterminated quoted field")
+            for number, line in replay:
+                yield from self.feed(number, line)
+
+    def _parse(self) -> Iterator[Tuple[int, Any]]:
+        start = self.lines[0][0]
+        values = next(csv.reader(["".join(line for _, line in self.lines)]), [])
+        self._reset()
+        if not values:
+            return
+        if self.header is None:
+            self.header = [value.strip() for value in values]
+            return
+        yield start, {
+            name: value if value != "" else None
+            for name, value in zip(self.header, values)
+        }
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (line number, row) for each CSV record after the header row"""
+    records = _CsvRecords()
+    number = 0
+    async for line in _lines(chunks):
+        number += 1
+        for record in records.feed(number, line):
+            yield record
+    for record in records.finish():
+        yield record
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (line number, decoded value) for each non-blank NDJSON line"""
+    number = 0
+    async for line in _lines(chunks):
+        number += 1
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield number, e
+
+def _error_messages(error: Exception) -> List[str]:
+    if isinstance(error, ValidationError):
+        return [
+            f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+            for detail in error.errors()
+        ]
+    if isinstance(error, json.JSONDecodeError):
+        return [f"Invalid JSON: {error.msg}"]
+    return [str(error)]
+
+async def import_events(db: AsyncSession, records: AsyncIterator[Tuple[int, Any]], user_id: int) -> dict:
+    """Validate and insert streamed records; returns counts and per-row errors"""
+    report = {"inserted": 0, "failed": 0, "errors": []}
+    batch, batch_lines = [], []
+
+    def record_error(line: int, messages: List[str]) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < IMPORT_MAX_ERRORS:
+            report["errors"].append({"line": line, "errors": messages})
+
+    async def flush() -> None:
+        try:
+            report["inserted"] += await async_crud.bulk_create_events(db, batch, user_id)
+        except Exception as e:
+            await db.rollback()
+            for line in batch_lines:
+                record_error(line, [f"Database error: {e.__class__.__name__}"])
+        batch.clear()
+        batch_lines.clear()
+
+    async for line, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ValueError("Each record must be an object")
+            batch.append(EventCreate(**record))
+            batch_lines.append(line)
+        except (ValidationError, ValueError) as e:
+            record_error(line, _error_messages(e))
+            continue
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    report["errors_truncated"] = report["failed"] > len(report["errors"])
+    return report
+
+def _export_row(event) -> Dict[str, Any]:
+    row = {column: getattr(event, column) for column in EXPORT_COLUMNS}
+    for column in ("date_time", "created_at"):
+        if row[column] is not None:
+            row[column] = row[column].isoformat()
+    return row
+
+async def export_events(format: str) -> AsyncIterator[str]:
+    """Stream every event as CSV or NDJSON, one page of rows at a time"""
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, lineterminator="\n")
+        writer.writeheader()
+        yield buffer.getvalue()
+
+    # Its own session, as the response body outlives the request's dependencies
+    async with AsyncSessionLocal() as db:
+        after_id = 0
+        while True:
+            events = await async_crud.get_events_by_id_range(db, after_id=after_id, limit=EXPORT_BATCH_SIZE)
+            if not events:
+                break
+            rows = [_export_row(event) for event in events]
+            after_id = events[-1].id
+            db.expunge_all()
+
+            if format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(row) + "\n" for row in rows)
@@ -0,0 +1,26 @@
+import os
+import tempfile
+
+import pytest
+
+# test_db.py and test_db_connection.py.py are standalone connectivity scripts
+# that talk to the configured MySQL server at import time, not pytest suites.
+collect_ignore = ["test_db.py", "test_db_connection.py.py"]
+
+# database.py and auth.py read their settings at import time. Point them at a
+# throwaway SQLite file (or TEST_DATABASE_URL) so that tests exercising the
+# app never touch the database configured in .env; the empty
+# ASYNC_DATABASE_URL makes the async engine follow DATABASE_URL.
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    """Create the test schema, as `python manage.py migrate` does for deployments"""
+    from migrations import run_migrations
+
+    run_migrations()
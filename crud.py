@@ -1,22 +1,35 @@
-﻿from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from typing import List, Tuple, Optional
+﻿from sqlalchemy.orm import Session, aliased, contains_eager
+from sqlalchemy import func, and_, or_, case, select, update, insert, delete, Select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from collections import Counter
+from typing import Collection, Dict, List, Tuple, Optional, Union
 from datetime import datetime
+from enum import Enum
 
-from models import User, Event, EventRegistration
+from models import User, Event, EventRegistration, WaitlistEntry, StatCounter
 from schemas import UserCreate, EventCreate, EventUpdate
-from auth import get_password_hash
+from search import get_search_backend, inverted_index
+import geo
+import stats
 
 # User CRUD operations
-def create_user(db: Session, user: UserCreate) -> User:
-    """Create a new user"""
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """Create a new user, hashing the password unless a hash is supplied"""
+    if hashed_password is None:
+        # Imported here because auth itself depends on crud
+        from auth import get_password_hash
+        
+        hashed_password = get_password_hash(user.password)
+    now = datetime.utcnow()
     db_user = User(
         email=user.email.lower(),  # Store email in lowercase
         full_name=user.full_name,
-        hashed_password=hashed_password
+        hashed_password=hashed_password,
+        created_at=now
     )
     db.add(db_user)
+    stats.increment(db, stats.USERS, day=stats.day_bucket(now))
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -29,10 +42,87 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     """Get user by ID"""
     return db.query(User).filter(User.id == user_id).first()
 
+def delete_user(db: Session, user_id: int) -> bool:
+    """Delete a user along with their registrations and waitlist entries (admin)"""
+    db_user = db.query(User).filter(User.id == user_id).first()
+    if not db_user:
+        return False
+    
+    db.query(WaitlistEntry).filter(WaitlistEntry.user_id == user_id).delete(synchronize_session=False)
+    registrations = db.query(EventRegistration).filter(EventRegistration.user_id == user_id).all()
+    for registration in registrations:
+        db.delete(registration)
+        _adjust_registered_count(db, registration.event_id, -1)
+        stats.increment(db, stats.REGISTRATIONS, -1, day=stats.day_bucket(registration.registered_at))
+        _promote_waitlist(db, registration.event_id)
+    
+    db.delete(db_user)
+    stats.increment(db, stats.USERS, -1, day=stats.day_bucket(db_user.created_at))
+    db.commit()
+    return True
+
+def update_user(
+    db: Session, user_id: int, full_name: Optional[str] = None, email: Optional[str] = None
+) -> Optional[User]:
+    """Update a user's name and/or email (admin)"""
+    db_user = db.query(User).filter(User.id == user_id).first()
+    if not db_user:
+        return None
+    
+    if full_name:
+        db_user.full_name = full_name
+    if email:
+        db_user.email = email
+    
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+def update_user_password_hash(db: Session, user_id: int, hashed_password: str) -> Optional[User]:
+    """Replace a user's stored password hash"""
+    db_user = db.query(User).filter(User.id == user_id).first()
+    if not db_user:
+        return None
+    
+    db_user.hashed_password = hashed_password
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
 def get_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
     """Get list of users"""
     return db.query(User).filter(User.is_active == True).offset(skip).limit(limit).all()
 
+def get_all_users(db: Session) -> List[User]:
+    """Get all users, including inactive ones (admin)"""
+    return db.query(User).all()
+
+def admin_users_statement(
+    after_id: int = None,
+    search: str = None,
+    is_active: bool = None,
+    role: str = None
+) -> Select:
+    """Select users for the admin listing, in id order"""
+    statement = select(User).order_by(User.id)
+    if after_id is not None:
+        statement = statement.where(User.id > after_id)
+    if search:
+        statement = statement.where(or_(User.email.ilike(f"%{search}%"), User.full_name.ilike(f"%{search}%")))
+    if is_active is not None:
+        statement = statement.where(User.is_active == is_active)
+    if role:
+        statement = statement.where(User.role == role)
+    return statement
+
+def get_recent_users(db: Session, limit: int = 5) -> List[User]:
+    """Get the most recently created users"""
+    return db.query(User).order_by(User.id.desc()).limit(limit).all()
+
+def count_users(db: Session) -> int:
+    """Get the total number of users"""
+    return db.query(User).count()
+
 # Event CRUD operations
 def get_events(db: Session, skip: int = 0, limit: int = 10) -> Tuple[List[Event], int]:
     """Get paginated list of events"""
@@ -50,40 +140,140 @@ def get_event_by_id(db: Session, event_id: int) -> Optional[Event]:
     """Get event by ID"""
     return db.query(Event).filter(Event.id == event_id).first()
 
+def get_events_by_creator(db: Session, user_id: int) -> List[Event]:
+    """Get events created by a user"""
+    return db.query(Event).filter(Event.created_by == user_id).all()
+
+def get_all_events_with_creators(db: Session) -> List[Event]:
+    """Get all events with their creator loaded (admin)"""
+    return (
+        db.query(Event)
+        .join(Event.creator)
+        .options(contains_eager(Event.creator))
+        .all()
+    )
+
+def admin_events_statement(
+    after_id: int = None,
+    search: str = None,
+    created_by: int = None,
+    date_from: datetime = None,
+    date_to: datetime = None
+) -> Select:
+    """Select events with their creator joined in, for the admin listing, in id order"""
+    statement = (
+        select(Event)
+        .join(Event.creator)
+        .options(contains_eager(Event.creator))
+        .order_by(Event.id)
+    )
+    if after_id is not None:
+        statement = statement.where(Event.id > after_id)
+    if search:
+        statement = statement.where(Event.name.ilike(f"%{search}%"))
+    if created_by is not None:
+        statement = statement.where(Event.created_by == created_by)
+    if date_from:
+        statement = statement.where(Event.date_time >= date_from)
+    if date_to:
+        statement = statement.where(Event.date_time <= date_to)
+    return statement
+
+def get_recent_events(db: Session, limit: int = 5) -> List[Event]:
+    """Get the most recently created events"""
+    return db.query(Event).order_by(Event.id.desc()).limit(limit).all()
+
+def count_events(db: Session) -> int:
+    """Get the total number of events"""
+    return db.query(Event).count()
+
 def create_event(db: Session, event: EventCreate, user_id: int) -> Event:
     """Create a new event"""
+    now = datetime.utcnow()
     db_event = Event(
         name=event.name,
         description=event.description,
         location=event.location,
         date_time=event.date_time,
         capacity=event.capacity,
-        created_by=user_id
+        latitude=event.latitude,
+        longitude=event.longitude,
+        geohash=_geohash(event.latitude, event.longitude),
+        created_by=user_id,
+        created_at=now
     )
     db.add(db_event)
+    stats.increment(db, stats.EVENTS, day=stats.day_bucket(now))
+    stats.increment(db, stats.CAPACITY, event.capacity)
     db.commit()
     db.refresh(db_event)
     return db_event
 
+def bulk_create_events(db: Session, events: List[EventCreate], user_id: int) -> int:
+    """Insert events with one multi-row INSERT and commit"""
+    now = datetime.utcnow()
+    db.execute(insert(Event), [
+        {
+            **event.dict(),
+            "geohash": _geohash(event.latitude, event.longitude),
+            "created_by": user_id,
+            "created_at": now,
+        }
+        for event in events
+    ])
+    stats.increment(db, stats.EVENTS, len(events), day=stats.day_bucket(now))
+    stats.increment(db, stats.CAPACITY, sum(event.capacity for event in events))
+    db.commit()
+    # Core inserts bypass the listeners that keep the in-process search index current
+    inverted_index.reset()
+    return len(events)
+
+def get_events_by_id_range(db: Session, after_id: int = 0, limit: int = 1000) -> List[Event]:
+    """Get the next `limit` events with an id above `after_id`, in id order"""
+    return db.query(Event).filter(Event.id > after_id).order_by(Event.id).limit(limit).all()
+
 def update_event(db: Session, event_id: int, event_update: EventUpdate) -> Optional[Event]:
     """Update an event"""
+    return update_event_fields(db, event_id, event_update.dict(exclude_unset=True))
+
+def update_event_fields(db: Session, event_id: int, update_data: dict) -> Optional[Event]:
+    """Apply a dict of column values to an event"""
     db_event = db.query(Event).filter(Event.id == event_id).first()
     if not db_event:
         return None
     
-    update_data = event_update.dict(exclude_unset=True)
+    if "capacity" in update_data:
+        stats.increment(db, stats.CAPACITY, update_data["capacity"] - db_event.capacity)
     for field, value in update_data.items():
         setattr(db_event, field, value)
+    if "latitude" in update_data or "longitude" in update_data:
+        db_event.geohash = _geohash(db_event.latitude, db_event.longitude)
+    if "capacity" in update_data:
+        # Added seats go to the waitlist
+        db.flush()
+        _promote_waitlist(db, event_id)
     
     db.commit()
     db.refresh(db_event)
     return db_event
 
 def delete_event(db: Session, event_id: int) -> bool:
-    """Delete an event"""
+    """Delete an event along with its registrations and waitlist"""
     db_event = db.query(Event).filter(Event.id == event_id).first()
     if db_event:
+        registrations_by_day = (
+            db.query(func.date(EventRegistration.registered_at), func.count(EventRegistration.id))
+            .filter(EventRegistration.event_id == event_id)
+            .group_by(func.date(EventRegistration.registered_at))
+            .all()
+        )
+        for day, count in registrations_by_day:
+            stats.increment(db, stats.REGISTRATIONS, -count, day=stats.as_day(day))
+        db.query(EventRegistration).filter(EventRegistration.event_id == event_id).delete(synchronize_session=False)
+        db.query(WaitlistEntry).filter(WaitlistEntry.event_id == event_id).delete(synchronize_session=False)
         db.delete(db_event)
+        stats.increment(db, stats.EVENTS, -1, day=stats.day_bucket(db_event.created_at))
+        stats.increment(db, stats.CAPACITY, -db_event.capacity)
         db.commit()
         return True
     return False
@@ -96,17 +286,7 @@ def search_events(
     limit: int = 10
 ) -> Tuple[List[Event], int]:
     """Search events by name, description, or location"""
-    filters = []
-    
-    if query:
-        search_filter = or_(
-            Event.name.ilike(f"%{query}%"),
-            Event.description.ilike(f"%{query}%")
-        )
-        filters.append(search_filter)
-    
-    if location:
-        filters.append(Event.location.ilike(f"%{location}%"))
+    filters = _event_search_filters(db, query, location)
     
     base_query = db.query(Event)
     if filters:
@@ -123,31 +303,364 @@ def search_events(
     
     return events, total
 
-# Event registration CRUD operations
-def register_for_event(db: Session, user_id: int, event_id: int) -> Optional[EventRegistration]:
-    """Register a user for an event"""
-    # Check if already registered
-    existing = db.query(EventRegistration).filter(
-        and_(
-            EventRegistration.user_id == user_id,
-            EventRegistration.event_id == event_id
+def count_matching_events(db: Session, query: str = None, location: str = None) -> int:
+    """Count events matching the search filters"""
+    filters = _event_search_filters(db, query, location)
+    base_query = db.query(Event)
+    if filters:
+        base_query = base_query.filter(and_(*filters))
+    return base_query.count()
+
+def get_events_page(
+    db: Session,
+    limit: int = 10,
+    skip: int = 0,
+    after: Optional[Tuple[datetime, int]] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    query: str = None,
+    location: str = None
+) -> Tuple[List[Event], bool]:
+    """Get one page of events ordered by (date_time, id), without counting.
+    
+    `after`/`before` are (date_time, id) keyset bounds, which seek through the
+    date_time index instead of scanning past `skip` rows. Returns the page in
+    ascending order and whether more events exist in the paging direction.
+    """
+    filters = _event_search_filters(db, query, location)
+    # The redundant date_time bound gives the planner a range to seek on; the
+    # OR alone makes it walk the index from the start
+    if after:
+        filters.append(Event.date_time >= after[0])
+        filters.append(or_(
+            Event.date_time > after[0],
+            and_(Event.date_time == after[0], Event.id > after[1])
+        ))
+    if before:
+        filters.append(Event.date_time <= before[0])
+        filters.append(or_(
+            Event.date_time < before[0],
+            and_(Event.date_time == before[0], Event.id < before[1])
+        ))
+    
+    base_query = db.query(Event)
+    if filters:
+        base_query = base_query.filter(and_(*filters))
+    
+    if before:
+        base_query = base_query.order_by(Event.date_time.desc(), Event.id.desc())
+    else:
+        base_query = base_query.order_by(Event.date_time.asc(), Event.id.asc())
+    if not (after or before):
+        base_query = base_query.offset(skip)
+    
+    events = base_query.limit(limit + 1).all()
+    has_more = len(events) > limit
+    events = events[:limit]
+    if before:
+        events.reverse()
+    return events, has_more
+
+def get_events_by_relevance(
+    db: Session,
+    query: str,
+    limit: int = 10,
+    skip: int = 0,
+    location: str = None
+) -> Tuple[List[Event], bool]:
+    """Get one page of events matching `query`, most relevant first.
+    
+    Returns the page and whether more matching events follow it.
+    """
+    backend = get_search_backend(db)
+    relevance = backend.relevance(db, query)
+    
+    if relevance is not None:
+        events = (
+            db.query(Event)
+            .filter(and_(*_event_search_filters(db, query, location)))
+            .order_by(relevance.desc(), Event.date_time.asc(), Event.id.asc())
+            .offset(skip)
+            .limit(limit + 1)
+            .all()
         )
-    ).first()
+    else:
+        # Ranked and paged in Python by the backend's scores; only the page is loaded
+        scores = backend.scores(db, query)
+        if not scores:
+            return [], False
+        ranked = sorted(scores, key=lambda event_id: (-scores[event_id], event_id))
+        if location:
+            candidates = db.query(Event.id).filter(and_(*_event_search_filters(db, query, location)))
+            matching = {event_id for (event_id,) in candidates}
+            ranked = [event_id for event_id in ranked if event_id in matching]
+        page_ids = ranked[skip:skip + limit + 1]
+        by_id = {event.id: event for event in db.query(Event).filter(Event.id.in_(page_ids))}
+        events = [by_id[event_id] for event_id in page_ids if event_id in by_id]
+    
+    return events[:limit], len(events) > limit
+
+def get_nearby_events(
+    db: Session,
+    latitude: float,
+    longitude: float,
+    radius_km: float,
+    limit: int = 20,
+    query: str = None,
+    date_from: datetime = None,
+    date_to: datetime = None
+) -> List[Tuple[Event, float]]:
+    """Get events within `radius_km` of a point, nearest first, with their distances"""
+    filters = _event_search_filters(db, query, None)
+    if date_from:
+        filters.append(Event.date_time >= date_from)
+    if date_to:
+        filters.append(Event.date_time <= date_to)
     
-    if existing:
+    # Try smaller circles first: once one holds `limit` events they are the
+    # nearest, which keeps scans in dense areas short
+    for scan_radius in (radius_km / 16, radius_km / 4, radius_km):
+        nearest = _events_within(db, latitude, longitude, scan_radius, filters)
+        if len(nearest) >= limit:
+            break
+    nearest = nearest[:limit]
+    if not nearest:
+        return []
+    
+    # Ranked on the coordinates alone; load only the events that made the cut
+    events = {event.id: event for event in db.query(Event).filter(Event.id.in_([event_id for _, event_id in nearest]))}
+    return [(events[event_id], distance) for distance, event_id in nearest if event_id in events]
+
+def _events_within(db: Session, latitude: float, longitude: float, radius_km: float, filters: list) -> List[Tuple[float, int]]:
+    low, high = geo.latitude_band(latitude, radius_km)
+    filters = filters + [Event.latitude.between(low, high)]
+    cells = geo.covering_cells(latitude, longitude, radius_km)
+    if cells is not None:
+        ranges = [geo.prefix_range(cell) for cell in cells]
+        filters.append(or_(*[
+            and_(Event.geohash >= start, Event.geohash < end) if end else Event.geohash >= start
+            for start, end in ranges
+        ]))
+    
+    within = []
+    for event_id, event_latitude, event_longitude in db.query(Event.id, Event.latitude, Event.longitude).filter(and_(*filters)):
+        distance = geo.distance_km(latitude, longitude, event_latitude, event_longitude)
+        if distance <= radius_km:
+            within.append((distance, event_id))
+    within.sort()
+    return within
+
+def _geohash(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    if latitude is None or longitude is None:
         return None
+    return geo.encode(latitude, longitude)
+
+def _event_search_filters(db: Session, query: Optional[str], location: Optional[str]) -> list:
+    filters = []
+    
+    if query:
+        filters.append(get_search_backend(db).filter(db, query))
     
+    if location:
+        filters.append(Event.location.ilike(f"%{location}%"))
+    
+    return filters
+
+# Event registration CRUD operations
+class RegistrationOutcome(str, Enum):
+    REGISTERED = "registered"
+    FULL = "full"
+    DUPLICATE = "duplicate"
+    NOT_FOUND = "not_found"
+    WAITLISTED = "waitlisted"
+    UNKNOWN_USER = "unknown_user"
+    FORBIDDEN = "forbidden"
+
+def register_for_event(
+    db: Session, user_id: int, event_id: int
+) -> Tuple[RegistrationOutcome, Optional[EventRegistration]]:
+    """Claim a seat and register a user for an event.
+    
+    The seat is claimed with a single conditional UPDATE on the event row
+    (`registered_count < capacity`), which also row-locks the event until
+    commit, so concurrent attempts cannot overbook. Duplicates are rejected
+    by the unique (user_id, event_id) constraint on insert. A waitlist entry
+    the user holds for the event is removed in the same transaction.
+    """
+    claimed = db.execute(
+        update(Event)
+        .where(Event.id == event_id, Event.registered_count < Event.capacity)
+        .values(registered_count=Event.registered_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    
+    if not claimed:
+        db.rollback()
+        if get_event_by_id(db, event_id) is None:
+            return RegistrationOutcome.NOT_FOUND, None
+        # A retry from someone already holding a seat is a duplicate, not a full event
+        if is_user_registered(db, user_id, event_id):
+            return RegistrationOutcome.DUPLICATE, None
+        return RegistrationOutcome.FULL, None
+    
+    now = datetime.utcnow()
     registration = EventRegistration(
         user_id=user_id,
-        event_id=event_id
+        event_id=event_id,
+        registered_at=now
     )
     db.add(registration)
-    db.commit()
+    stats.increment(db, stats.REGISTRATIONS, day=stats.day_bucket(now))
+    _leave_waitlists(db, {event_id: [user_id]})
+    try:
+        db.commit()
+    except IntegrityError:
+        # Rolls back the claimed seat as well
+        db.rollback()
+        return RegistrationOutcome.DUPLICATE, None
+    
     db.refresh(registration)
-    return registration
+    return RegistrationOutcome.REGISTERED, registration
+
+# Attempts at claiming a batch's seats before settling it one by one
+BATCH_CLAIM_ATTEMPTS = 3
+
+def register_many(
+    db: Session,
+    pairs: List[Tuple[int, int]],
+    waitlist: Collection[Tuple[int, int]] = (),
+    organizer_id: Optional[int] = None
+) -> List[Tuple[RegistrationOutcome, Optional[Union[EventRegistration, WaitlistEntry]]]]:
+    """Register many (user_id, event_id) pairs in a single transaction.
+    
+    Validation is set-based: the events, the users and the existing
+    registrations (and waitlist entries) of all pairs are read with one
+    query each. Pairs with an unknown event are NOT_FOUND, with an unknown
+    user UNKNOWN_USER, and, if `organizer_id` is set, pairs registering
+    someone else for an event `organizer_id` did not create are FORBIDDEN.
+    Seats go to the pairs in list order: pairs already registered (or
+    repeated) are DUPLICATE, the first ones after that get each event's
+    remaining capacity and the rest are FULL, or WAITLISTED (with their
+    WaitlistEntry) if they are in `waitlist`; pairs already waiting are
+    DUPLICATE there. Registered pairs leave the event's waitlist. Returns
+    one outcome per pair.
+    
+    The seats of every event are claimed with one conditional UPDATE, as in
+    register_for_event; if a concurrent registration changes a count in
+    between, the batch is re-read, and after BATCH_CLAIM_ATTEMPTS it is
+    settled pair by pair.
+    """
+    if not pairs:
+        return []
+    waitlist = set(waitlist)
+    user_ids = {user_id for user_id, _ in pairs}
+    event_ids = {event_id for _, event_id in pairs}
+    known_users = set(db.scalars(select(User.id).where(User.id.in_(user_ids))))
+    
+    for _ in range(BATCH_CLAIM_ATTEMPTS):
+        # Locked in id order, so concurrent batches cannot deadlock on them
+        events = {
+            event_id: (max(capacity - registered_count, 0), created_by)
+            for event_id, capacity, registered_count, created_by in db.execute(
+                select(Event.id, Event.capacity, Event.registered_count, Event.created_by)
+                .where(Event.id.in_(event_ids))
+                .order_by(Event.id)
+                .with_for_update()
+            )
+        }
+        registered = set(db.execute(
+            select(EventRegistration.user_id, EventRegistration.event_id)
+            .where(EventRegistration.user_id.in_(user_ids), EventRegistration.event_id.in_(event_ids))
+        ).tuples())
+        waiting = set()
+        if waitlist:
+            waiting = set(db.execute(
+                select(WaitlistEntry.user_id, WaitlistEntry.event_id)
+                .where(
+                    WaitlistEntry.user_id.in_({user_id for user_id, _ in waitlist} & user_ids),
+                    WaitlistEntry.event_id.in_({event_id for _, event_id in waitlist} & event_ids)
+                )
+            ).tuples())
+        now = datetime.utcnow()
+        outcomes = []
+        added = []
+        queued = []
+        claims = Counter()
+        for pair in pairs:
+            user_id, event_id = pair
+            if event_id not in events:
+                outcomes.append((RegistrationOutcome.NOT_FOUND, None))
+            elif user_id not in known_users:
+                outcomes.append((RegistrationOutcome.UNKNOWN_USER, None))
+            elif organizer_id is not None and user_id != organizer_id and events[event_id][1] != organizer_id:
+                outcomes.append((RegistrationOutcome.FORBIDDEN, None))
+            elif pair in registered:
+                outcomes.append((RegistrationOutcome.DUPLICATE, None))
+            elif claims[event_id] < events[event_id][0]:
+                registration = EventRegistration(user_id=user_id, event_id=event_id, registered_at=now)
+                registered.add(pair)
+                claims[event_id] += 1
+                added.append(registration)
+                outcomes.append((RegistrationOutcome.REGISTERED, registration))
+            elif pair not in waitlist:
+                outcomes.append((RegistrationOutcome.FULL, None))
+            elif pair in waiting:
+                outcomes.append((RegistrationOutcome.DUPLICATE, None))
+            else:
+                entry = WaitlistEntry(user_id=user_id, event_id=event_id, joined_at=now)
+                waiting.add(pair)
+                queued.append(entry)
+                outcomes.append((RegistrationOutcome.WAITLISTED, entry))
+        
+        if not added and not queued:
+            db.rollback()
+            return outcomes
+        
+        if claims:
+            seats = case(claims, value=Event.id)
+            claimed = db.execute(
+                update(Event)
+                .where(Event.id.in_(claims), Event.registered_count + seats <= Event.capacity)
+                .values(registered_count=Event.registered_count + seats)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if claimed < len(claims):
+                db.rollback()
+                continue
+        
+        db.add_all(added + queued)
+        stats.increment(db, stats.REGISTRATIONS, len(added), day=stats.day_bucket(now))
+        registered_users = {}
+        for registration in added:
+            registered_users.setdefault(registration.event_id, []).append(registration.user_id)
+        _leave_waitlists(db, registered_users)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Someone in the batch registered or joined a waitlist concurrently
+            db.rollback()
+            break
+        return outcomes
+    
+    rejected = (RegistrationOutcome.NOT_FOUND, RegistrationOutcome.UNKNOWN_USER, RegistrationOutcome.FORBIDDEN)
+    return [
+        (outcome, None) if outcome in rejected
+        else join_waitlist(db, user_id, event_id) if (user_id, event_id) in waitlist
+        else register_for_event(db, user_id, event_id)
+        for (outcome, _), (user_id, event_id) in zip(outcomes, pairs)
+    ]
+
+def register_batch_for_event(
+    db: Session, event_id: int, user_ids: List[int], waitlist: Collection[int] = ()
+) -> List[Tuple[RegistrationOutcome, Optional[Union[EventRegistration, WaitlistEntry]]]]:
+    """Register many users for one event in a single transaction, seats going
+    to `user_ids` in list order; users in `waitlist` join the waitlist if the
+    event is full (see register_many)"""
+    return register_many(
+        db, [(user_id, event_id) for user_id in user_ids], waitlist={(user_id, event_id) for user_id in waitlist}
+    )
 
 def unregister_from_event(db: Session, user_id: int, event_id: int) -> bool:
-    """Unregister a user from an event"""
+    """Unregister a user from an event, giving the seat to the waitlist"""
     registration = db.query(EventRegistration).filter(
         and_(
             EventRegistration.user_id == user_id,
@@ -157,10 +670,26 @@ def unregister_from_event(db: Session, user_id: int, event_id: int) -> bool:
     
     if registration:
         db.delete(registration)
+        _adjust_registered_count(db, event_id, -1)
+        stats.increment(db, stats.REGISTRATIONS, -1, day=stats.day_bucket(registration.registered_at))
+        _promote_waitlist(db, event_id)
         db.commit()
         return True
     return False
 
+def delete_registration(db: Session, registration_id: int) -> bool:
+    """Delete a registration by ID (admin)"""
+    registration = db.query(EventRegistration).filter(EventRegistration.id == registration_id).first()
+    if not registration:
+        return False
+    
+    db.delete(registration)
+    _adjust_registered_count(db, registration.event_id, -1)
+    stats.increment(db, stats.REGISTRATIONS, -1, day=stats.day_bucket(registration.registered_at))
+    _promote_waitlist(db, registration.event_id)
+    db.commit()
+    return True
+
 def get_user_registrations(db: Session, user_id: int) -> List[EventRegistration]:
     """Get all registrations for a user"""
     return (
@@ -179,6 +708,47 @@ def get_event_registrations(db: Session, event_id: int) -> List[EventRegistratio
         .all()
     )
 
+def get_all_registrations_with_details(db: Session) -> List[EventRegistration]:
+    """Get all registrations with their user and event loaded (admin)"""
+    return (
+        db.query(EventRegistration)
+        .join(EventRegistration.user)
+        .join(EventRegistration.event)
+        .options(
+            contains_eager(EventRegistration.user),
+            contains_eager(EventRegistration.event)
+        )
+        .all()
+    )
+
+def admin_registrations_statement(
+    after_id: int = None,
+    user_id: int = None,
+    event_id: int = None
+) -> Select:
+    """Select registrations with their user and event joined in, for the admin listing, in id order"""
+    statement = (
+        select(EventRegistration)
+        .join(EventRegistration.user)
+        .join(EventRegistration.event)
+        .options(
+            contains_eager(EventRegistration.user),
+            contains_eager(EventRegistration.event)
+        )
+        .order_by(EventRegistration.id)
+    )
+    if after_id is not None:
+        statement = statement.where(EventRegistration.id > after_id)
+    if user_id is not None:
+        statement = statement.where(EventRegistration.user_id == user_id)
+    if event_id is not None:
+        statement = statement.where(EventRegistration.event_id == event_id)
+    return statement
+
+def count_registrations(db: Session) -> int:
+    """Get the total number of registrations"""
+    return db.query(EventRegistration).count()
+
 def is_user_registered(db: Session, user_id: int, event_id: int) -> bool:
     """Check if user is registered for an event"""
     registration = db.query(EventRegistration).filter(
@@ -191,8 +761,230 @@ def is_user_registered(db: Session, user_id: int, event_id: int) -> bool:
 
 def get_event_registration_count(db: Session, event_id: int) -> int:
     """Get the number of registrations for an event"""
-<<<<<<< HEAD
-    return db.query(EventRegistration).filter(EventRegistration.event_id == event_id).count()
-=======
     return db.query(EventRegistration).filter(EventRegistration.event_id == event_id).count()
->>>>>>> 9e1cb9f19d0fb2fb4d5a3bac77e2af039c48947c
+
+def get_event_registration_counts(db: Session, event_ids: List[int]) -> Dict[int, int]:
+    """Get registration counts for many events in one grouped query"""
+    event_ids = list(set(event_ids))
+    if not event_ids:
+        return {}
+    
+    rows = (
+        db.query(EventRegistration.event_id, func.count(EventRegistration.id))
+        .filter(EventRegistration.event_id.in_(event_ids))
+        .group_by(EventRegistration.event_id)
+        .all()
+    )
+    counts = {event_id: 0 for event_id in event_ids}
+    counts.update({event_id: count for event_id, count in rows})
+    return counts
+
+# Event waitlists
+def join_waitlist(
+    db: Session, user_id: int, event_id: int
+) -> Tuple[RegistrationOutcome, Optional[Union[EventRegistration, WaitlistEntry]]]:
+    """Put a user on an event's waitlist.
+    
+    Returns WAITLISTED with the WaitlistEntry, or REGISTERED with the
+    registration if a seat was free by the time the event row was locked:
+    the entry is promoted in the same transaction, so a seat freed while
+    the user was being turned away is not missed. Users already registered
+    or waiting are DUPLICATE.
+    """
+    if db.query(Event.id).filter(Event.id == event_id).with_for_update().first() is None:
+        db.rollback()
+        return RegistrationOutcome.NOT_FOUND, None
+    if is_user_registered(db, user_id, event_id):
+        db.rollback()
+        return RegistrationOutcome.DUPLICATE, None
+    
+    entry = WaitlistEntry(user_id=user_id, event_id=event_id, joined_at=datetime.utcnow())
+    db.add(entry)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        return RegistrationOutcome.DUPLICATE, None
+    promoted = [registration for registration in _promote_waitlist(db, event_id) if registration.user_id == user_id]
+    db.commit()
+    
+    if promoted:
+        db.refresh(promoted[0])
+        return RegistrationOutcome.REGISTERED, promoted[0]
+    return RegistrationOutcome.WAITLISTED, entry
+
+def leave_waitlist(db: Session, user_id: int, event_id: int) -> bool:
+    """Take a user off an event's waitlist"""
+    removed = db.query(WaitlistEntry).filter(
+        WaitlistEntry.user_id == user_id,
+        WaitlistEntry.event_id == event_id
+    ).delete(synchronize_session=False)
+    db.commit()
+    return bool(removed)
+
+def get_user_waitlist(
+    db: Session, user_id: int, event_id: int = None
+) -> List[Tuple[WaitlistEntry, int]]:
+    """Get a user's waitlist entries with their 1-based position, oldest first"""
+    ahead = aliased(WaitlistEntry)
+    position = (
+        select(func.count(ahead.id))
+        .where(ahead.event_id == WaitlistEntry.event_id, ahead.id <= WaitlistEntry.id)
+        .correlate(WaitlistEntry)
+        .scalar_subquery()
+    )
+    query = db.query(WaitlistEntry, position).filter(WaitlistEntry.user_id == user_id)
+    if event_id is not None:
+        query = query.filter(WaitlistEntry.event_id == event_id)
+    return [(entry, position) for entry, position in query.order_by(WaitlistEntry.id)]
+
+def _promote_waitlist(db: Session, event_id: int) -> List[EventRegistration]:
+    """Give an event's free seats to its waitlist in arrival order, in the caller's transaction.
+    
+    Locks the event row, then moves as many entries as there are free seats
+    with one SELECT, one multi-row INSERT and one DELETE, whether one seat
+    was freed or a capacity increase freed many. Returns the new
+    registrations (flushed with the caller's commit).
+    """
+    seats = db.execute(
+        select(Event.capacity, Event.registered_count).where(Event.id == event_id).with_for_update()
+    ).first()
+    if seats is None or seats.registered_count >= seats.capacity:
+        return []
+    
+    # Entries of users who got a seat some other way cannot be promoted
+    db.execute(
+        delete(WaitlistEntry)
+        .where(
+            WaitlistEntry.event_id == event_id,
+            select(EventRegistration.id).where(
+                EventRegistration.user_id == WaitlistEntry.user_id,
+                EventRegistration.event_id == event_id
+            ).exists()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    entries = db.execute(
+        select(WaitlistEntry.id, WaitlistEntry.user_id)
+        .where(WaitlistEntry.event_id == event_id)
+        .order_by(WaitlistEntry.id)
+        .limit(seats.capacity - seats.registered_count)
+    ).all()
+    if not entries:
+        return []
+    
+    now = datetime.utcnow()
+    promoted = [EventRegistration(user_id=user_id, event_id=event_id, registered_at=now) for _, user_id in entries]
+    db.add_all(promoted)
+    db.execute(delete(WaitlistEntry).where(WaitlistEntry.id.in_([entry_id for entry_id, _ in entries])))
+    _adjust_registered_count(db, event_id, len(promoted))
+    stats.increment(db, stats.REGISTRATIONS, len(promoted), day=stats.day_bucket(now))
+    return promoted
+
+def _leave_waitlists(db: Session, users_by_event: Dict[int, List[int]]) -> None:
+    """Remove the waitlist entries of users who just registered, in the caller's transaction"""
+    for event_id, user_ids in users_by_event.items():
+        db.execute(
+            delete(WaitlistEntry)
+            .where(WaitlistEntry.event_id == event_id, WaitlistEntry.user_id.in_(user_ids))
+            .execution_options(synchronize_session=False)
+        )
+
+# Denormalized registration counters
+def _adjust_registered_count(db: Session, event_id: int, delta: int) -> None:
+    """Shift Event.registered_count in the caller's transaction"""
+    (
+        db.query(Event)
+        .filter(Event.id == event_id)
+        .update(
+            {Event.registered_count: Event.registered_count + delta},
+            synchronize_session=False
+        )
+    )
+
+def reconcile_registration_counts(db: Session) -> int:
+    """Rebuild Event.registered_count from the registrations table.
+    
+    Returns the number of events whose stored counter was corrected. Seats
+    freed by lowering a counter go to the event's waitlist.
+    """
+    actual_count = (
+        select(func.count(EventRegistration.id))
+        .where(EventRegistration.event_id == Event.id)
+        .correlate(Event)
+        .scalar_subquery()
+    )
+    lowered = list(db.scalars(select(Event.id).where(Event.registered_count > actual_count)))
+    result = db.execute(
+        update(Event)
+        .where(Event.registered_count != actual_count)
+        .values(registered_count=actual_count)
+        .execution_options(synchronize_session=False)
+    )
+    for event_id in lowered:
+        _promote_waitlist(db, event_id)
+    db.commit()
+    return result.rowcount
+
+# Precomputed statistics (see stats.py)
+def get_stat_totals(db: Session) -> Dict[str, int]:
+    """Get the running total of every statistic"""
+    totals = {name: 0 for name in (stats.USERS, stats.EVENTS, stats.REGISTRATIONS, stats.CAPACITY)}
+    rows = (
+        db.query(StatCounter.name, func.sum(StatCounter.value))
+        # Naming the counters lets the (name, bucket, shard) key serve the lookup
+        .filter(StatCounter.name.in_(list(totals)), StatCounter.bucket == stats.TOTAL)
+        .group_by(StatCounter.name)
+    )
+    totals.update({name: int(value) for name, value in rows})
+    return totals
+
+def get_daily_stats(db: Session, name: str, since: str) -> Dict[str, int]:
+    """Get a statistic's count per UTC day (YYYY-MM-DD) from `since` on"""
+    rows = (
+        db.query(StatCounter.bucket, func.sum(StatCounter.value))
+        .filter(StatCounter.name == name, StatCounter.bucket >= since)
+        .group_by(StatCounter.bucket)
+    )
+    return {bucket: int(value) for bucket, value in rows}
+
+def reconcile_stats(db: Session) -> Dict[str, int]:
+    """Correct drift in the statistics counters from the tables; returns the totals.
+    
+    Table counts and counter sums are read in one REPEATABLE READ transaction,
+    so on MySQL and PostgreSQL both come from the same snapshot, where every
+    committed write already carries its counter increment. Their difference is
+    the drift, and it is applied as an increment, which adds to concurrent
+    writes instead of overwriting them. Run one reconciliation at a time:
+    two would both apply the same correction.
+    """
+    bind = db.get_bind()
+    # A session joined to an open connection (the backfill migration) keeps its isolation
+    if isinstance(bind, Engine) and bind.dialect.name in ("mysql", "postgresql") and not db.in_transaction():
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    
+    totals = {
+        stats.USERS: db.query(func.count(User.id)).scalar(),
+        stats.EVENTS: db.query(func.count(Event.id)).scalar(),
+        stats.REGISTRATIONS: db.query(func.count(EventRegistration.id)).scalar(),
+        stats.CAPACITY: db.query(func.coalesce(func.sum(Event.capacity), 0)).scalar(),
+    }
+    expected = {(name, stats.TOTAL): int(value) for name, value in totals.items()}
+    for name, id_column, timestamp in (
+        (stats.USERS, User.id, User.created_at),
+        (stats.EVENTS, Event.id, Event.created_at),
+        (stats.REGISTRATIONS, EventRegistration.id, EventRegistration.registered_at),
+    ):
+        day = func.date(timestamp)
+        for day_value, count in db.query(day, func.count(id_column)).group_by(day):
+            expected[(name, stats.as_day(day_value))] = count
+    
+    current = {
+        (name, bucket): int(value)
+        for name, bucket, value in db.query(StatCounter.name, StatCounter.bucket, func.sum(StatCounter.value))
+        .group_by(StatCounter.name, StatCounter.bucket)
+    }
+    for name, bucket in expected.keys() | current.keys():
+        stats.adjust(db, name, bucket, expected.get((name, bucket), 0) - current.get((name, bucket), 0))
+    db.commit()
+    return totals
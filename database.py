@@ -1,11 +1,17 @@
-﻿from sqlalchemy import create_engine, text
+﻿from fastapi import Request
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import List, Optional
 import os
-from dotenv import load_dotenv
+import time
 
-# Load environment variables from .env file
-load_dotenv()
+from pooling import pool_options, instrument
+
+# Settings come from the environment; entry points (main.py, manage.py)
+# load .env before importing this module
 
 # MySQL Database URL
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -13,18 +19,118 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-print(f"🔗 Connecting to database: {DATABASE_URL.split('@')[1] if '@' in DATABASE_URL else 'localhost'}")
-
-# Create engine with MySQL-specific configurations
-engine = create_engine(
+# Create engine with MySQL-specific configurations; pool sizing, recycling
+# and pre-ping come from the DB_POOL_* settings (see pooling.py). Engines
+# only connect on first use, so importing this module never touches the
+# database
+engine = instrument(create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before use
-    pool_recycle=300,    # Recycle connections every 5 minutes
-    echo=False           # Set to True for SQL query logging
-)
+    echo=False,          # Set to True for SQL query logging
+    **pool_options(DATABASE_URL)
+), "primary")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers used by the request handlers, keyed by the sync backend name
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto the matching async driver"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+# Async engine for the FastAPI handlers, so queries don't block the event loop
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    **pool_options(ASYNC_DATABASE_URL)
+)
+instrument(async_engine.sync_engine, "primary_async")
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Read replicas for the read-only endpoints, as comma-separated sync URLs
+# (the async driver is derived like ASYNC_DATABASE_URL). Any of them may be a
+# SQLite file for local testing. Without replicas every session uses the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# How long a replica that failed to connect is skipped before being retried
+REPLICA_RETRY_INTERVAL = float(os.getenv("REPLICA_RETRY_INTERVAL", 30))
+# After a client writes, its reads go to the primary for this many seconds so
+# that replication lag can't hide its own changes (see PRIMARY_COOKIE)
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", 5))
+PRIMARY_COOKIE = "db_primary_until"
+
+class Replica:
+    def __init__(self, url: str, name: str):
+        self.url = url
+        async_url = to_async_url(url)
+        self.engine = create_async_engine(async_url, echo=False, **pool_options(async_url))
+        instrument(self.engine.sync_engine, name)
+        self.sessionmaker = async_sessionmaker(
+            self.engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+        )
+        self.down_until = 0.0
+
+class ReplicaPool:
+    """Hands out replica sessions round-robin, skipping replicas that recently failed"""
+
+    def __init__(self, urls: List[str], retry_interval: float = REPLICA_RETRY_INTERVAL):
+        self.replicas = [Replica(url, f"replica{index}") for index, url in enumerate(urls, 1)]
+        self.retry_interval = retry_interval
+        self._next = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def _rotation(self) -> List[Replica]:
+        start = self._next
+        self._next = (self._next + 1) % max(len(self.replicas), 1)
+        return self.replicas[start:] + self.replicas[:start]
+
+    async def open_session(self) -> Optional[AsyncSession]:
+        """A session connected to the next healthy replica, or None if none is reachable"""
+        now = time.monotonic()
+        for replica in self._rotation():
+            if replica.down_until > now:
+                continue
+            session = replica.sessionmaker()
+            try:
+                await session.connection()
+            except Exception as e:
+                await session.close()
+                replica.down_until = now + self.retry_interval
+                print(f"❌ Read replica unavailable, skipping for {self.retry_interval:.0f}s: {e}")
+                continue
+            replica.down_until = 0.0
+            return session
+        return None
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "replica": make_url(replica.url).render_as_string(hide_password=True),
+                "healthy": replica.down_until <= now,
+            }
+            for replica in self.replicas
+        ]
+
+replicas = ReplicaPool(DATABASE_REPLICA_URLS)
+
 Base = declarative_base()
 
 def get_db():
@@ -35,24 +141,27 @@ def get_db():
     finally:
         db.close()
 
-def test_connection():
-    """Test database connection"""
-    try:
-        with engine.connect() as connection:
-            # Use text() wrapper for raw SQL
-            result = connection.execute(text("SELECT 1"))
-            row = result.fetchone()
-            if row and row[0] == 1:
-                print("✅ Database connection successful!")
-                return True
-            else:
-                print("❌ Database connection test failed")
-                return False
-    except Exception as e:
-        print(f"❌ Database connection failed: {e}")
-        print("💡 Make sure MySQL is running and credentials are correct")
-
-        return False
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
 
+def reads_from_primary(request: Request) -> bool:
+    """Whether the client wrote recently enough that its reads must see the primary"""
+    try:
+        return float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
         return False
 
+async def get_async_read_db(request: Request):
+    """Dependency for read-only handlers: a replica session when one is healthy, else the primary"""
+    db = None
+    if replicas and not reads_from_primary(request):
+        db = await replicas.open_session()
+    request.state.db_replica = db is not None
+    if db is None:
+        db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
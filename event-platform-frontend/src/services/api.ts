@@ -7,6 +7,9 @@ const API_BASE_URL = "http://localhost:8080"
 const api = axios.create({
   baseURL: API_BASE_URL,
   timeout: 10000, // 10 second timeout
+  // Send cookies cross-origin: after a write the API sets one that keeps this
+  // client's reads on the primary database until replicas catch up
+  withCredentials: true,
 })
 
 // Add auth token to requests
@@ -88,11 +91,28 @@ export const eventApi = {
     limit?: number
     search?: string
     location?: string
+    cursor?: string
+    include_total?: boolean
+    sort?: "date" | "relevance"
   }): Promise<PaginatedEvents> => {
     const response = await api.get("/events", { params })
     return response.data
   },
 
+  // Get events near a point, nearest first (public endpoint)
+  getNearbyEvents: async (params: {
+    lat: number
+    lon: number
+    radius?: number
+    limit?: number
+    search?: string
+    date_from?: string
+    date_to?: string
+  }): Promise<Event[]> => {
+    const response = await api.get("/events/nearby", { params })
+    return response.data
+  },
+
   // Get single event (public endpoint)
   getEvent: async (id: number): Promise<Event> => {
     const response = await api.get(`/events/${id}`)
@@ -106,6 +126,8 @@ export const eventApi = {
     location: string
     date_time: string
     capacity: number
+    latitude?: number
+    longitude?: number
   }): Promise<Event> => {
     const response = await api.post("/events", eventData)
     return response.data
@@ -14,6 +14,9 @@ export interface Event {
   location: string
   date_time: string
   capacity: number
+  latitude?: number | null
+  longitude?: number | null
+  distance_km?: number
   registered_count: number
   created_by: number
   creator_name: string
@@ -37,6 +40,8 @@ export interface PaginatedEvents {
   limit: number
   has_next: boolean
   has_prev: boolean
+  next_cursor?: string | null
+  prev_cursor?: string | null
 }
 
 export interface LoginCredentials {
@@ -0,0 +1,104 @@
+import math
+from typing import List, Optional, Tuple
+
+# Geohash spatial indexing for events.
+#
+# Every event with coordinates stores the geohash of its position. A geohash
+# names a rectangular cell and every prefix of it names the enclosing cell,
+# so all events inside a cell share that prefix and can be found with an
+# index range scan on any database, without a spatial extension. A radius
+# query scans the cells overlapping the circle's bounding box, at the finest
+# precision that keeps their number small, then filters the candidates by
+# exact distance.
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9  # cells of roughly 5m x 5m
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+MAX_CELLS = 16  # cells scanned per radius query
+
+def encode(latitude: float, longitude: float, precision: int = PRECISION) -> str:
+    """Geohash of a point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, value, even = 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        if coordinate >= middle:
+            value = value * 2 + 1
+            interval[0] = middle
+        else:
+            value *= 2
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(height, width) in degrees of the cells at `precision`"""
+    total_bits = 5 * precision
+    lat_bits = total_bits // 2
+    lon_bits = total_bits - lat_bits
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance between two points"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> Optional[List[str]]:
+    """Geohash prefixes whose cells together cover the circle around a point.
+
+    Uses the finest precision at which the circle's bounding box spans at
+    most MAX_CELLS cells. Returns None when no useful covering exists
+    (circles reaching a pole), in which case callers fall back to the
+    latitude band alone.
+    """
+    low, high = latitude_band(latitude, radius_km)
+    widest_lat = max(abs(low), abs(high))
+    if widest_lat >= 90:
+        return None
+    lon_radius = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest_lat)))
+    if lon_radius >= 180:
+        return None
+
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        rows = range(math.floor((low + 90) / height), math.floor((high + 90) / height) + 1)
+        columns = range(
+            math.floor((longitude - lon_radius + 180) / width),
+            math.floor((longitude + lon_radius + 180) / width) + 1
+        )
+        if len(rows) * len(columns) <= MAX_CELLS:
+            break
+
+    cells = set()
+    for row in rows:
+        cell_lat = min(90.0, (row + 0.5) * height - 90)
+        for column in columns:
+            cell_lon = ((column + 0.5) * width) % 360.0 - 180
+            cells.add(encode(cell_lat, cell_lon, precision))
+    return sorted(cells)
+
+def prefix_range(prefix: str) -> Tuple[str, Optional[str]]:
+    """[low, high) bounds of the geohashes starting with `prefix`; high is None past the last cell.
+
+    Range comparisons use the geohash index on every database, unlike LIKE,
+    which SQLite cannot serve from an index on a case-sensitive column.
+    """
+    stripped = prefix.rstrip(BASE32[-1])
+    if not stripped:
+        return prefix, None
+    return prefix, stripped[:-1] + BASE32[BASE32.index(stripped[-1]) + 1]
+
+def latitude_band(latitude: float, radius_km: float) -> Tuple[float, float]:
+    """Latitudes a circle can reach"""
+    radius_deg = radius_km / KM_PER_DEGREE
+    return max(-90.0, latitude - radius_deg), min(90.0, latitude + radius_deg)
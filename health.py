@@ -0,0 +1,126 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from database import async_engine, replicas
+from pooling import pool_stats
+
+# Health probes.
+#
+# Liveness only says the process is serving requests. Readiness reports the
+# database status cached by a background task, which runs SELECT 1 on a
+# pooled async connection every HEALTH_CHECK_INTERVAL seconds, bounded by
+# HEALTH_CHECK_TIMEOUT. Probes therefore never open connections or wait on
+# the database themselves; if the cached status is older than
+# HEALTH_STALE_AFTER (no refresher running), the next probe refreshes it.
+
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", 5))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", 2))
+HEALTH_STALE_AFTER = float(os.getenv("HEALTH_STALE_AFTER", 3 * HEALTH_CHECK_INTERVAL))
+
+# Startup waits for the database for up to STARTUP_DB_ATTEMPTS checks, with
+# exponential backoff from STARTUP_DB_BACKOFF seconds (jittered so workers
+# booting together don't retry in lockstep)
+STARTUP_DB_ATTEMPTS = int(os.getenv("STARTUP_DB_ATTEMPTS", 5))
+STARTUP_DB_BACKOFF = float(os.getenv("STARTUP_DB_BACKOFF", 0.5))
+
+class DatabaseHealth:
+    """Latest result of the background database check"""
+
+    def __init__(self):
+        self.ok = False
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def age(self) -> Optional[float]:
+        return None if self.checked_at is None else time.monotonic() - self.checked_at
+
+    async def _ping(self) -> None:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def refresh(self) -> None:
+        """Check the database once; concurrent callers share one check"""
+        if self._lock.locked():
+            async with self._lock:
+                return
+        async with self._lock:
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._ping(), HEALTH_CHECK_TIMEOUT)
+            except asyncio.TimeoutError:
+                self.ok, self.error = False, f"timed out after {HEALTH_CHECK_TIMEOUT:g}s"
+            except Exception as e:
+                self.ok, self.error = False, f"{e.__class__.__name__}: {e}"
+            else:
+                self.ok, self.error = True, None
+            self.latency_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.checked_at = time.monotonic()
+
+    async def current(self) -> "DatabaseHealth":
+        if self.age is None or self.age > HEALTH_STALE_AFTER:
+            await self.refresh()
+        return self
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "latency_ms": self.latency_ms,
+            "checked_seconds_ago": None if self.age is None else round(self.age, 3),
+            "error": self.error,
+        }
+
+database_health = DatabaseHealth()
+
+async def wait_for_database(attempts: int = STARTUP_DB_ATTEMPTS, backoff: float = STARTUP_DB_BACKOFF) -> bool:
+    """Check the database at startup, retrying with backoff.
+
+    Returns False if it is still unreachable. Serving starts either way;
+    /health/ready answers 503 until a background check succeeds.
+    """
+    url = async_engine.url
+    print(f"🔗 Connecting to database: {url.host or url.database or 'localhost'}")
+    for attempt in range(1, attempts + 1):
+        await database_health.refresh()
+        if database_health.ok:
+            print("✅ Database connection successful!")
+            return True
+        if attempt < attempts:
+            delay = backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1)
+            print(f"⏳ Database unavailable ({database_health.error}), retry {attempt}/{attempts - 1} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+    print("❌ Database still unavailable; serving anyway and reporting not ready")
+    print("💡 Make sure MySQL is running and credentials in .env are correct")
+    return False
+
+async def refresh_periodically() -> None:
+    """Background task keeping database_health current"""
+    while True:
+        await database_health.refresh()
+        await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+def pool_saturation() -> Dict[str, Any]:
+    """Share of each pool's capacity (size plus overflow) currently checked out"""
+    saturation = {}
+    for name, stats in pool_stats().items():
+        if "size" in stats:
+            capacity = stats["size"] + max(stats["max_overflow"], 0)
+            saturation[name] = round(stats["checked_out"] / capacity, 3) if capacity else None
+    return saturation
+
+async def readiness() -> Dict[str, Any]:
+    """Readiness report; "ready" is false when the last database check failed"""
+    health = await database_health.current()
+    return {
+        "ready": health.ok,
+        "database": health.as_dict(),
+        "pool_saturation": pool_saturation(),
+        "replicas": replicas.status(),
+    }
@@ -1,81 +1,163 @@
-﻿from fastapi import FastAPI, Depends, HTTPException, status, Query
+﻿from fastapi import APIRouter, FastAPI, Depends, HTTPException, status, Query, Request
 from fastapi.security import HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
+from typing import List, Optional, Union
+from datetime import datetime, timedelta
 import uvicorn
+import asyncio
+import json
+import math
 import os
+import time
 from dotenv import load_dotenv
 
+# Load environment variables before the modules below read their settings;
+# variables already set in the environment take precedence over .env
+load_dotenv()
+
 # Import your modules
-from database import get_db, engine, Base, test_connection
-from models import User, Event, EventRegistration
+from database import (
+    get_async_db, get_async_read_db, AsyncSessionLocal,
+    replicas, PRIMARY_COOKIE, READ_YOUR_WRITES_WINDOW
+)
+from models import User, UserRole
 from schemas import (
     UserCreate, UserLogin, UserResponse, Token,
-    EventCreate, EventResponse, EventUpdate,
+    EventCreate, EventResponse,
     EventRegistrationResponse, PaginatedEventsResponse,
-    EventWithRegistrationStatus
+    EventWithRegistrationStatus, NearbyEventResponse, RegistrationTicketResponse,
+    WaitlistEntryResponse, BulkRegistrationRequest, BulkRegistrationResponse
 )
 from auth import (
     authenticate_user, create_access_token, get_current_user,
-    get_password_hash, verify_password
+    get_password_hash_async, invalidate_cached_user, user_cache
+)
+from async_crud import (
+    create_user, get_user_by_email, get_user_by_id, get_event_by_id,
+    create_event, delete_event, register_for_event, register_many,
+    get_user_registrations, unregister_from_event,
+    delete_user as delete_user_record,
+    update_user as update_user_record, delete_registration,
+    get_events_by_creator,
+    get_recent_users, get_recent_events, update_event_fields,
+    get_events_page, count_matching_events, get_events_by_relevance,
+    get_nearby_events, get_stat_totals, get_daily_stats,
+    join_waitlist, leave_waitlist, get_user_waitlist, is_user_registered
 )
 from crud import (
-    create_user, get_user_by_email, get_events, get_event_by_id,
-    create_event, update_event, delete_event, register_for_event,
-    get_user_registrations, unregister_from_event, search_events,
-    is_user_registered, get_event_registration_count
+    RegistrationOutcome, admin_users_statement, admin_events_statement,
+    admin_registrations_statement
+)
+from cache import InMemoryCache
+from response_cache import (
+    response_cache, events_list_key, event_detail_key,
+    get_cached_response, cache_response, invalidate_events
 )
+from pagination import decode_cursor, encode_cursor, NEXT, PREV
+from migrations import run_migrations
+from pooling import pool_stats
+from admission import AdmissionQueue, ADMISSION_AWAIT_SECONDS, PENDING, FAILED
+import health
+import metrics
+import profiler
+from streaming import list_response
+import stats
+from bulk import FORMATS, import_events, export_events, iter_csv_records, iter_ndjson_records
 
-# Load environment variables
-load_dotenv()
+# Routes are collected on this router and mounted by create_app()
+router = APIRouter()
 
-# Test database connection before starting
-print("🔍 Testing database connection...")
-if not test_connection():
-    print("❌ Failed to connect to database. Please check your configuration.")
-    print("💡 Make sure MySQL is running and credentials in .env are correct")
-    exit(1)
-
-# Create database tables
-print("📊 Creating database tables...")
-try:
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully!")
-except Exception as e:
-    print(f"❌ Failed to create database tables: {e}")
-    exit(1)
-
-# Create FastAPI app instance
-app = FastAPI(
-    title=os.getenv("APP_NAME", "Event Discovery Platform API"),
-    description="A comprehensive backend system for discovering and registering for local events",
-    version=os.getenv("APP_VERSION", "1.0.0"),
-    docs_url="/docs",
-    redoc_url="/redoc",
-    contact={
-        "name": "Event Platform Team",
-        "email": "support@eventplatform.com",
-    },
-    license_info={
-        "name": "MIT",
-        "url": "https://opensource.org/licenses/MIT",
-    },
-)
+# Once a client writes, pin its reads to the primary for READ_YOUR_WRITES_WINDOW
+# seconds so a lagging replica can't serve it data missing its own change
+async def pin_reads_after_writes(request: Request, call_next):
+    response = await call_next(request)
+    if replicas and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(
+            PRIMARY_COOKIE,
+            str(time.time() + READ_YOUR_WRITES_WINDOW),
+            max_age=math.ceil(READ_YOUR_WRITES_WINDOW),
+            httponly=True,
+            samesite="lax"
+        )
+    return response
 
-# Add CORS middleware - IMPORTANT: This must come AFTER app creation
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:3001"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Wait (bounded) for the database, then keep the health status current while serving"""
+    await health.wait_for_database()
+    health_task = asyncio.create_task(health.refresh_periodically())
+    try:
+        yield
+    finally:
+        health_task.cancel()
+        await registration_queue.close()
+
+def create_app() -> FastAPI:
+    """Build the API application.
+
+    Building it connects to nothing: the database is first contacted at
+    startup (see lifespan). Schema migrations are not part of serving; run
+    `python manage.py migrate` before starting the workers.
+    """
+    app = FastAPI(
+        title=os.getenv("APP_NAME", "Event Discovery Platform API"),
+        description="A comprehensive backend system for discovering and registering for local events",
+        version=os.getenv("APP_VERSION", "1.0.0"),
+        docs_url="/docs",
+        redoc_url="/redoc",
+        contact={
+            "name": "Event Platform Team",
+            "email": "support@eventplatform.com",
+        },
+        license_info={
+            "name": "MIT",
+            "url": "https://opensource.org/licenses/MIT",
+        },
+        lifespan=lifespan,
+    )
+
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:3001"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(pin_reads_after_writes)
+
+    # Slow-query log and the opt-in SQL profiler (see profiler.py)
+    profiler.install(app)
+
+    # Per-route request, latency and database metrics on GET /metrics
+    metrics.install(app)
+
+    app.include_router(router)
+    return app
 
 security = HTTPBearer()
 
+# Totals for /events are approximate: counts per filter set are reused for
+# EVENT_COUNT_CACHE_TTL seconds instead of running COUNT(*) on every page
+event_count_cache = InMemoryCache(
+    max_entries=1000,
+    default_ttl=float(os.getenv("EVENT_COUNT_CACHE_TTL", 30))
+)
+
+async def invalidate_event_reads(*event_ids: int) -> None:
+    """Forget cached event responses and totals after a write to events or registrations"""
+    await invalidate_events(*event_ids)
+    await event_count_cache.clear()
+
+# Registrations for events under flash demand are queued and settled in
+# batches instead of contending one by one (see admission.py)
+registration_queue = AdmissionQueue(AsyncSessionLocal, on_registered=invalidate_event_reads)
+
 # Root endpoint
-@app.get("/", tags=["Root"])
+@router.get("/", tags=["Root"])
 async def root():
     """Root endpoint with API information"""
     return {
@@ -94,33 +176,52 @@ async def root():
         ]
     }
 
-# Health check endpoint
-@app.get("/health", tags=["Health"])
+# Health check endpoints. None of them touch the database directly: they
+# report the status cached by the background check in health.py
+@router.get("/health", tags=["Health"])
 async def health_check():
     """Health check endpoint for monitoring"""
-    db_status = test_connection()
+    report = await health.readiness()
     return {
-        "status": "healthy" if db_status else "unhealthy",
-        "database": "connected" if db_status else "disconnected",
+        "status": "healthy" if report["ready"] else "unhealthy",
+        "database": "connected" if report["database"]["ok"] else "disconnected",
+        "replicas": report["replicas"],
         "version": os.getenv("APP_VERSION", "1.0.0"),
-        "timestamp": "2024-01-01T00:00:00Z"
+        "timestamp": datetime.utcnow().isoformat() + "Z"
     }
 
+@router.get("/health/live", tags=["Health"])
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@router.get("/health/ready", tags=["Health"])
+async def readiness():
+    """Readiness probe: 503 while the last database check is failing"""
+    report = await health.readiness()
+    return JSONResponse(
+        report,
+        status_code=status.HTTP_200_OK if report["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+
 # Authentication endpoints
-@app.post("/auth/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["Authentication"])
-async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
+@router.post("/auth/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED, tags=["Authentication"])
+async def signup(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user account"""
     # Check if user already exists
-    existing_user = get_user_by_email(db, user_data.email)
+    existing_user = await get_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
+    # Hash in the password pool (may reject with 429 when saturated)
+    hashed_password = await get_password_hash_async(user_data.password)
+    
     # Create new user
     try:
-        user = create_user(db, user_data)
+        user = await create_user(db, user_data, hashed_password=hashed_password)
         return UserResponse(
             id=user.id,
             email=user.email,
@@ -134,10 +235,10 @@ async def signup(user_data: UserCreate, db: Session = Depends(get_db)):
             detail="Failed to create user account"
         )
 
-@app.post("/auth/login", response_model=Token, tags=["Authentication"])
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+@router.post("/auth/login", response_model=Token, tags=["Authentication"])
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return access token"""
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -148,7 +249,7 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     access_token = create_access_token(data={"sub": user.email})
     return Token(access_token=access_token, token_type="bearer")
 
-@app.get("/auth/me", response_model=UserResponse, tags=["Authentication"])
+@router.get("/auth/me", response_model=UserResponse, tags=["Authentication"])
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current authenticated user information"""
     return UserResponse(
@@ -160,25 +261,73 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
     )
 
 # Event endpoints
-@app.get("/events", response_model=PaginatedEventsResponse, tags=["Events"])
+@router.get("/events", response_model=PaginatedEventsResponse, tags=["Events"])
 async def list_events(
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of events to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of events to return"),
     search: Optional[str] = Query(None, description="Search events by name or description"),
     location: Optional[str] = Query(None, description="Filter events by location"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor/prev_cursor from a previous page; replaces skip"),
+    include_total: bool = Query(True, description="Include the (briefly cached) total count"),
+    sort: str = Query("date", pattern="^(date|relevance)$", description="Order by date, or by relevance when searching"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get paginated list of events with optional search and filtering"""
+    by_relevance = sort == "relevance" and bool(search)
+    position = None
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        if by_relevance:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursors are only supported when sorting by date"
+            )
+    
+    key = await events_list_key(
+        skip=skip, limit=limit, search=search, location=location,
+        cursor=cursor, include_total=include_total, sort=sort
+    )
+    cached = await get_cached_response(request, key)
+    if cached is not None:
+        return cached
+    
     try:
-        if search or location:
-            events, total = search_events(db, query=search, location=location, skip=skip, limit=limit)
+        if by_relevance:
+            events, has_more = await get_events_by_relevance(
+                db, search, limit=limit, skip=skip, location=location
+            )
+            has_next, has_prev = has_more, skip > 0
         else:
-            events, total = get_events(db, skip=skip, limit=limit)
+            edge = (position.date_time, position.id) if position else None
+            paging_back = position is not None and position.direction == PREV
+            events, has_more = await get_events_page(
+                db,
+                limit=limit,
+                skip=0 if position else skip,
+                after=None if paging_back else edge,
+                before=edge if paging_back else None,
+                query=search,
+                location=location
+            )
+            
+            if paging_back:
+                has_next, has_prev = True, has_more
+            else:
+                has_next, has_prev = has_more, position is not None or skip > 0
+        
+        total = None
+        if include_total:
+            total = await count_events_cached(db, search, location)
         
         event_responses = []
         for event in events:
-            registered_count = get_event_registration_count(db, event.id)
-            
             event_response = EventWithRegistrationStatus(
                 id=event.id,
                 name=event.name,
@@ -186,20 +335,24 @@ async def list_events(
                 location=event.location,
                 date_time=event.date_time,
                 capacity=event.capacity,
-                registered_count=registered_count,
+                latitude=event.latitude,
+                longitude=event.longitude,
+                registered_count=event.registered_count,
                 created_by=event.created_by,
                 created_at=event.created_at,
                 is_registered=False  # Default for non-authenticated users
             )
             event_responses.append(event_response)
         
-        return PaginatedEventsResponse(
+        page = PaginatedEventsResponse(
             events=event_responses,
             total=total,
             skip=skip,
             limit=limit,
-            has_next=skip + limit < total,
-            has_prev=skip > 0
+            has_next=has_next,
+            has_prev=has_prev,
+            next_cursor=encode_cursor(events[-1].date_time, events[-1].id, NEXT) if has_next and events and not by_relevance else None,
+            prev_cursor=encode_cursor(events[0].date_time, events[0].id, PREV) if has_prev and events and not by_relevance else None
         )
     except Exception as e:
         print(f"Error in list_events: {e}")
@@ -207,41 +360,140 @@ async def list_events(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to fetch events"
         )
+    
+    return await cache_response(request, key, page)
+
+async def count_events_cached(db: AsyncSession, search: Optional[str], location: Optional[str]) -> int:
+    """Count matching events, reusing recent counts for the same filters"""
+    key = json.dumps([search or "", location or ""])
+    total = await event_count_cache.get(key)
+    if total is None:
+        total = await count_matching_events(db, query=search, location=location)
+        await event_count_cache.set(key, total)
+    return total
+
+# Declared before /events/{event_id} so that "export" and "nearby" are not taken for ids
+@router.get("/events/export", tags=["Events"])
+async def export_all_events(
+    format: str = Query("ndjson", pattern="^(csv|ndjson)$", description="csv or ndjson"),
+    current_user: User = Depends(get_current_user)
+):
+    """Stream every event as CSV or NDJSON"""
+    return StreamingResponse(
+        export_events(format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="events.{format}"'}
+    )
+
+@router.post("/events/import", tags=["Events"])
+async def import_events_endpoint(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the request Content-Type"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create events in bulk from a CSV (with a header row) or NDJSON request body"""
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        format = next((name for name, media_type in FORMATS.items() if media_type == content_type), None)
+        if content_type in ("application/ndjson", "application/jsonl"):
+            format = "ndjson"
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format="
+        )
+    
+    parse = iter_csv_records if format == "csv" else iter_ndjson_records
+    report = await import_events(db, parse(request.stream()), current_user.id)
+    if report["inserted"]:
+        await invalidate_event_reads()
+    return report
 
-@app.get("/events/{event_id}", response_model=EventWithRegistrationStatus, tags=["Events"])
-async def get_event(event_id: int, db: Session = Depends(get_db)):
+@router.get("/events/nearby", response_model=List[NearbyEventResponse], tags=["Events"])
+async def list_nearby_events(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the search center"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude of the search center"),
+    radius: float = Query(10, gt=0, le=500, description="Search radius in kilometres"),
+    limit: int = Query(20, ge=1, le=100, description="Number of events to return"),
+    search: Optional[str] = Query(None, description="Search events by name or description"),
+    date_from: Optional[datetime] = Query(None, description="Only events starting at or after this time"),
+    date_to: Optional[datetime] = Query(None, description="Only events starting at or before this time"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get events within `radius` km of a point, nearest first"""
+    key = await events_list_key(
+        view="nearby", lat=lat, lon=lon, radius=radius, limit=limit, search=search,
+        date_from=date_from.isoformat() if date_from else None,
+        date_to=date_to.isoformat() if date_to else None
+    )
+    cached = await get_cached_response(request, key)
+    if cached is not None:
+        return cached
+    
+    nearby = await get_nearby_events(
+        db, lat, lon, radius, limit=limit, query=search, date_from=date_from, date_to=date_to
+    )
+    return await cache_response(request, key, [
+        NearbyEventResponse(
+            id=event.id,
+            name=event.name,
+            description=event.description,
+            location=event.location,
+            date_time=event.date_time,
+            capacity=event.capacity,
+            latitude=event.latitude,
+            longitude=event.longitude,
+            registered_count=event.registered_count,
+            created_by=event.created_by,
+            created_at=event.created_at,
+            is_registered=False,
+            distance_km=round(distance, 3)
+        )
+        for event, distance in nearby
+    ])
+
+@router.get("/events/{event_id}", response_model=EventWithRegistrationStatus, tags=["Events"])
+async def get_event(event_id: int, request: Request, db: AsyncSession = Depends(get_async_read_db)):
     """Get detailed information about a specific event"""
-    event = get_event_by_id(db, event_id)
+    key = await event_detail_key(event_id)
+    cached = await get_cached_response(request, key)
+    if cached is not None:
+        return cached
+    
+    event = await get_event_by_id(db, event_id)
     if not event:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
     
-    registered_count = get_event_registration_count(db, event.id)
-    
-    return EventWithRegistrationStatus(
+    return await cache_response(request, key, EventWithRegistrationStatus(
         id=event.id,
         name=event.name,
         description=event.description,
         location=event.location,
         date_time=event.date_time,
         capacity=event.capacity,
-        registered_count=registered_count,
+        latitude=event.latitude,
+        longitude=event.longitude,
+        registered_count=event.registered_count,
         created_by=event.created_by,
         created_at=event.created_at,
         is_registered=False
-    )
+    ))
 
-@app.post("/events", response_model=EventResponse, status_code=status.HTTP_201_CREATED, tags=["Events"])
+@router.post("/events", response_model=EventResponse, status_code=status.HTTP_201_CREATED, tags=["Events"])
 async def create_new_event(
     event_data: EventCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new event (authenticated users only)"""
     try:
-        event = create_event(db, event_data, current_user.id)
+        event = await create_event(db, event_data, current_user.id)
+        await invalidate_event_reads(event.id)
         return EventResponse(
             id=event.id,
             name=event.name,
@@ -249,6 +501,8 @@ async def create_new_event(
             location=event.location,
             date_time=event.date_time,
             capacity=event.capacity,
+            latitude=event.latitude,
+            longitude=event.longitude,
             registered_count=0,
             created_by=event.created_by,
             created_at=event.created_at
@@ -260,70 +514,218 @@ async def create_new_event(
         )
 
 # Event registration endpoints
-@app.post("/events/{event_id}/register", response_model=EventRegistrationResponse, tags=["Event Registration"])
+@router.post(
+    "/events/{event_id}/register",
+    response_model=EventRegistrationResponse,
+    responses={202: {
+        "model": Union[RegistrationTicketResponse, WaitlistEntryResponse],
+        "description": "Queued (poll the ticket) or waitlisted, told apart by `status`"
+    }},
+    tags=["Event Registration"]
+)
 async def register_for_event_endpoint(
     event_id: int,
+    request: Request,
+    waitlist: bool = Query(False, description="Join the waitlist if the event is full"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Register for an event"""
-    event = get_event_by_id(db, event_id)
-    if not event:
+    """Register for an event.
+    
+    Registrations for an event under heavy demand are queued: the request
+    waits for its ticket to be settled, or answers 202 with the ticket to
+    poll if that takes longer (immediately with `Prefer: respond-async`).
+    With `waitlist=true` a full event answers 202 with the user's waitlist
+    entry instead of 400; seats freed later go to the waitlist in order.
+    """
+    user_id = current_user.id  # a full event rolls back the session, expiring current_user
+    queued = registration_queue.is_queued(event_id)
+    if queued:
+        ticket = await registration_queue.submit(event_id, user_id, waitlist)
+        respond_async = "respond-async" in request.headers.get("Prefer", "")
+        result = await registration_queue.wait(ticket.id, 0 if respond_async else ADMISSION_AWAIT_SECONDS)
+        if result["status"] == PENDING:
+            return JSONResponse(
+                result,
+                status_code=status.HTTP_202_ACCEPTED,
+                headers={"Location": f"/registration-tickets/{ticket.id}"}
+            )
+        if result["status"] == FAILED:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Registration could not be processed, please retry",
+                headers={"Retry-After": "1"}
+            )
+        outcome = RegistrationOutcome(result["status"])
+        registration = result["registration"] and EventRegistrationResponse(**result["registration"])
+    else:
+        with registration_queue.track(event_id):
+            outcome, registration = await register_for_event(db, user_id, event_id)
+            if outcome == RegistrationOutcome.FULL and waitlist:
+                outcome, registration = await join_waitlist(db, user_id, event_id)
+        if outcome == RegistrationOutcome.REGISTERED:
+            registration = EventRegistrationResponse.model_validate(registration)
+    
+    if outcome == RegistrationOutcome.WAITLISTED:
+        entries = await get_user_waitlist(db, user_id, event_id)
+        if entries:
+            entry, position = entries[0]
+            return JSONResponse(
+                WaitlistEntryResponse(
+                    id=entry.id,
+                    user_id=entry.user_id,
+                    event_id=entry.event_id,
+                    joined_at=entry.joined_at,
+                    position=position
+                ).model_dump(mode="json"),
+                status_code=status.HTTP_202_ACCEPTED,
+                headers={"Location": "/my-waitlist"}
+            )
+        # Promoted (or left) since joining
+        registration = next((reg for reg in await get_user_registrations(db, user_id) if reg.event_id == event_id), None)
+        if registration is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Left the waitlist while joining it"
+            )
+        outcome = RegistrationOutcome.REGISTERED
+        registration = EventRegistrationResponse.model_validate(registration)
+    
+    if outcome == RegistrationOutcome.NOT_FOUND:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Event not found"
         )
-    
-    # Check if event is full
-    current_registrations = get_event_registration_count(db, event_id)
-    if current_registrations >= event.capacity:
+    if outcome == RegistrationOutcome.FULL:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Event is full"
         )
-    
-    # Check if user is already registered
-    if is_user_registered(db, current_user.id, event_id):
+    if outcome == RegistrationOutcome.DUPLICATE:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Already registered for this event"
+            detail="Already on the waitlist for this event" if waitlist and not await is_user_registered(
+                db, user_id, event_id
+            ) else "Already registered for this event"
         )
     
-    registration = register_for_event(db, current_user.id, event_id)
-    if not registration:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to register for event"
-        )
+    # The admission queue invalidates after each batch itself
+    if not queued:
+        await invalidate_event_reads(event_id)
+    return registration
+
+@router.post("/registrations/bulk", response_model=BulkRegistrationResponse, tags=["Event Registration"])
+async def bulk_register(
+    request_data: BulkRegistrationRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Register many (user, event) pairs in one transaction.
     
-    return EventRegistrationResponse(
-        id=registration.id,
-        user_id=registration.user_id,
-        event_id=registration.event_id,
-        registered_at=registration.registered_at
+    Items without a user_id register the current user; registering someone
+    else takes an admin or the event's creator. Each item gets its own
+    result, in request order, instead of the whole request failing.
+    """
+    user_id = current_user.id
+    organizer_id = None if current_user.role == UserRole.ADMIN else user_id
+    pairs = [
+        (item.user_id if item.user_id is not None else user_id, item.event_id)
+        for item in request_data.registrations
+    ]
+    outcomes = await register_many(
+        db, pairs, waitlist=pairs if request_data.waitlist else (), organizer_id=organizer_id
     )
+    
+    results = [
+        {
+            "user_id": pair[0],
+            "event_id": pair[1],
+            "status": outcome.value,
+            "registration": EventRegistrationResponse.model_validate(registration)
+            if outcome == RegistrationOutcome.REGISTERED else None
+        }
+        for pair, (outcome, registration) in zip(pairs, outcomes)
+    ]
+    registered_events = {
+        event_id for (_, event_id), (outcome, _) in zip(pairs, outcomes) if outcome == RegistrationOutcome.REGISTERED
+    }
+    if registered_events:
+        await invalidate_event_reads(*registered_events)
+    return {
+        "results": results,
+        "registered": sum(outcome == RegistrationOutcome.REGISTERED for outcome, _ in outcomes),
+        "waitlisted": sum(outcome == RegistrationOutcome.WAITLISTED for outcome, _ in outcomes)
+    }
 
-@app.delete("/events/{event_id}/register", status_code=status.HTTP_204_NO_CONTENT, tags=["Event Registration"])
+@router.get("/registration-tickets/{ticket_id}", response_model=RegistrationTicketResponse, tags=["Event Registration"])
+async def get_registration_ticket(
+    ticket_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait while the ticket is pending"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of a queued registration"""
+    result = await registration_queue.wait(ticket_id, wait)
+    if result is None or result["user_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    return result
+
+@router.delete("/events/{event_id}/register", status_code=status.HTTP_204_NO_CONTENT, tags=["Event Registration"])
 async def unregister_from_event_endpoint(
     event_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Unregister from an event"""
-    success = unregister_from_event(db, current_user.id, event_id)
+    success = await unregister_from_event(db, current_user.id, event_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Registration not found"
         )
+    
+    await invalidate_event_reads(event_id)
+
+@router.delete("/events/{event_id}/waitlist", status_code=status.HTTP_204_NO_CONTENT, tags=["Event Registration"])
+async def leave_waitlist_endpoint(
+    event_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Leave an event's waitlist"""
+    if not await leave_waitlist(db, current_user.id, event_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Waitlist entry not found"
+        )
 
-@app.get("/my-registrations", response_model=List[EventRegistrationResponse], tags=["Event Registration"])
+@router.get("/my-waitlist", response_model=List[WaitlistEntryResponse], tags=["Event Registration"])
+async def get_my_waitlist(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get current user's waitlist entries and positions"""
+    entries = await get_user_waitlist(db, current_user.id)
+    return [
+        WaitlistEntryResponse(
+            id=entry.id,
+            user_id=entry.user_id,
+            event_id=entry.event_id,
+            joined_at=entry.joined_at,
+            position=position
+        )
+        for entry, position in entries
+    ]
+
+@router.get("/my-registrations", response_model=List[EventRegistrationResponse], tags=["Event Registration"])
 async def get_my_registrations(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get current user's event registrations"""
-    registrations = get_user_registrations(db, current_user.id)
+    registrations = await get_user_registrations(db, current_user.id)
     return [
         EventRegistrationResponse(
             id=reg.id,
@@ -334,17 +736,15 @@ async def get_my_registrations(
         for reg in registrations
     ]
 
-@app.get("/my-events", response_model=List[EventResponse], tags=["Events"])
+@router.get("/my-events", response_model=List[EventResponse], tags=["Events"])
 async def get_my_events(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get events created by current user"""
-    events = db.query(Event).filter(Event.created_by == current_user.id).all()
-    
+    events = await get_events_by_creator(db, current_user.id)
     event_responses = []
     for event in events:
-        registered_count = get_event_registration_count(db, event.id)
         event_responses.append(EventResponse(
             id=event.id,
             name=event.name,
@@ -352,7 +752,9 @@ async def get_my_events(
             location=event.location,
             date_time=event.date_time,
             capacity=event.capacity,
-            registered_count=registered_count,
+            latitude=event.latitude,
+            longitude=event.longitude,
+            registered_count=event.registered_count,
             created_by=event.created_by,
             created_at=event.created_at
         ))
@@ -360,26 +762,31 @@ async def get_my_events(
     return event_responses
 
 # Admin endpoint for debugging (remove in production)
-@app.get("/admin/stats", tags=["Admin"])
-async def get_admin_stats(db: Session = Depends(get_db)):
+@router.get("/admin/stats", tags=["Admin"])
+async def get_admin_stats(db: AsyncSession = Depends(get_async_db)):
     """Get database statistics for debugging"""
     try:
-        total_users = db.query(User).count()
-        total_events = db.query(Event).count()
-        total_registrations = db.query(EventRegistration).count()
+        totals = await get_stat_totals(db)
         
         # Get recent users
-        recent_users = db.query(User).order_by(User.created_at.desc()).limit(5).all()
+        recent_users = await get_recent_users(db, 5)
         
         # Get recent events
-        recent_events = db.query(Event).order_by(Event.created_at.desc()).limit(5).all()
+        recent_events = await get_recent_events(db, 5)
         
         return {
             "stats": {
-                "total_users": total_users,
-                "total_events": total_events,
-                "total_registrations": total_registrations
+                "total_users": totals[stats.USERS],
+                "total_events": totals[stats.EVENTS],
+                "total_registrations": totals[stats.REGISTRATIONS],
+                "total_capacity": totals[stats.CAPACITY],
+                "fill_ratio": round(totals[stats.REGISTRATIONS] / totals[stats.CAPACITY], 4) if totals[stats.CAPACITY] else 0.0
             },
+            "user_cache": user_cache.stats(),
+            "response_cache": response_cache.stats(),
+            # Pools are per worker process; each worker reports its own
+            "database_pools": {"worker_pid": os.getpid(), "pools": pool_stats()},
+            "admission_queue": registration_queue.stats(),
             "recent_users": [
                 {
                     "id": user.id,
@@ -408,110 +815,130 @@ async def get_admin_stats(db: Session = Depends(get_db)):
             detail=f"Failed to get stats: {str(e)}"
         )
 
+@router.get("/admin/stats/daily", tags=["Admin"])
+async def get_daily_admin_stats(
+    metric: str = Query(..., pattern="^(users|events|registrations)$", description="Signups, created events or registrations"),
+    days: int = Query(30, ge=1, le=366),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a statistic's count per UTC day for the last `days` days"""
+    today = datetime.utcnow().date()
+    first_day = today - timedelta(days=days - 1)
+    counts = await get_daily_stats(db, metric, first_day.isoformat())
+    series = []
+    for offset in range(days):
+        day = (first_day + timedelta(days=offset)).isoformat()
+        series.append({"day": day, "count": counts.get(day, 0)})
+    return {"metric": metric, "series": series}
+
 # Admin endpoints for data management
-@app.get("/admin/users", tags=["Admin"])
-async def get_all_users(db: Session = Depends(get_db)):
+# Admin listings stream every matching row unless `limit` is given, in which
+# case they return one page and the next page's cursor in X-Next-Cursor
+@router.get("/admin/users", tags=["Admin"])
+async def get_all_users(
+    search: Optional[str] = Query(None, description="Match email or name"),
+    is_active: Optional[bool] = Query(None),
+    role: Optional[str] = Query(None),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; omit to stream all rows"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get all users (admin only)"""
-    users = db.query(User).all()
-    return [
-        {
-            "id": user.id,
-            "email": user.email,
-            "full_name": user.full_name,
-            "is_active": user.is_active,
-            "created_at": user.created_at
-        }
-        for user in users
-    ]
+    statement = admin_users_statement(after_id=cursor, search=search, is_active=is_active, role=role)
+    return await list_response(db, statement, lambda user: {
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "is_active": user.is_active,
+        "created_at": user.created_at
+    }, limit=limit, format=format)
 
-@app.delete("/admin/users/{user_id}", tags=["Admin"])
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+@router.delete("/admin/users/{user_id}", tags=["Admin"])
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    user = await get_user_by_id(db, user_id)
+    if not user or not await delete_user_record(db, user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    db.delete(user)
-    db.commit()
+    await invalidate_cached_user(user.email)
+    await invalidate_event_reads()  # their registrations no longer count
     return {"message": f"User {user_id} deleted successfully"}
 
-@app.put("/admin/users/{user_id}", tags=["Admin"])
-async def update_user(user_id: int, full_name: str = None, email: str = None, db: Session = Depends(get_db)):
+@router.put("/admin/users/{user_id}", tags=["Admin"])
+async def update_user(user_id: int, full_name: str = None, email: str = None, db: AsyncSession = Depends(get_async_db)):
     """Update a user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    existing = await get_user_by_id(db, user_id)
+    if not existing:
         raise HTTPException(status_code=404, detail="User not found")
+    previous_email = existing.email
     
-    if full_name:
-        user.full_name = full_name
-    if email:
-        user.email = email
+    user = await update_user_record(db, user_id, full_name=full_name, email=email)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
     
-    db.commit()
-    db.refresh(user)
+    await invalidate_cached_user(previous_email, user.email)
     return {"message": f"User {user_id} updated successfully", "user": {
         "id": user.id,
         "email": user.email,
         "full_name": user.full_name
     }}
 
-@app.get("/admin/events", tags=["Admin"])
-async def get_all_events_admin(db: Session = Depends(get_db)):
+@router.get("/admin/events", tags=["Admin"])
+async def get_all_events_admin(
+    search: Optional[str] = Query(None, description="Match event name"),
+    created_by: Optional[int] = Query(None),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; omit to stream all rows"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get all events with creator info (admin only)"""
-    events = db.query(Event).join(User).all()
-    return [
-        {
-            "id": event.id,
-            "name": event.name,
-            "description": event.description,
-            "location": event.location,
-            "date_time": event.date_time,
-            "capacity": event.capacity,
-            "created_by": event.created_by,
-            "creator_name": event.creator.full_name,
-            "creator_email": event.creator.email,
-            "created_at": event.created_at,
-            "registered_count": get_event_registration_count(db, event.id)
-        }
-        for event in events
-    ]
+    statement = admin_events_statement(
+        after_id=cursor, search=search, created_by=created_by, date_from=date_from, date_to=date_to
+    )
+    return await list_response(db, statement, lambda event: {
+        "id": event.id,
+        "name": event.name,
+        "description": event.description,
+        "location": event.location,
+        "date_time": event.date_time,
+        "capacity": event.capacity,
+        "created_by": event.created_by,
+        "creator_name": event.creator.full_name,
+        "creator_email": event.creator.email,
+        "created_at": event.created_at,
+        "registered_count": event.registered_count,
+        "fill_ratio": round(event.registered_count / event.capacity, 4) if event.capacity else 0.0
+    }, limit=limit, format=format)
 
-@app.delete("/admin/events/{event_id}", tags=["Admin"])
-async def delete_event_admin(event_id: int, db: Session = Depends(get_db)):
+@router.delete("/admin/events/{event_id}", tags=["Admin"])
+async def delete_event_admin(event_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete an event (admin only)"""
-    event = db.query(Event).filter(Event.id == event_id).first()
-    if not event:
+    if not await delete_event(db, event_id):
         raise HTTPException(status_code=404, detail="Event not found")
     
-    db.delete(event)
-    db.commit()
+    await invalidate_event_reads(event_id)
     return {"message": f"Event {event_id} deleted successfully"}
 
-@app.put("/admin/events/{event_id}", tags=["Admin"])
+@router.put("/admin/events/{event_id}", tags=["Admin"])
 async def update_event_admin(
     event_id: int, 
     name: str = None,
     description: str = None,
     location: str = None,
     capacity: int = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an event (admin only)"""
-    event = db.query(Event).filter(Event.id == event_id).first()
+    fields = {"name": name, "description": description, "location": location, "capacity": capacity}
+    event = await update_event_fields(db, event_id, {field: value for field, value in fields.items() if value})
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
-    if name:
-        event.name = name
-    if description:
-        event.description = description
-    if location:
-        event.location = location
-    if capacity:
-        event.capacity = capacity
-    
-    db.commit()
-    db.refresh(event)
+    await invalidate_event_reads(event_id)
     return {"message": f"Event {event_id} updated successfully", "event": {
         "id": event.id,
         "name": event.name,
@@ -520,36 +947,45 @@ async def update_event_admin(
         "capacity": event.capacity
     }}
 
-@app.get("/admin/registrations", tags=["Admin"])
-async def get_all_registrations(db: Session = Depends(get_db)):
+@router.get("/admin/registrations", tags=["Admin"])
+async def get_all_registrations(
+    user_id: Optional[int] = Query(None),
+    event_id: Optional[int] = Query(None),
+    cursor: Optional[int] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; omit to stream all rows"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get all registrations (admin only)"""
-    registrations = db.query(EventRegistration).join(User).join(Event).all()
-    return [
-        {
-            "id": reg.id,
-            "user_id": reg.user_id,
-            "user_name": reg.user.full_name,
-            "user_email": reg.user.email,
-            "event_id": reg.event_id,
-            "event_name": reg.event.name,
-            "registered_at": reg.registered_at
-        }
-        for reg in registrations
-    ]
+    statement = admin_registrations_statement(after_id=cursor, user_id=user_id, event_id=event_id)
+    return await list_response(db, statement, lambda reg: {
+        "id": reg.id,
+        "user_id": reg.user_id,
+        "user_name": reg.user.full_name,
+        "user_email": reg.user.email,
+        "event_id": reg.event_id,
+        "event_name": reg.event.name,
+        "registered_at": reg.registered_at
+    }, limit=limit, format=format)
 
-@app.delete("/admin/registrations/{registration_id}", tags=["Admin"])
-async def delete_registration_admin(registration_id: int, db: Session = Depends(get_db)):
+@router.delete("/admin/registrations/{registration_id}", tags=["Admin"])
+async def delete_registration_admin(registration_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a registration (admin only)"""
-    registration = db.query(EventRegistration).filter(EventRegistration.id == registration_id).first()
-    if not registration:
+    if not await delete_registration(db, registration_id):
         raise HTTPException(status_code=404, detail="Registration not found")
     
-    db.delete(registration)
-    db.commit()
+    await invalidate_event_reads()
     return {"message": f"Registration {registration_id} deleted successfully"}
 
-# Run the application
+# Create the application served by `uvicorn main:app`
+app = create_app()
+
+# Run the application (development server)
 if __name__ == "__main__":
+    # Production runs `python manage.py migrate` separately; the development
+    # server keeps the schema current itself
+    run_migrations()
+    
     print("🚀 Starting Event Discovery Platform API...")
     print(f"📊 API Documentation: http://127.0.0.1:8080/docs")
     print(f"📖 Alternative Docs: http://127.0.0.1:8080/redoc")
@@ -0,0 +1,69 @@
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+# Load .env before database.py reads its settings
+load_dotenv()
+
+from database import SessionLocal
+
+# Operational commands, e.g.:
+#   python manage.py migrate
+#   python manage.py reconcile-counts
+#   python manage.py reconcile-stats
+
+def migrate(args) -> int:
+    """Create tables and apply pending schema migrations"""
+    from migrations import run_migrations
+
+    applied = run_migrations()
+    if applied:
+        for name in applied:
+            print(f"✅ Applied migration: {name}")
+    else:
+        print("✅ Schema is up to date")
+    return 0
+
+def reconcile_counts(args) -> int:
+    """Rebuild denormalized event registration counters"""
+    from crud import reconcile_registration_counts
+
+    db = SessionLocal()
+    try:
+        corrected = reconcile_registration_counts(db)
+    finally:
+        db.close()
+    print(f"✅ Reconciled registration counts ({corrected} events corrected)")
+    return 0
+
+def reconcile_stats(args) -> int:
+    """Correct drift in the precomputed statistics behind /admin/stats"""
+    from crud import reconcile_stats as rebuild_stats
+
+    db = SessionLocal()
+    try:
+        totals = rebuild_stats(db)
+    finally:
+        db.close()
+    summary = ", ".join(f"{name}={value}" for name, value in totals.items())
+    print(f"✅ Reconciled statistics ({summary})")
+    return 0
+
+COMMANDS = {
+    "migrate": migrate,
+    "reconcile-counts": reconcile_counts,
+    "reconcile-stats": reconcile_stats,
+}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Event Platform management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, command in COMMANDS.items():
+        subparsers.add_parser(name, help=command.__doc__)
+
+    args = parser.parse_args(argv)
+    return COMMANDS[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
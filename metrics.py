@@ -0,0 +1,271 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI, Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from pooling import pool_stats
+
+# Request and database metrics in the Prometheus text format, served on
+# GET /metrics.
+#
+# Every request is recorded under its route template (/events/{event_id},
+# not /events/42) so the label sets stay bounded; requests that match no
+# route share the "unmatched" label. SQL statements are timed through
+# cursor events on every Engine and charged to the request that ran them.
+# Values are per worker process: scrape each worker, or sum them in the
+# query, as with any multi-process Prometheus target.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    """A value that only goes up"""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+class Gauge(Counter):
+    """A value that goes up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        lines = self._header()
+        for labels, values in series:
+            *bucket_counts, total, count = values
+            cumulative = 0
+            for bound, in_bucket in zip(self.buckets + (float("inf"),), bucket_counts + [count - sum(bucket_counts)]):
+                cumulative += in_bucket
+                bound_label = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, bound_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, extra: Iterable[Metric] = ()) -> str:
+        lines = []
+        for metric in [*self.metrics, *extra]:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route, method and status", ("method", "route", "status")
+))
+LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending its last body byte", ("method", "route")
+))
+IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+))
+RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size", ("method", "route"), buckets=SIZE_BUCKETS
+))
+DB_QUERIES = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("method", "route"), buckets=QUERY_COUNT_BUCKETS
+))
+DB_TIME = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request", ("method", "route")
+))
+DB_STATEMENTS = registry.register(Counter(
+    "db_statements_total", "SQL statements executed, inside requests or in the background", ("source",)
+))
+
+class RequestDatabaseUsage:
+    """SQL statements and time charged to one request"""
+
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+# The usage of the request being handled. It holds a mutable object so that
+# statements run in copied contexts (threadpool endpoints, greenlets of the
+# async engine, BaseHTTPMiddleware tasks) still add to the same request.
+current_usage: ContextVar[Optional[RequestDatabaseUsage]] = ContextVar("request_db_usage", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    usage = current_usage.get()
+    if usage is not None:
+        usage.queries += 1
+        if started is not None:
+            usage.seconds += time.perf_counter() - started
+    DB_STATEMENTS.inc("request" if usage is not None else "background")
+
+_route_templates: Dict[object, str] = {}
+
+def route_template(app: FastAPI, request: Request) -> str:
+    """The matched route's path template, or "unmatched" (404s and the like)"""
+    endpoint = request.scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    if endpoint not in _route_templates:
+        for route in app.routes:
+            if getattr(route, "endpoint", None) is endpoint:
+                _route_templates[endpoint] = route.path
+                break
+        else:
+            return "unmatched"
+    return _route_templates[endpoint]
+
+def _record(app: FastAPI, request: Request, status: int, size: int, started: float, usage: RequestDatabaseUsage) -> None:
+    method, route = request.method, route_template(app, request)
+    REQUESTS.inc(method, route, str(status))
+    LATENCY.observe(time.perf_counter() - started, method, route)
+    RESPONSE_SIZE.observe(size, method, route)
+    DB_QUERIES.observe(usage.queries, method, route)
+    DB_TIME.observe(usage.seconds, method, route)
+    IN_FLIGHT.dec()
+
+def install(app: FastAPI) -> None:
+    """Record every request to `app` and serve the metrics on GET /metrics"""
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        usage = RequestDatabaseUsage()
+        current_usage.set(usage)
+        started = time.perf_counter()
+        IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+        except Exception:
+            _record(app, request, 500, 0, started, usage)
+            raise
+
+        # Streamed bodies (exports, admin listings) are only complete once the
+        # iterator is exhausted, so finish the measurement there
+        body = response.body_iterator
+
+        async def measured_body():
+            size = 0
+            status = response.status_code
+            try:
+                async for chunk in body:
+                    size += len(chunk)
+                    yield chunk
+            except BaseException:
+                status = 500
+                raise
+            finally:
+                _record(app, request, status, size, started, usage)
+
+        response.body_iterator = measured_body()
+        return response
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint"""
+        return Response(registry.render(pool_metrics()), media_type=CONTENT_TYPE)
+
+def pool_metrics() -> List[Metric]:
+    """Connection pool gauges and counters, read from pooling at scrape time"""
+    gauges = {
+        "checked_out": Gauge("db_pool_checked_out", "Connections currently checked out", ("pool",)),
+        "idle": Gauge("db_pool_idle", "Idle connections in the pool", ("pool",)),
+        "overflow": Gauge("db_pool_overflow", "Connections open beyond the pool size", ("pool",)),
+        "size": Gauge("db_pool_size", "Configured pool size", ("pool",)),
+    }
+    counters = {
+        "checkouts": Counter("db_pool_checkouts_total", "Connection checkouts", ("pool",)),
+        "wait_seconds_total": Counter("db_pool_wait_seconds_total", "Time spent waiting for a connection", ("pool",)),
+        "timeouts": Counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection", ("pool",)),
+        "connection_errors": Counter("db_pool_connection_errors_total", "Checkouts that failed to connect", ("pool",)),
+        "invalidated": Counter("db_pool_invalidated_total", "Connections discarded as broken", ("pool",)),
+    }
+    for name, stats in pool_stats().items():
+        for key, metric in [*gauges.items(), *counters.items()]:
+            if key in stats:
+                metric.inc(name, amount=stats[key])
+    return [*gauges.values(), *counters.values()]
@@ -0,0 +1,153 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from database import engine, Base
+import models  # noqa: F401 - register models on Base.metadata
+
+# Schema migrations for existing deployments.
+#
+# `Base.metadata.create_all` only creates missing tables, so changes to tables
+# that already exist are applied here. Every migration must be idempotent: it
+# inspects the live schema and only changes what is missing.
+
+def _column_names(connection: Connection, table: str) -> set:
+    return {column["name"] for column in inspect(connection).get_columns(table)}
+
+def add_event_registered_count(connection: Connection) -> bool:
+    """Add events.registered_count and backfill it from event_registrations"""
+    if "registered_count" in _column_names(connection, "events"):
+        return False
+
+    connection.execute(text(
+        "ALTER TABLE events ADD COLUMN registered_count INTEGER NOT NULL DEFAULT 0"
+    ))
+    _backfill_registered_count(connection)
+    return True
+
+def add_registration_unique_constraint(connection: Connection) -> bool:
+    """Enforce one registration per (user_id, event_id)"""
+    inspector = inspect(connection)
+    names = {c["name"] for c in inspector.get_unique_constraints("event_registrations")}
+    names |= {i["name"] for i in inspector.get_indexes("event_registrations")}
+    if "uq_event_registrations_user_event" in names:
+        return False
+
+    # Keep the earliest registration of any duplicate pair; the derived table
+    # is required by MySQL, which cannot select from the table being deleted
+    connection.execute(text(
+        "DELETE FROM event_registrations WHERE id NOT IN ("
+        "SELECT id FROM (SELECT MIN(id) AS id FROM event_registrations "
+        "GROUP BY user_id, event_id) AS keep_ids)"
+    ))
+    connection.execute(text(
+        "CREATE UNIQUE INDEX uq_event_registrations_user_event "
+        "ON event_registrations (user_id, event_id)"
+    ))
+    _backfill_registered_count(connection)
+    return True
+
+def add_user_role(connection: Connection) -> bool:
+    """Add users.role, defaulting existing accounts to 'user'"""
+    if "role" in _column_names(connection, "users"):
+        return False
+
+    connection.execute(text(
+        "ALTER TABLE users ADD COLUMN role VARCHAR(20) NOT NULL DEFAULT 'user'"
+    ))
+    return True
+
+def add_event_fulltext_index(connection: Connection) -> bool:
+    """Add the FULLTEXT index used for event search on MySQL"""
+    if connection.dialect.name != "mysql":
+        return False
+    if "ix_events_name_description_fulltext" in {i["name"] for i in inspect(connection).get_indexes("events")}:
+        return False
+
+    connection.execute(text(
+        "CREATE FULLTEXT INDEX ix_events_name_description_fulltext ON events (name, description)"
+    ))
+    return True
+
+def add_event_coordinates(connection: Connection) -> bool:
+    """Add events.latitude/longitude and the indexed geohash derived from them"""
+    # Checked one by one: MySQL DDL is not transactional, so a failed run may
+    # have left some of these behind
+    columns = _column_names(connection, "events")
+    missing = [
+        (name, ddl) for name, ddl in (
+            ("latitude", "DOUBLE PRECISION"),
+            ("longitude", "DOUBLE PRECISION"),
+            ("geohash", "VARCHAR(12)"),
+        )
+        if name not in columns
+    ]
+    for name, ddl in missing:
+        connection.execute(text(f"ALTER TABLE events ADD COLUMN {name} {ddl}"))
+
+    indexed = "ix_events_geohash" in {i["name"] for i in inspect(connection).get_indexes("events")}
+    if not indexed:
+        connection.execute(text("CREATE INDEX ix_events_geohash ON events (geohash)"))
+    return bool(missing) or not indexed
+
+# Indexes declared on the models after their tables were first created, as
+# (table, name, columns)
+ACCESS_PATH_INDEXES = [
+    ("events", "ix_events_created_by", ("created_by",)),
+    ("event_registrations", "ix_event_registrations_user_registered_at", ("user_id", "registered_at")),
+    ("event_registrations", "ix_event_registrations_event_registered_at", ("event_id", "registered_at")),
+]
+
+def add_access_path_indexes(connection: Connection) -> bool:
+    """Add the indexes behind registration lookups and per-creator event listings"""
+    inspector = inspect(connection)
+    created = False
+    for table, name, columns in ACCESS_PATH_INDEXES:
+        if name in {i["name"] for i in inspector.get_indexes(table)}:
+            continue
+        connection.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
+        created = True
+    return created
+
+def backfill_stat_counters(connection: Connection) -> bool:
+    """Fill the new stat_counters table from the existing rows"""
+    if connection.execute(text("SELECT COUNT(*) FROM stat_counters")).scalar():
+        return False
+
+    from crud import reconcile_stats
+
+    # Joins the migration's transaction instead of committing on its own
+    with Session(bind=connection) as session:
+        totals = reconcile_stats(session)
+    return any(totals.values())
+
+def _backfill_registered_count(connection: Connection) -> None:
+    connection.execute(text(
+        "UPDATE events SET registered_count = ("
+        "SELECT COUNT(*) FROM event_registrations "
+        "WHERE event_registrations.event_id = events.id)"
+    ))
+
+MIGRATIONS = [
+    add_event_registered_count,
+    add_registration_unique_constraint,
+    add_user_role,
+    add_event_fulltext_index,
+    add_event_coordinates,
+    backfill_stat_counters,
+    add_access_path_indexes,
+]
+
+def run_migrations() -> list:
+    """Create missing tables, then apply pending migrations.
+
+    Returns the names of the migrations that changed the schema.
+    """
+    Base.metadata.create_all(bind=engine)
+
+    applied = []
+    with engine.begin() as connection:
+        for migration in MIGRATIONS:
+            if migration(connection):
+                applied.append(migration.__name__)
+    return applied
@@ -1,10 +1,17 @@
-﻿from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index
+﻿from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Boolean, Float, Index, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
+from datetime import datetime
+import enum
 
 from database import Base
 
+class UserRole(str, enum.Enum):
+    USER = "user"
+    CREATOR = "creator"
+    ADMIN = "admin"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -13,40 +20,87 @@ class User(Base):
     full_name = Column(String(255), nullable=False)
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    role = Column(String(20), default=UserRole.USER.value, server_default=UserRole.USER.value, nullable=False)
+    # Timestamps are UTC from the application clock; the server default only
+    # covers rows inserted outside the app
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), nullable=False)
     
-    # Relationships
-    created_events = relationship("Event", back_populates="creator")
-    registrations = relationship("EventRegistration", back_populates="user")
+    # Relationships. None of them lazy-load: queries that need one load it
+    # explicitly (see crud.py), so a missing loader option raises instead of
+    # issuing a SELECT per row. Deletes remove dependent rows themselves.
+    created_events = relationship("Event", back_populates="creator", lazy="raise_on_sql", passive_deletes=True)
+    registrations = relationship("EventRegistration", back_populates="user", lazy="raise_on_sql", passive_deletes=True)
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Backs MATCH ... AGAINST search on MySQL (see search.py)
+        Index("ix_events_name_description_fulltext", "name", "description", mysql_prefix="FULLTEXT")
+        .ddl_if(dialect="mysql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), nullable=False, index=True)
     description = Column(Text)
     location = Column(String(255), nullable=False)
+    # Optional coordinates; geohash is derived from them by crud (see geo.py)
+    latitude = Column(Float(precision=53))
+    longitude = Column(Float(precision=53))
+    geohash = Column(String(12), index=True)
     date_time = Column(DateTime, nullable=False, index=True)
     capacity = Column(Integer, nullable=False)
-    created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    # Denormalized registration count, maintained by crud in the same transaction
+    # as registration writes; rebuild with `python manage.py reconcile-counts`
+    registered_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Indexed for /my-events and the admin creator filter
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), nullable=False)
     
     # Relationships
-    creator = relationship("User", back_populates="created_events")
-    registrations = relationship("EventRegistration", back_populates="event")
+    creator = relationship("User", back_populates="created_events", lazy="raise_on_sql")
+    registrations = relationship("EventRegistration", back_populates="event", lazy="raise_on_sql", passive_deletes=True)
 
 class EventRegistration(Base):
     __tablename__ = "event_registrations"
+    __table_args__ = (
+        # Also serves lookups by user_id alone and by (user_id, event_id)
+        UniqueConstraint("user_id", "event_id", name="uq_event_registrations_user_event"),
+        # A user's registrations newest first (/my-registrations)
+        Index("ix_event_registrations_user_registered_at", "user_id", "registered_at"),
+        # Registrations of one event: counts, attendee lists in signup order, deletes
+        Index("ix_event_registrations_event_registered_at", "event_id", "registered_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
-    registered_at = Column(DateTime, server_default=func.now(), nullable=False)
+    registered_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), nullable=False)
     
     # Relationships
-    user = relationship("User", back_populates="registrations")
-<<<<<<< HEAD
-    event = relationship("Event", back_populates="registrations")
-=======
-    event = relationship("Event", back_populates="registrations")
->>>>>>> 9e1cb9f19d0fb2fb4d5a3bac77e2af039c48947c
+    user = relationship("User", back_populates="registrations", lazy="raise_on_sql")
+    event = relationship("Event", back_populates="registrations", lazy="raise_on_sql")
+
+class WaitlistEntry(Base):
+    """A user waiting for a seat at a full event; promoted to a registration
+    in id (arrival) order by crud when seats free up"""
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "event_id", name="uq_waitlist_entries_user_event"),
+        # An event's waitlist in arrival order: promotion and positions
+        Index("ix_waitlist_entries_event_id_id", "event_id", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
+    joined_at = Column(DateTime, default=datetime.utcnow, server_default=func.now(), nullable=False)
+
+class StatCounter(Base):
+    """One shard of a statistics counter, maintained by crud (see stats.py)"""
+    __tablename__ = "stat_counters"
+    
+    name = Column(String(32), primary_key=True)
+    # "" for the running total, otherwise the UTC day (YYYY-MM-DD) it counts
+    bucket = Column(String(10), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import NamedTuple
+
+# Opaque keyset cursors for /events. A cursor records the (date_time, id) of
+# the row at the edge of a page and which way to page from it.
+
+NEXT = "next"
+PREV = "prev"
+
+class CursorPosition(NamedTuple):
+    date_time: datetime
+    id: int
+    direction: str
+
+def encode_cursor(date_time: datetime, id: int, direction: str) -> str:
+    """Encode a page edge as an opaque, URL-safe cursor"""
+    payload = json.dumps({"d": date_time.isoformat(), "i": id, "dir": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> CursorPosition:
+    """Decode a cursor produced by encode_cursor; raises ValueError if invalid"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position = CursorPosition(
+            date_time=datetime.fromisoformat(payload["d"]),
+            id=int(payload["i"]),
+            direction=payload["dir"],
+        )
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+    if position.direction not in (NEXT, PREV):
+        raise ValueError("Invalid cursor")
+    return position
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Connection pool settings shared by every engine (primary, async, replicas).
+#
+# Each uvicorn worker has its own pools, and the sync and async engines each
+# hold one, so the connections a deployment can open against MySQL are about
+#   workers x engines x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# which has to stay below the server's max_connections.
+#
+# DB_POOL_PRE_PING picks how stale connections are detected on checkout:
+#   always - ping on every checkout (one extra round trip each time)
+#   idle   - ping only connections unused for DB_POOL_PING_IDLE seconds
+#   never  - rely on DB_POOL_RECYCLE and on reconnecting after errors
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 300))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "idle").lower()
+DB_POOL_PING_IDLE = float(os.getenv("DB_POOL_PING_IDLE", 30))
+
+PRE_PING_STRATEGIES = ("always", "idle", "never")
+
+if DB_POOL_PRE_PING not in PRE_PING_STRATEGIES:
+    raise ValueError(f"DB_POOL_PRE_PING must be one of {', '.join(PRE_PING_STRATEGIES)}")
+
+class PoolMetrics:
+    """Checkout counters for one pool in this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.overflow_checkouts = 0
+        self.peak_overflow = 0
+        self.timeouts = 0
+        self.connection_errors = 0
+        self.connections_opened = 0
+        self.invalidated = 0
+        self.pings = 0
+
+    def record_checkout(self, wait: float, overflow: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            if overflow > 0:
+                self.overflow_checkouts += 1
+                self.peak_overflow = max(self.peak_overflow, overflow)
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "overflow_checkouts": self.overflow_checkouts,
+                "peak_overflow": self.peak_overflow,
+                "timeouts": self.timeouts,
+                "connection_errors": self.connection_errors,
+                "connections_opened": self.connections_opened,
+                "invalidated": self.invalidated,
+                "pings": self.pings,
+            }
+
+class _InstrumentedPool:
+    """Times every checkout, including waiting for a free connection"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        if self.metrics is None:
+            return super().connect()
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record("timeouts")
+            raise
+        except Exception:
+            self.metrics.record("connection_errors")
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, max(self.overflow(), 0))
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+def pool_options(url: str) -> Dict[str, Any]:
+    """create_engine keyword arguments for the configured pool"""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING == "always", "pool_recycle": DB_POOL_RECYCLE}
+    parsed = make_url(url)
+    default_pool = parsed.get_dialect().get_pool_class(parsed)
+    # Only size dialects that pool by default; SQLite keeps file databases on
+    # NullPool under aiosqlite and in-memory ones on a single connection
+    if issubclass(default_pool, QueuePool):
+        options.update(
+            poolclass=InstrumentedAsyncQueuePool if issubclass(default_pool, AsyncAdaptedQueuePool) else InstrumentedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return options
+
+# Instrumented engines and their metrics by name, for pool_stats()
+_engines: Dict[str, Tuple[Engine, PoolMetrics]] = {}
+
+def instrument(engine: Engine, name: str) -> Engine:
+    """Collect pool metrics for `engine` (an async engine's .sync_engine) and apply the idle ping"""
+    metrics = PoolMetrics()
+    if isinstance(engine.pool, _InstrumentedPool):
+        engine.pool.metrics = metrics
+    _engines[name] = (engine, metrics)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.record("connections_opened")
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.record("invalidated")
+
+    if DB_POOL_PRE_PING == "idle":
+        @event.listens_for(engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            connection_record.info["checked_in_at"] = time.monotonic()
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            checked_in_at = connection_record.info.get("checked_in_at")
+            if checked_in_at is None or time.monotonic() - checked_in_at < DB_POOL_PING_IDLE:
+                return
+            metrics.record("pings")
+            try:
+                engine.dialect.do_ping(dbapi_connection)
+            except Exception as e:
+                # The pool discards this connection and retries with a new one
+                raise DisconnectionError(f"Idle connection failed ping: {e}") from e
+
+    return engine
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Current occupancy and checkout metrics for each instrumented pool in this worker"""
+    result = {}
+    for name, (engine, metrics) in _engines.items():
+        pool = engine.pool
+        entry = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        entry.update(metrics.snapshot())
+        result[name] = entry
+    return result
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# SQL diagnostics: a slow-query log and an opt-in per-request profiler.
+#
+# Any statement slower than SLOW_QUERY_MS is logged as one JSON object on the
+# "event_platform.slow_queries" logger, with the request that ran it (0
+# disables the log). Only statements are logged, never their parameters.
+#
+# SQL_PROFILER=header profiles requests that send an X-SQL-Profile header;
+# SQL_PROFILER=all profiles every request. A profiled request records each
+# statement and its time, answers with a summary in the X-SQL-Profile
+# response header, and flags statements repeated REPEATED_QUERY_THRESHOLD
+# or more times (the signature of an N+1 query) on the slow-query logger.
+# Statements run while a streamed body is sent come after the headers and
+# are not in the summary. Keep the profiler off in production: the header
+# reveals query shapes to clients.
+
+SQL_PROFILER = os.getenv("SQL_PROFILER", "off").lower()
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 500))
+REPEATED_QUERY_THRESHOLD = int(os.getenv("REPEATED_QUERY_THRESHOLD", 5))
+
+PROFILER_MODES = ("off", "header", "all")
+PROFILE_HEADER = "X-SQL-Profile"
+
+if SQL_PROFILER not in PROFILER_MODES:
+    raise ValueError(f"SQL_PROFILER must be one of {', '.join(PROFILER_MODES)}")
+
+slow_query_log = logging.getLogger("event_platform.slow_queries")
+
+class RequestProfile:
+    """Every statement one request ran, with its duration"""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, float]] = []
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements.append((statement, seconds))
+
+    def repeated(self) -> List[Dict[str, Any]]:
+        """Statements run at least REPEATED_QUERY_THRESHOLD times, most frequent first"""
+        runs = defaultdict(list)
+        for statement, seconds in self.statements:
+            runs[statement].append(seconds)
+        return sorted(
+            (
+                {"statement": statement, "count": len(times), "total_ms": round(sum(times) * 1000, 3)}
+                for statement, times in runs.items()
+                if len(times) >= REPEATED_QUERY_THRESHOLD
+            ),
+            key=lambda entry: entry["count"],
+            reverse=True
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        times = [seconds for _, seconds in self.statements]
+        return {
+            "queries": len(times),
+            "db_ms": round(sum(times) * 1000, 3),
+            "slowest_ms": round(max(times, default=0.0) * 1000, 3),
+            "repeated": self.repeated(),
+        }
+
+    def header_value(self) -> str:
+        summary = self.summary()
+        return (
+            f"queries={summary['queries']}; db_ms={summary['db_ms']}; "
+            f"slowest_ms={summary['slowest_ms']}; repeated={len(summary['repeated'])}"
+        )
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+current_request: ContextVar[Optional[str]] = ContextVar("sql_profile_request", default=None)
+
+def _log(kind: str, **fields: Any) -> None:
+    slow_query_log.warning(json.dumps({"event": kind, "request": current_request.get(), **fields}))
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._profile_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_profile_started", None)
+    if started is None:
+        return
+    seconds = time.perf_counter() - started
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+    if SLOW_QUERY_MS > 0 and seconds * 1000 >= SLOW_QUERY_MS:
+        _log("slow_query", duration_ms=round(seconds * 1000, 3), statement=statement, executemany=executemany)
+
+def _wants_profile(request: Request) -> bool:
+    return SQL_PROFILER == "all" or (SQL_PROFILER == "header" and PROFILE_HEADER.lower() in request.headers)
+
+def install(app: FastAPI) -> None:
+    """Label slow queries with their request and profile requests that ask for it"""
+
+    @app.middleware("http")
+    async def profile_sql(request: Request, call_next):
+        current_request.set(f"{request.method} {request.url.path}")
+        if not _wants_profile(request):
+            return await call_next(request)
+
+        profile = RequestProfile()
+        current_profile.set(profile)
+        response = await call_next(request)
+        response.headers[PROFILE_HEADER] = profile.header_value()
+        for entry in profile.repeated():
+            _log("repeated_query", **entry)
+        return response
@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database import engine, async_engine
+
+# Count the SQL statements executed while a block runs, to catch N+1 query
+# regressions in tests:
+#
+#     with assert_max_queries(3):
+#         client.get("/admin/registrations")
+#
+# Statements are counted on both the sync and async engines by default.
+
+class QueryCounter:
+    """Records every statement executed on `engines` while active"""
+
+    def __init__(self, *engines: Engine):
+        self.engines = engines or (engine, async_engine.sync_engine)
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        for target in self.engines:
+            event.listen(target, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        for target in self.engines:
+            event.remove(target, "before_cursor_execute", self._record)
+
+@contextmanager
+def assert_max_queries(limit: int, *engines: Engine):
+    """Fail if the block executes more than `limit` statements"""
+    with QueryCounter(*engines) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = "\n".join(f"  {statement}" for statement in counter.statements)
+        raise AssertionError(f"Expected at most {limit} queries, got {counter.count}:\n{listing}")
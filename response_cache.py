@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+from typing import Any, List, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+
+from cache import create_cache
+from database import READ_YOUR_WRITES_WINDOW
+
+# Cached responses for the anonymous event reads (GET /events and
+# GET /events/{id}), with ETags so unchanged responses can be answered 304.
+#
+# Keys carry a generation number next to the normalized query. A write bumps
+# the list generation and drops the affected detail entries rather than
+# hunting down every cached page; entries from old generations are never read
+# again and age out through the TTL and the LRU bound. With RESPONSE_CACHE_URL
+# set, entries and generations live in Redis so all workers see the same
+# invalidations; otherwise each process has its own cache and writes made by
+# other workers show up once the TTL expires.
+#
+# Reads served from a replica right after a write may not include it yet.
+# Invalidation marks the entries it made stale (the new list generation, the
+# dropped detail entries) for READ_YOUR_WRITES_WINDOW seconds, and a replica
+# read refilling one of them is only kept that long, so replication lag is
+# never cached for a full TTL. Other entries are cached as usual.
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 30))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 5000))
+
+response_cache = create_cache(
+    os.getenv("RESPONSE_CACHE_URL"),
+    prefix="response:",
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    default_ttl=RESPONSE_CACHE_TTL
+)
+
+LIST_GENERATION = "generation:list"
+DETAIL_GENERATION = "generation:detail"
+
+async def events_list_key(**params: Any) -> str:
+    """Cache key for a GET /events query"""
+    for name in ("search", "location"):
+        if params.get(name) is not None:
+            params[name] = params[name].strip().lower() or None
+    generation = await response_cache.incr(LIST_GENERATION, 0)
+    return f"list:{generation}:" + json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+async def event_detail_key(event_id: int) -> str:
+    """Cache key for GET /events/{event_id}"""
+    generation = await response_cache.incr(DETAIL_GENERATION, 0)
+    return f"detail:{generation}:{event_id}"
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def _respond(request: Request, entry: dict) -> Response:
+    headers = {"ETag": entry["etag"], "Cache-Control": "no-cache"}
+    if _not_modified(request, entry["etag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+async def get_cached_response(request: Request, key: str) -> Optional[Response]:
+    """Serve `key` from the cache (304 if the client's ETag matches), or None on a miss"""
+    entry = await response_cache.get(key)
+    return _respond(request, entry) if entry is not None else None
+
+async def cache_response(request: Request, key: str, payload: Any) -> Response:
+    """Serialize `payload`, store it under `key` and respond with it"""
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":"))
+    entry = {"body": body, "etag": '"' + hashlib.sha1(body.encode()).hexdigest() + '"'}
+    ttl = None
+    if getattr(request.state, "db_replica", False) and await _recently_written(key):
+        ttl = min(READ_YOUR_WRITES_WINDOW, RESPONSE_CACHE_TTL)
+    await response_cache.set(key, entry, ttl=ttl)
+    return _respond(request, entry)
+
+def _write_markers(key: str) -> List[str]:
+    kind, generation, _ = key.split(":", 2)
+    markers = [f"written:{kind}:{generation}"]
+    if kind == "detail":
+        markers.append(f"written:{key}")
+    return markers
+
+async def _recently_written(key: str) -> bool:
+    for marker in _write_markers(key):
+        if await response_cache.get(marker):
+            return True
+    return False
+
+async def _mark_written(*keys: str) -> None:
+    for key in keys:
+        await response_cache.set(f"written:{key}", True, ttl=READ_YOUR_WRITES_WINDOW)
+
+async def invalidate_events(*event_ids: int) -> None:
+    """Drop cached reads after a write; with no ids every cached event is dropped"""
+    list_generation = await response_cache.incr(LIST_GENERATION)
+    await _mark_written(f"list:{list_generation}")
+    if event_ids:
+        generation = await response_cache.incr(DETAIL_GENERATION, 0)
+        keys = [f"detail:{generation}:{event_id}" for event_id in event_ids]
+        await response_cache.delete(*keys)
+        await _mark_written(*keys)
+    else:
+        generation = await response_cache.incr(DETAIL_GENERATION)
+        await _mark_written(f"detail:{generation}")
@@ -1,4 +1,4 @@
-﻿from pydantic import BaseModel, EmailStr, Field, validator
+﻿from pydantic import BaseModel, EmailStr, Field, validator, model_validator
 from datetime import datetime
 from typing import List, Optional
 
@@ -33,6 +33,14 @@ class EventBase(BaseModel):
     location: str = Field(..., min_length=1, max_length=255)
     date_time: datetime
     capacity: int = Field(..., gt=0, le=10000)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    
+    @model_validator(mode="after")
+    def check_coordinates(self):
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        return self
 
 class EventCreate(EventBase):
     pass
@@ -43,6 +51,8 @@ class EventUpdate(BaseModel):
     location: Optional[str] = Field(None, min_length=1, max_length=255)
     date_time: Optional[datetime] = None
     capacity: Optional[int] = Field(None, gt=0, le=10000)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 class EventResponse(EventBase):
     id: int
@@ -55,11 +65,13 @@ class EventResponse(EventBase):
 
 class PaginatedEventsResponse(BaseModel):
     events: List[EventResponse]
-    total: int
+    total: Optional[int] = None  # None when include_total=false
     skip: int
     limit: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 # Event registration schemas
 class EventRegistrationResponse(BaseModel):
@@ -71,9 +83,48 @@ class EventRegistrationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class WaitlistEntryResponse(BaseModel):
+    id: int
+    user_id: int
+    event_id: int
+    joined_at: datetime
+    position: int  # 1 = next to be promoted
+    status: str = "waitlisted"
+
+class RegistrationTicketResponse(BaseModel):
+    ticket_id: str
+    event_id: int
+    user_id: int
+    # pending, registered, waitlisted, full, duplicate, not_found or failed
+    status: str
+    registration: Optional[EventRegistrationResponse] = None
+
+class BulkRegistrationItem(BaseModel):
+    event_id: int
+    user_id: Optional[int] = None  # the current user if omitted
+
+class BulkRegistrationRequest(BaseModel):
+    registrations: List[BulkRegistrationItem] = Field(..., min_length=1, max_length=1000)
+    waitlist: bool = False  # waitlist pairs whose event is full
+
+class BulkRegistrationResult(BaseModel):
+    user_id: int
+    event_id: int
+    # registered, waitlisted, full, duplicate, not_found, unknown_user or forbidden
+    status: str
+    registration: Optional[EventRegistrationResponse] = None
+
+class BulkRegistrationResponse(BaseModel):
+    results: List[BulkRegistrationResult]  # in request order
+    registered: int
+    waitlisted: int
+
 class EventWithRegistrationStatus(EventResponse):
 
     is_registered: bool = False
 
     is_registered: bool = False
 
+
+class NearbyEventResponse(EventWithRegistrationStatus):
+    distance_km: float
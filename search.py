@@ -0,0 +1,249 @@
+import bisect
+import itertools
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, Integer, MetaData, Table, delete, event, false, insert, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+from models import Event
+
+# Full-text search over event name and description.
+#
+# MySQL deployments use the FULLTEXT index on events(name, description) with
+# MATCH ... AGAINST in boolean mode. Other databases (SQLite in development
+# and tests) use an in-process inverted index that is loaded on first use and
+# kept current from committed ORM changes. The in-process index only sees
+# writes made by its own process, so it is not meant for multi-worker
+# deployments on a non-MySQL database.
+#
+# SEARCH_BACKEND=auto|fulltext|memory overrides the choice.
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+# Larger in-process match sets reach SQL through a temporary table instead of
+# one bound parameter each (SQLite caps the parameters per statement)
+MAX_BOUND_IDS = int(os.getenv("SEARCH_MAX_BOUND_IDS", 500))
+# Rows per INSERT into that table
+MATCH_INSERT_BATCH = 5000
+
+# Per-connection temporary table of matching event ids; `token` tells the
+# match sets of successive searches on one connection apart
+search_matches = Table(
+    "search_matches",
+    MetaData(),
+    Column("token", Integer, primary_key=True),
+    Column("event_id", Integer, primary_key=True),
+    prefixes=["TEMPORARY"],
+)
+_match_tokens = itertools.count(1)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(value: Optional[str]) -> List[str]:
+    return _TOKEN.findall(value.lower()) if value else []
+
+class SearchBackend:
+    """Interface: a SQL filter for matching events and a relevance ranking"""
+
+    def filter(self, db: Session, query: str):
+        raise NotImplementedError
+
+    def relevance(self, db: Session, query: str):
+        """SQL expression to ORDER BY (descending), or None if ranked in Python"""
+        raise NotImplementedError
+
+    def scores(self, db: Session, query: str) -> Dict[int, float]:
+        raise NotImplementedError
+
+class FullTextSearch(SearchBackend):
+    """MySQL FULLTEXT search; every query word must match, the last as a prefix"""
+
+    def _against(self, query: str):
+        words = tokenize(query)
+        if not words:
+            return None
+        terms = " ".join([f"+{word}" for word in words[:-1]] + [f"+{words[-1]}*"])
+        return mysql.match(Event.name, Event.description, against=terms).in_boolean_mode()
+
+    def filter(self, db: Session, query: str):
+        match = self._against(query)
+        return match > 0 if match is not None else false()
+
+    def relevance(self, db: Session, query: str):
+        return self._against(query)
+
+    def scores(self, db: Session, query: str) -> Dict[int, float]:
+        match = self._against(query)
+        if match is None:
+            return {}
+        return dict(db.query(Event.id, match).filter(match > 0).all())
+
+class InvertedIndexSearch(SearchBackend):
+    """In-process inverted index over event name and description, BM25 ranked"""
+
+    K1 = 1.2
+    B = 0.75
+    PREFIX_WEIGHT = 0.5  # completions of a partial last word rank below exact matches
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)  # term -> {event_id: term frequency}
+        self._doc_terms = {}                # event_id -> {term: term frequency}
+        self._doc_lengths = {}
+        self._sorted_terms = []
+        self._terms_dirty = False
+        self.loaded = False
+
+    def load(self, db: Session) -> None:
+        """Build the index from the events table"""
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            for event_id, name, description in db.query(Event.id, Event.name, Event.description).yield_per(1000):
+                self._add(event_id, name, description)
+            self._terms_dirty = True
+            self.loaded = True
+
+    def reset(self) -> None:
+        """Drop the index so that it is rebuilt from the table on next use"""
+        with self._lock:
+            self.loaded = False
+
+    def index_event(self, event_id: int, name: str, description: Optional[str]) -> None:
+        with self._lock:
+            if self.loaded:
+                self._remove(event_id)
+                self._add(event_id, name, description)
+                self._terms_dirty = True
+
+    def remove_event(self, event_id: int) -> None:
+        with self._lock:
+            if self.loaded:
+                self._remove(event_id)
+                self._terms_dirty = True
+
+    def _add(self, event_id: int, name: str, description: Optional[str]) -> None:
+        counts = defaultdict(int)
+        for term in tokenize(name) + tokenize(description):
+            counts[term] += 1
+        self._doc_terms[event_id] = dict(counts)
+        self._doc_lengths[event_id] = sum(counts.values())
+        for term, frequency in counts.items():
+            self._postings[term][event_id] = frequency
+
+    def _remove(self, event_id: int) -> None:
+        for term in self._doc_terms.pop(event_id, {}):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(event_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._doc_lengths.pop(event_id, None)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        terms = []
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def scores(self, db: Session, query: str) -> Dict[int, float]:
+        """Score every event containing all query words (the last as a prefix)"""
+        words = tokenize(query)
+        if not words:
+            return {}
+        if not self.loaded:
+            self.load(db)
+
+        with self._lock:
+            total_docs = len(self._doc_lengths) or 1
+            average_length = sum(self._doc_lengths.values()) / total_docs or 1.0
+            scores = None
+            for position, word in enumerate(words):
+                terms = self._expand_prefix(word) if position == len(words) - 1 else [word]
+                word_scores = defaultdict(float)
+                for term in terms:
+                    postings = self._postings.get(term, {})
+                    idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                    weight = 1.0 if term == word else self.PREFIX_WEIGHT
+                    for event_id, frequency in postings.items():
+                        norm = self.K1 * (1 - self.B + self.B * self._doc_lengths[event_id] / average_length)
+                        word_scores[event_id] += weight * idf * frequency * (self.K1 + 1) / (frequency + norm)
+                if scores is None:
+                    scores = dict(word_scores)
+                else:
+                    scores = {eid: s + word_scores[eid] for eid, s in scores.items() if eid in word_scores}
+                if not scores:
+                    return {}
+            return scores
+
+    def filter(self, db: Session, query: str):
+        matches = self.scores(db, query)
+        if not matches:
+            return false()
+        if len(matches) <= MAX_BOUND_IDS:
+            return Event.id.in_(list(matches))
+        return Event.id.in_(_stage_matches(db, matches))
+
+    def relevance(self, db: Session, query: str):
+        return None
+
+def _stage_matches(db: Session, event_ids):
+    """Load ids into the connection's temporary search_matches table; returns a subquery selecting them"""
+    connection = db.connection()
+    search_matches.create(connection, checkfirst=True)
+    token = next(_match_tokens)
+    # A filter is built right before the statement that uses it, so earlier match sets are done with
+    connection.execute(delete(search_matches))
+    rows = ({"token": token, "event_id": event_id} for event_id in event_ids)
+    while batch := list(itertools.islice(rows, MATCH_INSERT_BATCH)):
+        connection.execute(insert(search_matches), batch)
+    return select(search_matches.c.event_id).where(search_matches.c.token == token)
+
+full_text_search = FullTextSearch()
+inverted_index = InvertedIndexSearch()
+
+def get_search_backend(db: Session) -> SearchBackend:
+    """Pick the search backend for the database `db` is bound to"""
+    if SEARCH_BACKEND == "fulltext":
+        return full_text_search
+    if SEARCH_BACKEND == "memory":
+        return inverted_index
+    return full_text_search if db.get_bind().dialect.name == "mysql" else inverted_index
+
+# Keep the in-process index current with committed ORM changes
+@event.listens_for(Session, "after_flush")
+def _collect_event_changes(session, flush_context):
+    changes = session.info.setdefault("search_index_changes", {})
+    for instance in list(session.new) + list(session.dirty):
+        if isinstance(instance, Event):
+            changes[instance.id] = (instance.name, instance.description)
+    for instance in session.deleted:
+        if isinstance(instance, Event):
+            changes[instance.id] = None
+
+@event.listens_for(Session, "after_commit")
+def _apply_event_changes(session):
+    changes = session.info.pop("search_index_changes", None)
+    if not changes or not inverted_index.loaded:
+        return
+    for event_id, document in changes.items():
+        if document is None:
+            inverted_index.remove_event(event_id)
+        else:
+            inverted_index.index_event(event_id, *document)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_event_changes(session):
+    session.info.pop("search_index_changes", None)
@@ -0,0 +1,214 @@
+"""Synthetic data generator for benchmarks and load tests.
+
+Bulk-loads users, events and registrations with batched multi-row inserts.
+Demand is skewed the way real traffic is: event popularity follows a Zipf
+distribution (`--skew`), so a few hot events take a large share of the
+registrations (the `--hot-events` most popular ones are sold out) while
+most events get a handful or none. Event creators are skewed the same way.
+
+Every seeded user can log in with SEED_PASSWORD; ADMIN_EMAIL is an admin.
+Rows are appended after the existing ids, so seeding can be repeated, and
+the precomputed statistics are reconciled at the end.
+
+Usage:
+    python seed.py                                   # DATABASE_URL from .env
+    python seed.py --users 1000000 --events 100000 --registrations 5000000
+    DATABASE_URL=sqlite:///bench.db python seed.py --users 20000
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+# Load .env before database.py reads its settings
+load_dotenv()
+
+from sqlalchemy import func, insert
+from sqlalchemy.engine import Connection
+
+from database import engine, SessionLocal
+from models import User, Event, EventRegistration, UserRole
+import geo
+
+SEED_PASSWORD = "seedpass123"
+ADMIN_EMAIL = "seed-admin@example.com"
+BATCH = 10000
+
+CITIES = [
+    ("Pune", 18.52, 73.85), ("Mumbai", 19.08, 72.88), ("Delhi", 28.61, 77.21),
+    ("Bengaluru", 12.97, 77.59), ("London", 51.51, -0.13), ("New York", 40.71, -74.01),
+    ("Tokyo", 35.68, 139.69), ("Sydney", -33.87, 151.21),
+]
+# Event names and descriptions are drawn from these, so searches have hits
+TOPICS = ["Python", "Jazz", "Startup", "Yoga", "Photography", "Cooking", "Blockchain", "Chess", "Running", "Poetry"]
+KINDS = ["Meetup", "Workshop", "Conference", "Festival", "Night", "Hackathon", "Class", "Tour"]
+WORDS = ["community", "beginners", "advanced", "outdoor", "weekend", "networking", "live", "hands-on", "family", "free"]
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    """Cumulative Zipf weights for ranks 1..count, for random.choices(cum_weights=...)"""
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+def _insert_batches(connection: Connection, model, rows) -> int:
+    """Insert an iterable of row dicts BATCH at a time; returns the row count"""
+    inserted = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            connection.execute(insert(model), batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert(model), batch)
+        inserted += len(batch)
+    return inserted
+
+def _next_id(connection: Connection, model) -> int:
+    return (connection.execute(func.max(model.id).select()).scalar() or 0) + 1
+
+def seed(
+    users: int,
+    events: int,
+    registrations: int,
+    skew: float = 1.1,
+    hot_events: int = 10,
+    creator_share: float = 0.02,
+    rng: random.Random = None,
+    progress=print
+) -> Dict[str, int]:
+    """Insert synthetic rows and return how many of each were added"""
+    from auth import get_password_hash
+    from crud import reconcile_stats
+
+    rng = rng or random.Random(1)
+    now = datetime.utcnow()
+    password_hash = get_password_hash(SEED_PASSWORD)
+
+    with engine.begin() as connection:
+        first_user = _next_id(connection, User)
+        first_event = _next_id(connection, Event)
+
+    # Users: every 1/creator_share-th one is a creator, plus one admin
+    creator_every = max(1, round(1 / creator_share))
+    creators = [first_user + i for i in range(0, users, creator_every)]
+    user_rows = (
+        {
+            "id": first_user + i,
+            "email": f"seed-user{first_user + i}@example.com",
+            "full_name": f"Seed User {first_user + i}",
+            "hashed_password": password_hash,
+            "is_active": True,
+            "role": UserRole.CREATOR.value if i % creator_every == 0 else UserRole.USER.value,
+            "created_at": now - timedelta(seconds=rng.uniform(0, 365 * 86400)),
+        }
+        for i in range(users)
+    )
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        added_users = _insert_batches(connection, User, user_rows)
+        if not connection.execute(User.__table__.select().where(User.email == ADMIN_EMAIL)).first():
+            connection.execute(insert(User), [{
+                "email": ADMIN_EMAIL, "full_name": "Seed Admin", "hashed_password": password_hash,
+                "is_active": True, "role": UserRole.ADMIN.value, "created_at": now,
+            }])
+    progress(f"👥 {added_users} users in {time.perf_counter() - started:.1f}s")
+
+    # Registrations per event follow the Zipf popularity of its rank; the
+    # hot events are sold out, the others keep some seats free
+    cumulative = zipf_weights(events, skew)
+    total_weight = cumulative[-1] if cumulative else 1
+    demand = [
+        min(users, round(registrations * (cumulative[i] - (cumulative[i - 1] if i else 0)) / total_weight))
+        for i in range(events)
+    ]
+    rng.shuffle(demand)  # popularity is unrelated to id order
+    hottest = set(sorted(range(events), key=demand.__getitem__, reverse=True)[:hot_events])
+    creator_weights = zipf_weights(len(creators), skew)
+    created_at = [now - timedelta(seconds=rng.uniform(3600, 180 * 86400)) for _ in range(events)]
+
+    def event_rows():
+        for i in range(events):
+            city, latitude, longitude = rng.choice(CITIES)
+            latitude += rng.gauss(0, 0.2)
+            longitude += rng.gauss(0, 0.2)
+            topic = rng.choice(TOPICS)
+            yield {
+                "id": first_event + i,
+                "name": f"{topic} {rng.choice(KINDS)} {city}",
+                "description": f"A {rng.choice(WORDS)} {topic.lower()} event for {rng.choice(WORDS)} {rng.choice(WORDS)} fans",
+                "location": city,
+                "latitude": latitude,
+                "longitude": longitude,
+                "geohash": geo.encode(latitude, longitude),
+                "date_time": now + timedelta(hours=rng.randint(-24 * 30, 24 * 180)),
+                "capacity": max(demand[i], 1) if i in hottest else max(demand[i] + rng.randint(1, 50), rng.randint(20, 500)),
+                "registered_count": demand[i],
+                "created_by": rng.choices(creators, cum_weights=creator_weights)[0] if creators else first_user,
+                "created_at": created_at[i],
+            }
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        added_events = _insert_batches(connection, Event, event_rows())
+    progress(f"🎫 {added_events} events in {time.perf_counter() - started:.1f}s")
+
+    def registration_rows():
+        for i in range(events):
+            window = (now - created_at[i]).total_seconds()
+            for user_index in rng.sample(range(users), demand[i]):
+                yield {
+                    "user_id": first_user + user_index,
+                    "event_id": first_event + i,
+                    "registered_at": created_at[i] + timedelta(seconds=rng.uniform(0, window)),
+                }
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        added_registrations = _insert_batches(connection, EventRegistration, registration_rows())
+    progress(f"📝 {added_registrations} registrations in {time.perf_counter() - started:.1f}s")
+
+    db = SessionLocal()
+    try:
+        reconcile_stats(db)
+    finally:
+        db.close()
+    return {"users": added_users, "events": added_events, "registrations": added_registrations}
+
+def hot_event_ids(limit: int) -> List[int]:
+    """Ids of the events with the most registrations, most popular first"""
+    with engine.connect() as connection:
+        return list(connection.execute(
+            Event.__table__.select().with_only_columns(Event.id)
+            .order_by(Event.registered_count.desc(), Event.id).limit(limit)
+        ).scalars())
+
+def pick(rng: random.Random, items: list, cum_weights: List[float]):
+    """A Zipf-weighted choice from `items` (most popular first)"""
+    return items[bisect.bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--registrations", type=int, default=500_000, help="Target; hot events cap at the user count")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of event popularity")
+    parser.add_argument("--hot-events", type=int, default=10, help="How many of the most popular events sell out")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed, for repeatable data")
+    args = parser.parse_args()
+
+    from migrations import run_migrations
+
+    run_migrations()
+    print(f"🌱 Seeding {engine.dialect.name}...")
+    started = time.perf_counter()
+    counts = seed(args.users, args.events, args.registrations, args.skew, args.hot_events, rng=random.Random(args.seed))
+    summary = ", ".join(f"{name}={value}" for name, value in counts.items())
+    print(f"✅ Seeded {summary} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
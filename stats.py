@@ -0,0 +1,74 @@
+import os
+import random
+from datetime import date, datetime
+from typing import Optional
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import StatCounter
+
+# Precomputed statistics for /admin/stats.
+#
+# Each statistic is a set of counter rows in stat_counters: a running total
+# (bucket "") and one row per UTC day for the daily series. crud.py adjusts
+# them in the same transaction as the write they count, so reading the stats
+# costs a handful of small rows instead of COUNT(*) scans.
+#
+# A counter is split across STAT_COUNTER_SHARDS rows and each write picks one
+# at random, so concurrent registrations don't all queue on the same row lock;
+# readers sum the shards. crud.reconcile_stats corrects drift from writes that
+# bypass crud (run it from one process: `python manage.py reconcile-stats`).
+#
+# Days are UTC. Rows get their timestamps from the application clock
+# (datetime.utcnow, see models.py), never from the database server's NOW(),
+# so incremental buckets and buckets rebuilt from the tables always agree.
+
+STAT_COUNTER_SHARDS = int(os.getenv("STAT_COUNTER_SHARDS", 8))
+
+# Counter names; all but CAPACITY also keep a daily series
+USERS = "users"
+EVENTS = "events"
+REGISTRATIONS = "registrations"
+CAPACITY = "capacity"  # total seats across all events
+DAILY = (USERS, EVENTS, REGISTRATIONS)
+
+TOTAL = ""
+
+def day_bucket(moment: Optional[datetime] = None) -> str:
+    """Daily bucket for a timestamp (default: now, UTC)"""
+    return (moment or datetime.utcnow()).strftime("%Y-%m-%d")
+
+def _upsert(db: Session, name: str, bucket: str, delta: int) -> None:
+    values = {"name": name, "bucket": bucket, "shard": random.randrange(STAT_COUNTER_SHARDS), "value": delta}
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(StatCounter).values(**values)
+        statement = statement.on_duplicate_key_update(value=StatCounter.value + delta)
+    else:
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(StatCounter).values(**values).on_conflict_do_update(
+            index_elements=["name", "bucket", "shard"],
+            set_={"value": StatCounter.value + delta}
+        )
+    db.execute(statement)
+
+def adjust(db: Session, name: str, bucket: str, delta: int) -> None:
+    """Add `delta` to a single bucket of a counter, in the caller's transaction"""
+    if delta:
+        _upsert(db, name, bucket, delta)
+
+def increment(db: Session, name: str, delta: int = 1, day: Optional[str] = None) -> None:
+    """Adjust a counter's total and, for daily statistics, the given day's bucket.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    if not delta:
+        return
+    _upsert(db, name, TOTAL, delta)
+    if name in DAILY:
+        _upsert(db, name, day or day_bucket(), delta)
+
+def as_day(value) -> str:
+    """Normalize a DATE() result (a date on MySQL, a string on SQLite)"""
+    return value.isoformat() if isinstance(value, date) else str(value)[:10]
@@ -0,0 +1,69 @@
+import json
+import os
+from typing import Any, AsyncIterator, Callable, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+
+# Streaming list responses for large listings (the admin tables).
+#
+# Without a limit, rows are read through a server-side cursor (yield_per) and
+# written out one batch at a time as a JSON array or NDJSON, so neither the
+# database driver nor the worker holds the whole result. With a limit, one
+# page is returned and X-Next-Cursor carries the id to pass as `cursor` for
+# the next one. Statements must be ordered by the id the cursor refers to.
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", 500))
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+def _dumps(row: Any) -> str:
+    return json.dumps(jsonable_encoder(row))
+
+async def stream_rows(statement: Select, serialize: Callable[[Any], dict], format: str = "json") -> AsyncIterator[str]:
+    """Serialize the ORM objects selected by `statement`, one batch at a time"""
+    if format == "json":
+        yield "["
+    separator = ""
+    # Its own session, as the response body outlives the request's dependencies
+    async with AsyncSessionLocal() as db:
+        result = await db.stream_scalars(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for batch in result.partitions():
+            # Nothing else holds on to the objects once serialized, so the
+            # session's weak-referencing identity map lets them be collected
+            rows = [_dumps(serialize(item)) for item in batch]
+            if format == "json":
+                yield separator + ",".join(rows)
+                separator = ","
+            else:
+                yield "".join(row + "\n" for row in rows)
+    if format == "json":
+        yield "]"
+
+async def list_response(
+    db: AsyncSession,
+    statement: Select,
+    serialize: Callable[[Any], dict],
+    limit: Optional[int] = None,
+    format: str = "json"
+) -> Response:
+    """Stream every row of `statement`, or return one page of `limit` rows"""
+    if limit is None:
+        return StreamingResponse(stream_rows(statement, serialize, format), media_type=MEDIA_TYPES[format])
+
+    items = (await db.scalars(statement.limit(limit + 1))).all()
+    headers = {}
+    if len(items) > limit:
+        items = items[:limit]
+        headers["X-Next-Cursor"] = str(items[-1].id)
+    rows = [_dumps(serialize(item)) for item in items]
+    body = "[" + ",".join(rows) + "]" if format == "json" else "".join(row + "\n" for row in rows)
+    return Response(content=body, media_type=MEDIA_TYPES[format], headers=headers)
@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime, timedelta
+from itertools import count
+
+import httpx
+import pytest
+from sqlalchemy import insert
+
+import main
+from auth import create_access_token
+from database import SessionLocal
+from models import User, Event, EventRegistration
+import profiler
+
+_sequence = count()
+
+def _seed(users: int, capacity: int):
+    """Users with tokens, and an event they can register for"""
+    n = next(_sequence)
+    with SessionLocal() as db:
+        emails = [f"queue{n}-{i}@example.com" for i in range(users)]
+        db.execute(insert(User), [{"email": email, "full_name": "Queued", "hashed_password": "x"} for email in emails])
+        db.commit()
+        user_ids = [db.query(User.id).filter(User.email == email).scalar() for email in emails]
+        event = Event(
+            name="Flash sale", location="Arena", date_time=datetime.utcnow() + timedelta(days=3),
+            capacity=capacity, created_by=user_ids[0]
+        )
+        db.add(event)
+        db.commit()
+        headers = [{"Authorization": f"Bearer {create_access_token({'sub': email})}"} for email in emails]
+        return user_ids, headers, event.id
+
+def _registered(event_id: int):
+    with SessionLocal() as db:
+        stored = db.query(Event.registered_count).filter(Event.id == event_id).scalar()
+        rows = db.query(EventRegistration).filter(EventRegistration.event_id == event_id).count()
+        return stored, rows
+
+@pytest.fixture
+def queued(monkeypatch):
+    monkeypatch.setattr(main.registration_queue, "mode", "always")
+    return main.registration_queue
+
+async def _register_all(headers, event_id, extra=None, params=None):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.post(f"/events/{event_id}/register", headers={**h, **(extra or {})}, params=params) for h in headers
+        ))
+
+def test_queued_registrations_are_settled_in_batches(queued):
+    capacity = 10
+    user_ids, headers, event_id = _seed(40, capacity)
+    batches_before = queued.batches
+
+    responses = asyncio.run(_register_all(headers, event_id))
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(200) == capacity
+    assert statuses.count(400) == 40 - capacity
+    assert all(r.json()["detail"] == "Event is full" for r in responses if r.status_code == 400)
+    assert _registered(event_id) == (capacity, capacity)
+    # Far fewer transactions than attempts
+    assert queued.batches - batches_before <= 5
+    assert not queued.pending
+
+def test_processor_runs_outside_the_request_and_drops_the_event(queued):
+    user_ids, headers, event_id = _seed(1, capacity=1)
+
+    async def scenario():
+        # As if submitted from a profiled request
+        profile = profiler.RequestProfile()
+        profiler.current_profile.set(profile)
+        queue = queued._queue(event_id)
+        queue.hot_until = float("inf")
+        ticket = await queued.submit(event_id, user_ids[0])
+        await queue.processor
+        assert (await queued.result(ticket.id))["status"] == "registered"
+        return profile
+
+    profile = asyncio.run(scenario())
+    assert profile.statements == []
+    assert event_id not in queued.events
+    assert _registered(event_id) == (1, 1)
+
+def test_async_clients_poll_their_ticket(queued):
+    user_ids, headers, event_id = _seed(2, capacity=1)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            accepted = await client.post(
+                f"/events/{event_id}/register", headers={**headers[0], "Prefer": "respond-async"}
+            )
+            assert accepted.status_code == 202
+            ticket = accepted.json()
+            assert ticket["status"] == "pending"
+            assert accepted.headers["Location"] == f"/registration-tickets/{ticket['ticket_id']}"
+
+            settled = await client.get(f"{accepted.headers['Location']}?wait=5", headers=headers[0])
+            assert settled.status_code == 200
+            assert settled.json()["status"] == "registered"
+            assert settled.json()["registration"]["user_id"] == user_ids[0]
+
+            # Tickets are private to their user
+            other = await client.get(accepted.headers["Location"], headers=headers[1])
+            assert other.status_code == 404
+
+            again = await client.post(f"/events/{event_id}/register", headers=headers[0])
+            assert again.status_code == 400
+            assert again.json()["detail"] == "Already registered for this event"
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("mode", ["off", "always"])
+def test_full_event_waitlists_on_request(monkeypatch, mode):
+    monkeypatch.setattr(main.registration_queue, "mode", mode)
+    user_ids, headers, event_id = _seed(4, capacity=1)
+
+    assert asyncio.run(_register_all(headers[:1], event_id))[0].status_code == 200
+    waiting = asyncio.run(_register_all(headers[1:], event_id, params={"waitlist": "true"}))
+
+    assert [r.status_code for r in waiting] == [202, 202, 202]
+    assert all(r.json()["status"] == "waitlisted" for r in waiting)
+    assert sorted(r.json()["position"] for r in waiting) == [1, 2, 3]
+    first = next(i for i, r in enumerate(waiting, 1) if r.json()["position"] == 1)
+
+    async def cancel_and_check():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.delete(f"/events/{event_id}/register", headers=headers[0])).status_code == 204
+            # The head of the waitlist got the seat; the others moved up
+            mine = await client.get("/my-registrations", headers=headers[first])
+            assert [r["event_id"] for r in mine.json()] == [event_id]
+            others = [h for i, h in enumerate(headers[1:], 1) if i != first]
+            positions = [(await client.get("/my-waitlist", headers=h)).json()[0]["position"] for h in others]
+            assert sorted(positions) == [1, 2]
+            assert (await client.delete(f"/events/{event_id}/waitlist", headers=others[0])).status_code == 204
+            assert (await client.delete(f"/events/{event_id}/waitlist", headers=others[0])).status_code == 404
+
+    asyncio.run(cancel_and_check())
+    assert _registered(event_id) == (1, 1)
+
+def test_concurrent_direct_attempts_switch_the_event_to_the_queue(monkeypatch):
+    queue = main.registration_queue
+    monkeypatch.setattr(queue, "mode", "auto")
+    monkeypatch.setattr("admission.ADMISSION_HOT_THRESHOLD", 2)
+    event_id = 424242
+
+    with queue.track(event_id):
+        assert not queue.is_queued(event_id)
+        with queue.track(event_id):
+            pass
+    assert queue.is_queued(event_id)
+    monkeypatch.setattr(queue, "mode", "off")
+    assert not queue.is_queued(event_id)
+    queue.events.pop(event_id)
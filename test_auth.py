@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+import auth
+import main
+from cache import InMemoryCache
+from database import SessionLocal
+from models import User
+
+def _signup_and_login(client: TestClient, email: str) -> dict:
+    client.post("/auth/signup", json={"email": email, "password": "secret123", "full_name": "Auth"})
+    token = client.post("/auth/login", json={"email": email, "password": "secret123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_invalidation_survives_cache_pressure(monkeypatch):
+    cache = InMemoryCache(max_entries=4, default_ttl=60)
+    monkeypatch.setattr(auth, "user_cache", cache)
+    user = User(id=1, email="A@example.com", full_name="A", is_active=True, role="user", created_at=datetime.utcnow())
+
+    async def scenario():
+        await auth.cache_user(user)
+        for i in range(10):  # other users fill the cache while A keeps being hit
+            await cache.set(f"email:other{i}@example.com", {})
+            assert await cache.get("email:a@example.com") is not None
+        await auth.invalidate_cached_user("a@example.com")
+        return await cache.get("email:a@example.com")
+
+    assert asyncio.run(scenario()) is None
+
+def test_admin_email_change_revokes_cached_principal():
+    client = TestClient(main.app)
+    headers = _signup_and_login(client, "rename@example.com")
+    me = client.get("/auth/me", headers=headers)  # caches the principal
+    assert me.status_code == 200
+
+    response = client.put(f"/admin/users/{me.json()['id']}", params={"email": "renamed@example.com"})
+    assert response.status_code == 200
+    # The token's subject is the old address, which no longer resolves
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+def test_admin_delete_revokes_cached_principal():
+    client = TestClient(main.app)
+    headers = _signup_and_login(client, "deleted@example.com")
+    user_id = client.get("/auth/me", headers=headers).json()["id"]
+
+    assert client.delete(f"/admin/users/{user_id}").status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+def test_password_pool_rejects_when_saturated(monkeypatch):
+
+    monkeypatch.setattr(auth, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(auth, "PASSWORD_HASH_MAX_QUEUE", 1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.create_task(auth._run_password_job(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0)  # let both jobs claim their slots
+        try:
+            with pytest.raises(HTTPException) as rejected:
+                await auth._run_password_job(release.wait, 5)
+        finally:
+            release.set()
+            await asyncio.gather(*running)
+        # Slots are released once the jobs finish
+        assert await auth._run_password_job(lambda: "ok") == "ok"
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "1"
+
+def test_login_rehashes_below_policy(monkeypatch):
+
+    client = TestClient(main.app)
+    _signup_and_login(client, "rehash@example.com")  # hashed at the test cost (BCRYPT_ROUNDS=4)
+
+    stronger = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__default_rounds=5, bcrypt__min_rounds=5)
+    monkeypatch.setattr(auth, "pwd_context", stronger)
+    response = client.post("/auth/login", json={"email": "rehash@example.com", "password": "secret123"})
+    assert response.status_code == 200
+
+    with SessionLocal() as db:
+        stored = db.query(User.hashed_password).filter(User.email == "rehash@example.com").scalar()
+    assert stored.startswith("$2b$05$")
+    assert stronger.verify("secret123", stored)
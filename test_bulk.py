@@ -0,0 +1,91 @@
+import asyncio
+import os
+
+import pytest
+
+# database.py requires a URL at import time
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from bulk import iter_csv_records, iter_ndjson_records
+
+CSV = (
+    '﻿name,description,location,date_time,capacity\r\n'
+    '"Multi, line","first\r\nsecond",Pune,2030-01-01T10:00:00,10\r\n'
+    '\r\n'
+    'Café  night,"say ""hi""",Goa,2030-02-01T10:00:00,5\r\n'
+    'Open,"never closed,Goa,2030-02-01T10:00:00,5\n'
+)
+
+async def _chunks(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+async def _collect(records):
+    return [record async for record in records]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 4096])
+def test_csv_records_survive_any_chunking(chunk_size):
+    records = asyncio.run(_collect(iter_csv_records(_chunks(CSV.encode(), chunk_size))))
+
+    assert [line for line, _ in records] == [2, 5, 6]
+    assert records[0][1] == {
+        "name": "Multi, line", "description": "first\r\nsecond", "location": "Pune",
+        "date_time": "2030-01-01T10:00:00", "capacity": "10",
+    }
+    assert records[1][1]["name"] == "Café  night"
+    assert records[1][1]["description"] == 'say "hi"'
+    assert isinstance(records[2][1], ValueError)
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 4096])
+def test_ndjson_records_report_bad_lines(chunk_size):
+    data = '{"name": "a b"}\n\n{oops\n{"name": "c"}'.encode()
+    records = asyncio.run(_collect(iter_ndjson_records(_chunks(data, chunk_size))))
+
+    assert [line for line, _ in records] == [1, 3, 4]
+    assert records[0][1] == {"name": "a b"}
+    assert isinstance(records[1][1], ValueError)
+    assert records[2][1] == {"name": "c"}
+
+def test_stray_quote_costs_one_row(monkeypatch):
+    import bulk
+
+    monkeypatch.setattr(bulk, "IMPORT_MAX_RECORD_LINES", 3)
+    rows = "".join(f"Event {i},Pune\n" for i in range(10))
+    data = f'name,location\nBroken "quote,Pune\n{rows}'.encode()
+    records = asyncio.run(_collect(iter_csv_records(_chunks(data, 16))))
+
+    assert records[0][0] == 2 and isinstance(records[0][1], ValueError)
+    assert [record for _, record in records[1:]] == [{"name": f"Event {i}", "location": "Pune"} for i in range(10)]
+    assert [line for line, _ in records[1:]] == list(range(3, 13))
+
+def test_import_then_export_round_trip():
+    import json
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    client.post("/auth/signup", json={"email": "bulk@example.com", "password": "secret123", "full_name": "Bulk"})
+    token = client.post("/auth/login", json={"email": "bulk@example.com", "password": "secret123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    body = (
+        "name,location,date_time,capacity,latitude,longitude\n"
+        "Round trip A,Pune,2030-01-01T10:00:00,10,18.52,73.85\n"
+        "Round trip B,Goa,not a date,5,,\n"
+        "Round trip C,Goa,2030-02-01T10:00:00,5,,\n"
+    )
+    response = client.post("/events/import?format=csv", content=body.encode(), headers=headers)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert (report["inserted"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["line"] == 3
+
+    response = client.get("/events/export?format=ndjson", headers=headers)
+    assert response.status_code == 200
+    exported = {row["name"]: row for row in map(json.loads, response.text.splitlines()) if row["name"].startswith("Round trip")}
+    assert sorted(exported) == ["Round trip A", "Round trip C"]
+    assert exported["Round trip A"]["latitude"] == 18.52
+    assert exported["Round trip C"]["date_time"].startswith("2030-02-01T10:00:00")
+
+    response = client.get("/events/export?format=csv", headers=headers)
+    assert response.text.splitlines()[0].split(",")[:3] == ["id", "name", "description"]
@@ -0,0 +1,84 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+# database.py requires a URL at import time; the tests bind their own engines
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import geo
+from database import Base
+from models import User, Event
+from crud import get_nearby_events
+
+START = datetime(2030, 1, 1)
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'geo.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _seed(db, points):
+    db.execute(insert(User), [{"email": "creator@example.com", "full_name": "Creator", "hashed_password": "x"}])
+    db.execute(insert(Event), [
+        {
+            "name": f"Event {i}",
+            "location": "Somewhere",
+            "date_time": START + timedelta(days=i % 30),
+            "capacity": 10,
+            "created_by": 1,
+            "latitude": latitude,
+            "longitude": longitude,
+            "geohash": geo.encode(latitude, longitude),
+        }
+        for i, (latitude, longitude) in enumerate(points)
+    ])
+    db.commit()
+
+def _brute_force(points, latitude, longitude, radius_km, keep=lambda i: True):
+    distances = [
+        (geo.distance_km(latitude, longitude, lat, lon), i + 1)
+        for i, (lat, lon) in enumerate(points)
+        if keep(i)
+    ]
+    return sorted((distance, event_id) for distance, event_id in distances if distance <= radius_km)
+
+def test_encode_known_geohash():
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+@pytest.mark.parametrize("center", [(18.52, 73.85), (51.5, -0.12), (-33.9, 151.2), (0.0, 179.95), (70.0, -179.9)])
+@pytest.mark.parametrize("radius_km", [0.5, 5, 50, 400])
+def test_nearby_matches_brute_force(db, center, radius_km):
+    rng = random.Random(42)
+    points = []
+    for _ in range(2000):
+        # Cluster around the center, wrapping longitudes across the antimeridian
+        latitude = max(-89.0, min(89.0, center[0] + rng.uniform(-5, 5)))
+        longitude = (center[1] + rng.uniform(-5, 5) + 180) % 360 - 180
+        points.append((latitude, longitude))
+    _seed(db, points)
+
+    expected = _brute_force(points, *center, radius_km)[:50]
+    found = get_nearby_events(db, *center, radius_km, limit=50)
+
+    assert [event.id for event, _ in found] == [event_id for _, event_id in expected]
+    assert [round(distance, 9) for _, distance in found] == [round(distance, 9) for distance, _ in expected]
+
+def test_nearby_combines_date_range(db):
+    rng = random.Random(7)
+    points = [(48.85 + rng.uniform(-0.5, 0.5), 2.35 + rng.uniform(-0.5, 0.5)) for _ in range(500)]
+    _seed(db, points)
+
+    date_from, date_to = START + timedelta(days=5), START + timedelta(days=9)
+    expected = _brute_force(points, 48.85, 2.35, 20, keep=lambda i: 5 <= i % 30 <= 9)
+    found = get_nearby_events(db, 48.85, 2.35, 20, limit=1000, date_from=date_from, date_to=date_to)
+
+    assert [event.id for event, _ in found] == [event_id for _, event_id in expected]
+    assert all(date_from <= event.date_time <= date_to for event, _ in found)
@@ -0,0 +1,68 @@
+import asyncio
+from functools import partial
+
+from fastapi.testclient import TestClient
+
+import health
+import main
+
+def test_liveness_does_not_touch_the_database(monkeypatch):
+    async def fail():
+        raise AssertionError("liveness checked the database")
+
+    monkeypatch.setattr(health.database_health, "_ping", fail)
+    response = TestClient(main.app).get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "alive"}
+
+def test_readiness_serves_the_cached_status(monkeypatch):
+    asyncio.run(health.database_health.refresh())
+    calls = []
+
+    async def counted():
+        calls.append(1)
+
+    monkeypatch.setattr(health.database_health, "_ping", counted)
+    client = TestClient(main.app)
+    for _ in range(3):
+        response = client.get("/health/ready")
+        assert response.status_code == 200
+    report = response.json()
+    assert report["ready"] and report["database"]["ok"]
+    assert "primary" in report["pool_saturation"]
+    assert calls == []
+    assert client.get("/health").json()["status"] == "healthy"
+
+def test_readiness_fails_fast_on_a_hung_database(monkeypatch):
+    async def hang():
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(health.database_health, "_ping", hang)
+    monkeypatch.setattr(health, "HEALTH_CHECK_TIMEOUT", 0.05)
+    monkeypatch.setattr(health.database_health, "checked_at", None)
+    try:
+        response = TestClient(main.app).get("/health/ready")
+        assert response.status_code == 503
+        assert "timed out" in response.json()["database"]["error"]
+    finally:
+        monkeypatch.undo()
+        asyncio.run(health.database_health.refresh())
+
+def test_startup_retries_then_serves_while_the_database_is_down(monkeypatch):
+    attempts = []
+
+    async def refused():
+        attempts.append(1)
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(health.database_health, "_ping", refused)
+    try:
+        assert asyncio.run(health.wait_for_database(attempts=3, backoff=0)) is False
+        assert len(attempts) == 3
+        monkeypatch.setattr(health, "wait_for_database", partial(health.wait_for_database, attempts=1))
+        with TestClient(main.create_app()) as client:
+            assert client.get("/health/live").status_code == 200
+            assert client.get("/health/ready").status_code == 503
+    finally:
+        monkeypatch.undo()
+        asyncio.run(health.database_health.refresh())
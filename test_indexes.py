@@ -0,0 +1,196 @@
+import inspect
+import re
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+from sqlalchemy import create_engine, event, inspect as inspect_schema, text
+
+import crud
+import geo
+from database import Base, SessionLocal, engine
+from migrations import ACCESS_PATH_INDEXES, add_access_path_indexes
+from models import User, Event, EventRegistration
+from schemas import EventCreate, EventUpdate, UserCreate
+
+# Index audit: every statement a crud function runs is EXPLAINed, and none
+# may fall back to a full table scan. Functions that read whole tables on
+# purpose are listed in FULL_SCANS with the reason; a new crud function
+# must be added to one of the two tables, so it is audited from the start.
+
+_sequence = count()
+
+def _event_data(**overrides) -> EventCreate:
+    return EventCreate(**{
+        "name": "Index audit meetup",
+        "description": "Checking query plans",
+        "location": "Pune",
+        "date_time": datetime.utcnow() + timedelta(days=7),
+        "capacity": 10,
+        "latitude": 18.52,
+        "longitude": 73.85,
+        **overrides,
+    })
+
+@pytest.fixture
+def rows():
+    """A fresh user with an event they created and registered for, plus a second user"""
+    n = next(_sequence)
+    with SessionLocal() as db:
+        user = User(email=f"audit{n}@example.com", full_name="Auditor", hashed_password="x")
+        other = User(email=f"audit{n}-other@example.com", full_name="Other", hashed_password="x")
+        db.add_all([user, other])
+        db.flush()
+        event_row = Event(
+            name="Index audit meetup", description="Checking query plans", location="Pune",
+            date_time=datetime.utcnow() + timedelta(days=7), capacity=10, registered_count=1,
+            latitude=18.52, longitude=73.85, geohash=geo.encode(18.52, 73.85), created_by=user.id
+        )
+        db.add(event_row)
+        db.flush()
+        registration = EventRegistration(user_id=user.id, event_id=event_row.id)
+        db.add(registration)
+        db.commit()
+        ids = {
+            "user": user.id, "other": other.id, "email": user.email,
+            "event": event_row.id, "date_time": event_row.date_time, "registration": registration.id,
+        }
+    # Load the in-process search index up front: building it reads every event
+    with SessionLocal() as db:
+        crud.search_events(db, query="audit")
+    return ids
+
+CALLS = {
+    "create_user": lambda db, ids: crud.create_user(
+        db, UserCreate(email=f"audit-new{next(_sequence)}@example.com", full_name="New", password="secret123"), "x"
+    ),
+    "get_user_by_email": lambda db, ids: crud.get_user_by_email(db, ids["email"]),
+    "get_user_by_id": lambda db, ids: crud.get_user_by_id(db, ids["user"]),
+    "delete_user": lambda db, ids: crud.delete_user(db, ids["other"]),
+    "update_user": lambda db, ids: crud.update_user(db, ids["other"], full_name="Renamed"),
+    "update_user_password_hash": lambda db, ids: crud.update_user_password_hash(db, ids["other"], "y"),
+    "admin_users_statement": lambda db, ids: db.execute(crud.admin_users_statement(after_id=ids["user"] - 1).limit(10)).all(),
+    "get_event_by_id": lambda db, ids: crud.get_event_by_id(db, ids["event"]),
+    "get_events_by_creator": lambda db, ids: crud.get_events_by_creator(db, ids["user"]),
+    "admin_events_statement": lambda db, ids: db.execute(crud.admin_events_statement(created_by=ids["user"]).limit(10)).all(),
+    "create_event": lambda db, ids: crud.create_event(db, _event_data(), ids["user"]),
+    "bulk_create_events": lambda db, ids: crud.bulk_create_events(db, [_event_data(), _event_data()], ids["user"]),
+    "get_events_by_id_range": lambda db, ids: crud.get_events_by_id_range(db, after_id=ids["event"] - 1, limit=10),
+    "update_event": lambda db, ids: crud.update_event(db, ids["event"], EventUpdate(capacity=20)),
+    "update_event_fields": lambda db, ids: crud.update_event_fields(db, ids["event"], {"capacity": 30}),
+    "delete_event": lambda db, ids: crud.delete_event(db, ids["event"]),
+    "search_events": lambda db, ids: crud.search_events(db, query="audit"),
+    "count_matching_events": lambda db, ids: crud.count_matching_events(db, query="audit"),
+    "get_events_page": lambda db, ids: (
+        crud.get_events_page(db, after=(ids["date_time"], ids["event"])),
+        crud.get_events_page(db, before=(ids["date_time"], ids["event"])),
+    ),
+    "get_events_by_relevance": lambda db, ids: crud.get_events_by_relevance(db, query="audit"),
+    "get_nearby_events": lambda db, ids: crud.get_nearby_events(db, 18.52, 73.85, 5),
+    "register_for_event": lambda db, ids: crud.register_for_event(db, ids["other"], ids["event"]),
+    "register_many": lambda db, ids: crud.register_many(
+        db, [(ids["other"], ids["event"]), (ids["user"], ids["event"])], waitlist=[(ids["user"], ids["event"])]
+    ),
+    "register_batch_for_event": lambda db, ids: crud.register_batch_for_event(db, ids["event"], [ids["other"], ids["user"]]),
+    "unregister_from_event": lambda db, ids: crud.unregister_from_event(db, ids["user"], ids["event"]),
+    "delete_registration": lambda db, ids: crud.delete_registration(db, ids["registration"]),
+    "get_user_registrations": lambda db, ids: crud.get_user_registrations(db, ids["user"]),
+    "get_event_registrations": lambda db, ids: crud.get_event_registrations(db, ids["event"]),
+    "admin_registrations_statement": lambda db, ids: db.execute(
+        crud.admin_registrations_statement(event_id=ids["event"]).limit(10)
+    ).all(),
+    "is_user_registered": lambda db, ids: crud.is_user_registered(db, ids["user"], ids["event"]),
+    "get_event_registration_count": lambda db, ids: crud.get_event_registration_count(db, ids["event"]),
+    "get_event_registration_counts": lambda db, ids: crud.get_event_registration_counts(db, [ids["event"]]),
+    "join_waitlist": lambda db, ids: crud.join_waitlist(db, ids["other"], ids["event"]),
+    "leave_waitlist": lambda db, ids: crud.leave_waitlist(db, ids["other"], ids["event"]),
+    "get_user_waitlist": lambda db, ids: crud.get_user_waitlist(db, ids["other"], ids["event"]),
+    "get_stat_totals": lambda db, ids: crud.get_stat_totals(db),
+    "get_daily_stats": lambda db, ids: crud.get_daily_stats(db, "users", "2024-01-01"),
+}
+
+# Calls whose ORDER BY must come from an index rather than a sort step
+ORDERED_BY_INDEX = {"get_user_registrations", "get_event_registrations"}
+
+FULL_SCANS = {
+    "get_users": "unfiltered listing (only active users, with OFFSET)",
+    "get_all_users": "returns the whole table",
+    "get_recent_users": "walks the primary key backwards; LIMIT stops it after N rows",
+    "count_users": "COUNT(*) of the whole table",
+    "get_events": "COUNT(*) of the whole table for the total",
+    "get_all_events_with_creators": "returns the whole table",
+    "get_recent_events": "walks the primary key backwards; LIMIT stops it after N rows",
+    "count_events": "COUNT(*) of the whole table",
+    "get_all_registrations_with_details": "returns the whole table",
+    "count_registrations": "COUNT(*) of the whole table",
+    "reconcile_registration_counts": "maintenance: recounts every event",
+    "reconcile_stats": "maintenance: recounts every table",
+}
+
+def _plan(connection, statement: str, parameters) -> list:
+    """(table, full scan?, sorts?) per plan step, on SQLite or MySQL"""
+    if connection.dialect.name == "mysql":
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+        return [(row["table"], row["type"] in ("ALL", "index"), "filesort" in (row["Extra"] or "")) for row in rows]
+
+    steps = []
+    for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+        detail = row[-1]
+        # SCAN reads every row, in table or index order; SEARCH seeks
+        scan = re.match(r"SCAN (?:TABLE )?(\w+)", detail)
+        steps.append((scan.group(1) if scan else detail, bool(scan), detail.startswith("USE TEMP B-TREE FOR ORDER BY")))
+    return steps
+
+def _statements(name: str, ids: dict) -> list:
+    """The statements a crud call runs, with their parameters"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters, executemany))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with SessionLocal() as db:
+            CALLS[name](db, ids)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert captured, f"{name} ran no statements"
+    # Inserts have no access path to check
+    return [
+        (statement, parameters) for statement, parameters, executemany in captured
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE")
+    ]
+
+@pytest.mark.parametrize("name", sorted(CALLS))
+def test_crud_query_uses_an_index(name, rows):
+    with engine.connect() as connection:
+        for statement, parameters in _statements(name, rows):
+            plan = _plan(connection, statement, parameters)
+            scanned = [table for table, full_scan, _ in plan if full_scan]
+            assert not scanned, f"{name} scans {scanned}:\n{statement}"
+            if name in ORDERED_BY_INDEX and statement.lstrip().upper().startswith("SELECT"):
+                assert not any(sorts for _, _, sorts in plan), f"{name} sorts instead of reading an index in order:\n{statement}"
+
+def test_every_crud_function_is_audited():
+    functions = {
+        name for name, function in inspect.getmembers(crud, inspect.isfunction)
+        if function.__module__ == "crud" and not name.startswith("_")
+    }
+    assert not CALLS.keys() & FULL_SCANS.keys()
+    assert functions == CALLS.keys() | FULL_SCANS.keys()
+
+
+def test_migration_adds_missing_access_path_indexes(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=old)
+    with old.begin() as connection:
+        for _, name, _ in ACCESS_PATH_INDEXES:
+            connection.execute(text(f"DROP INDEX {name}"))
+        assert add_access_path_indexes(connection)
+        assert not add_access_path_indexes(connection)
+        indexes = {
+            index["name"] for table in ("events", "event_registrations")
+            for index in inspect_schema(connection).get_indexes(table)
+        }
+    assert {name for _, name, _ in ACCESS_PATH_INDEXES} <= indexes
+    old.dispose()
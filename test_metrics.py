@@ -0,0 +1,64 @@
+import re
+
+from fastapi.testclient import TestClient
+
+import main
+from metrics import Histogram, Counter
+
+def _sample(text: str, name: str, **labels) -> float:
+    """Value of the series `name` whose labels include `labels`"""
+    for line in text.splitlines():
+        match = re.match(r"^(\w+)(?:\{(.*)\})? (\S+)$", line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2) or ""))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(match.group(3))
+    raise AssertionError(f"{name} {labels} not found")
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, "/x")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{route="/x"} 4' in lines
+    assert lines[1] == "# TYPE demo_seconds histogram"
+
+def test_counter_escapes_label_values():
+    counter = Counter("demo_total", "Demo", ("path",))
+    counter.inc('a"b\\c')
+    assert counter.render()[-1] == 'demo_total{path="a\\"b\\\\c"} 1'
+
+def test_requests_are_recorded_per_route_with_database_usage():
+    client = TestClient(main.app)
+    before = client.get("/metrics").text
+    try:
+        previous = _sample(before, "http_request_db_queries_count", method="GET", route="/events/{event_id}")
+    except AssertionError:
+        previous = 0
+
+    client.get("/events/123456789")
+    client.get("/events/987654321")
+    client.get("/no/such/route")
+    text = client.get("/metrics").text
+
+    assert client.get("/metrics").headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert _sample(text, "http_requests_total", method="GET", route="/events/{event_id}", status="404") >= 2
+    assert _sample(text, "http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    assert _sample(text, "http_request_db_queries_count", method="GET", route="/events/{event_id}") == previous + 2
+    # Lookups run on the async engine and are still charged to the request
+    assert _sample(text, "http_request_db_queries_sum", method="GET", route="/events/{event_id}") >= 2
+    assert _sample(text, "http_requests_in_flight") == 1  # the scrape itself
+    assert "db_pool_checkouts_total" in text
+
+def test_streamed_response_sizes_are_counted():
+    client = TestClient(main.app)
+    client.post("/auth/signup", json={"email": "metrics@example.com", "password": "secret123", "full_name": "M"})
+    token = client.post("/auth/login", json={"email": "metrics@example.com", "password": "secret123"}).json()["access_token"]
+    export = client.get("/events/export?format=csv", headers={"Authorization": f"Bearer {token}"})
+
+    text = client.get("/metrics").text
+    assert _sample(text, "http_response_size_bytes_sum", method="GET", route="/events/export") >= len(export.content)
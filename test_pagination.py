@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from database import SessionLocal
+from models import User, Event
+from pagination import decode_cursor, encode_cursor, PREV
+
+LOCATION = "Pagingville"
+
+@pytest.fixture(scope="module")
+def ordered_ids():
+    """Seed 8 events where several share a start time; returns ids in page order"""
+    start = datetime(2031, 5, 1, 10, 0)
+    offsets = [0, 0, 0, 1, 2, 2, 3, 3]  # hours; ties must be broken by id
+    with SessionLocal() as db:
+        creator = User(email="pager@example.com", full_name="Pager", hashed_password="x")
+        db.add(creator)
+        db.flush()
+        events = [
+            Event(name=f"Page {i}", location=LOCATION, date_time=start + timedelta(hours=hours),
+                  capacity=10, created_by=creator.id)
+            for i, hours in enumerate(reversed(offsets))  # insert out of order
+        ]
+        db.add_all(events)
+        db.commit()
+        return [event.id for event in sorted(events, key=lambda event: (event.date_time, event.id))]
+
+def _page(client: TestClient, **params) -> dict:
+    params = {"location": LOCATION, "limit": 3, "include_total": False, **params}
+    response = client.get("/events", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_cursor_round_trip():
+    when = datetime(2031, 5, 1, 10, 30)
+    assert decode_cursor(encode_cursor(when, 7, PREV)) == (when, 7, PREV)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_next_pages_cover_every_event_once_despite_ties(ordered_ids):
+    client = TestClient(main.app)
+    page = _page(client)
+    assert (page["has_prev"], page["prev_cursor"]) == (False, None)
+
+    seen = [event["id"] for event in page["events"]]
+    while page["next_cursor"]:
+        page = _page(client, cursor=page["next_cursor"])
+        assert page["has_prev"]
+        seen += [event["id"] for event in page["events"]]
+
+    assert seen == ordered_ids
+    assert page["has_next"] is False
+
+def test_prev_pages_walk_back_to_the_start(ordered_ids):
+    client = TestClient(main.app)
+    pages = [_page(client)]
+    while pages[-1]["next_cursor"]:
+        pages.append(_page(client, cursor=pages[-1]["next_cursor"]))
+
+    # From the last page, prev cursors return the same pages in reverse order
+    page = pages[-1]
+    for expected in reversed(pages[:-1]):
+        page = _page(client, cursor=page["prev_cursor"])
+        assert [event["id"] for event in page["events"]] == [event["id"] for event in expected["events"]]
+        # Paging back always has a next page; a prev page exists until the start
+        assert page["has_next"] is True
+        assert page["has_prev"] == (expected is not pages[0])
+
+    assert page["prev_cursor"] is None
+
+def test_cursors_inside_a_tie_keep_rows_with_the_same_start(ordered_ids):
+    client = TestClient(main.app)
+    # With two per page, the first page ends inside the three-way tie at 10:00
+    first = _page(client, limit=2)
+    assert [event["id"] for event in first["events"]] == ordered_ids[:2]
+    second = _page(client, limit=2, cursor=first["next_cursor"])
+    assert [event["id"] for event in second["events"]] == ordered_ids[2:4]
+    back = _page(client, limit=2, cursor=second["prev_cursor"])
+    assert [event["id"] for event in back["events"]] == ordered_ids[:2]
+
+def test_invalid_cursor_is_rejected():
+    client = TestClient(main.app)
+    response = client.get("/events", params={"cursor": "garbage"})
+    assert response.status_code == 400
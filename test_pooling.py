@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+import pooling
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(pooling, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(pooling, "DB_MAX_OVERFLOW", 1)
+    monkeypatch.setattr(pooling, "DB_POOL_TIMEOUT", 0.05)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = pooling.instrument(create_engine(url, **pooling.pool_options(url)), "test")
+    yield engine
+    engine.dispose()
+    pooling._engines.pop("test", None)
+
+def test_pool_metrics_track_checkouts_overflow_and_timeouts(engine):
+    first = engine.connect()
+    second = engine.connect()  # beyond pool_size: uses the overflow slot
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    first.close()
+    second.close()
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+    stats = pooling.pool_stats()["test"]
+    assert stats["pool"] == "InstrumentedQueuePool"
+    assert stats["checkouts"] == 3
+    assert stats["overflow_checkouts"] == 1
+    assert stats["peak_overflow"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["connections_opened"] == 2
+    assert stats["checked_out"] == 0
+    assert stats["wait_seconds_max"] >= 0.0
+
+def test_metrics_survive_dispose(engine):
+    engine.connect().close()
+    engine.dispose()
+    engine.connect().close()
+    assert pooling.pool_stats()["test"]["checkouts"] == 2
+
+def test_idle_connections_are_pinged(engine, monkeypatch):
+    monkeypatch.setattr(pooling, "DB_POOL_PING_IDLE", 0)
+    engine.connect().close()
+    engine.connect().close()  # reuses the connection returned above
+    assert pooling.pool_stats()["test"]["pings"] == 1
+
+def test_only_queue_pooled_dialects_get_sized_pools():
+    assert pooling.pool_options("sqlite:////tmp/pool.db")["poolclass"] is pooling.InstrumentedQueuePool
+    assert pooling.pool_options("mysql+aiomysql://u:p@db/app")["poolclass"] is pooling.InstrumentedAsyncQueuePool
+    # aiosqlite files stay on NullPool: pooled connections keep their threads alive
+    assert "poolclass" not in pooling.pool_options("sqlite+aiosqlite:////tmp/pool.db")
+    assert "poolclass" not in pooling.pool_options("sqlite://")
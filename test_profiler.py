@@ -0,0 +1,53 @@
+import json
+import logging
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import main
+import profiler
+from database import SessionLocal
+from models import Event
+
+def test_profile_header_only_when_requested(monkeypatch):
+    monkeypatch.setattr(profiler, "SQL_PROFILER", "header")
+    client = TestClient(main.app)
+
+    assert profiler.PROFILE_HEADER not in client.get("/events/424242").headers
+    value = client.get("/events/424242", headers={profiler.PROFILE_HEADER: "1"}).headers[profiler.PROFILE_HEADER]
+    fields = dict(part.split("=") for part in value.split("; "))
+    assert int(fields["queries"]) >= 1
+    assert float(fields["db_ms"]) >= float(fields["slowest_ms"]) > 0
+    assert fields["repeated"] == "0"
+
+def test_profiler_is_off_by_default():
+    response = TestClient(main.app).get("/events/424242", headers={profiler.PROFILE_HEADER: "1"})
+    assert profiler.PROFILE_HEADER not in response.headers
+
+def test_repeated_statements_are_flagged(monkeypatch):
+    monkeypatch.setattr(profiler, "REPEATED_QUERY_THRESHOLD", 3)
+    profile = profiler.RequestProfile()
+    token = profiler.current_profile.set(profile)
+    try:
+        with SessionLocal() as db:
+            for event_id in range(4):  # one lookup per row: an N+1 pattern
+                db.execute(select(Event).where(Event.id == event_id)).all()
+            db.execute(select(Event.id).limit(1)).all()
+    finally:
+        profiler.current_profile.reset(token)
+
+    summary = profile.summary()
+    assert summary["queries"] == 5
+    assert [entry["count"] for entry in summary["repeated"]] == [4]
+    assert "WHERE events.id = ?" in summary["repeated"][0]["statement"]
+
+def test_slow_statements_are_logged_as_json(monkeypatch, caplog):
+    monkeypatch.setattr(profiler, "SLOW_QUERY_MS", 0.000001)
+    with caplog.at_level(logging.WARNING, logger="event_platform.slow_queries"):
+        with SessionLocal() as db:
+            db.execute(select(Event.id).where(Event.id == -1)).all()
+
+    entries = [json.loads(record.getMessage()) for record in caplog.records]
+    slow = [entry for entry in entries if entry["event"] == "slow_query" and "events.id" in entry["statement"]]
+    assert slow and slow[0]["duration_ms"] >= 0
+    assert "-1" not in slow[0]["statement"]  # parameters are never logged
@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import geo
+import main
+from database import SessionLocal
+from models import User, Event, EventRegistration
+from query_counter import QueryCounter, assert_max_queries
+
+# Every read endpoint must run a constant number of queries however many rows
+# it returns: relationships are loaded in the listing query itself, never per row.
+
+ENDPOINTS = [
+    "/auth/me",
+    "/events",
+    "/events?search=event&sort=relevance",
+    "/events/{event_id}",
+    "/events/nearby?lat=18.5&lon=73.8&radius=50",
+    "/events/export?format=csv",
+    "/my-registrations",
+    "/my-events",
+    "/admin/stats",
+    "/admin/users",
+    "/admin/users?limit=5&format=ndjson",
+    "/admin/events",
+    "/admin/events?limit=5",
+    "/admin/registrations",
+    "/admin/registrations?limit=5",
+]
+MAX_QUERIES = 6
+
+@pytest.fixture(scope="module")
+def app_client():
+    client = TestClient(main.app)
+    client.post("/auth/signup", json={"email": "counter@example.com", "password": "secret123", "full_name": "Counter"})
+    token = client.post("/auth/login", json={"email": "counter@example.com", "password": "secret123"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    with SessionLocal() as db:
+        user_id = db.query(User.id).filter(User.email == "counter@example.com").scalar()
+    event_id = _seed(user_id, 3)
+    return client, headers, user_id, event_id
+
+def _seed(user_id: int, count: int) -> int:
+    """Add `count` users, events created by `user_id` and registrations to them"""
+    with SessionLocal() as db:
+        stamp = datetime.utcnow().timestamp()
+        users = [User(email=f"seed{stamp}-{i}@example.com", full_name=f"Seed {i}", hashed_password="x") for i in range(count)]
+        events = [
+            Event(
+                name=f"Seeded event {i}",
+                description="An event",
+                location="Pune",
+                date_time=datetime.utcnow() + timedelta(days=i + 1),
+                capacity=100,
+                latitude=18.5 + i / 1000,
+                longitude=73.8,
+                geohash=geo.encode(18.5 + i / 1000, 73.8),
+                created_by=user_id,
+            )
+            for i in range(count)
+        ]
+        db.add_all(users + events)
+        db.flush()
+        db.add_all(
+            [EventRegistration(user_id=user_id, event_id=event.id) for event in events]
+            + [EventRegistration(user_id=user.id, event_id=event.id) for user, event in zip(users, events)]
+        )
+        db.commit()
+        return events[0].id
+
+def _queries(client: TestClient, path: str, headers: dict) -> int:
+    # Cached responses would hide the queries being counted
+    asyncio.run(main.invalidate_event_reads())
+    with QueryCounter() as counter:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_query_count_does_not_grow_with_rows(app_client, path):
+    client, headers, user_id, event_id = app_client
+    path = path.format(event_id=event_id)
+    _queries(client, path, headers)  # warm the user cache and search index
+
+    before = _queries(client, path, headers)
+    _seed(user_id, 20)
+    after = _queries(client, path, headers)
+
+    assert after == before
+    assert after <= MAX_QUERIES
+
+def test_assert_max_queries_reports_statements(app_client):
+    with pytest.raises(AssertionError, match="Expected at most 0 queries, got 1"):
+        with assert_max_queries(0):
+            with SessionLocal() as db:
+                db.query(User).count()
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from starlette.requests import Request
+
+import database
+from database import Base, ReplicaPool, PRIMARY_COOKIE, get_async_read_db
+
+# SQLite files stand in for replicas; a path in a missing directory can't be
+# opened, which looks like a replica that is down.
+
+@pytest.fixture
+def replica_urls(tmp_path):
+    urls = []
+    for name in ("replica_a.db", "replica_b.db"):
+        url = f"sqlite:///{tmp_path / name}"
+        engine = create_engine(url)
+        Base.metadata.create_all(bind=engine)
+        engine.dispose()
+        urls.append(url)
+    return urls
+
+def _database_of(session) -> str:
+    return session.bind.url.database.rsplit("/", 1)[-1]
+
+async def _pick(pool: ReplicaPool):
+    session = await pool.open_session()
+    if session is None:
+        return None
+    try:
+        return _database_of(session)
+    finally:
+        await session.close()
+
+def _request(cookies: str = "") -> Request:
+    headers = [(b"cookie", cookies.encode())] if cookies else []
+    return Request({"type": "http", "method": "GET", "path": "/events", "headers": headers})
+
+async def _read_db_target(request: Request):
+    dependency = get_async_read_db(request)
+    db = await dependency.__anext__()
+    try:
+        return db.bind, request.state.db_replica
+    finally:
+        await dependency.aclose()
+
+def test_replicas_are_used_round_robin(replica_urls):
+    pool = ReplicaPool(replica_urls)
+    picks = [asyncio.run(_pick(pool)) for _ in range(4)]
+    assert picks == ["replica_a.db", "replica_b.db", "replica_a.db", "replica_b.db"]
+
+def test_unreachable_replica_is_skipped_until_retry(replica_urls, tmp_path):
+    broken = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    pool = ReplicaPool([broken, replica_urls[0]], retry_interval=60)
+
+    assert [asyncio.run(_pick(pool)) for _ in range(3)] == ["replica_a.db"] * 3
+    assert [replica["healthy"] for replica in pool.status()] == [False, True]
+
+    pool.replicas[0].down_until = time.monotonic() - 1  # retry interval elapsed
+    assert [replica["healthy"] for replica in pool.status()] == [True, True]
+
+def test_no_healthy_replica_falls_back_to_primary(tmp_path, monkeypatch):
+    pool = ReplicaPool([f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"], retry_interval=60)
+    assert asyncio.run(_pick(pool)) is None
+
+    monkeypatch.setattr(database, "replicas", pool)
+    bind, from_replica = asyncio.run(_read_db_target(_request()))
+    assert bind is database.async_engine
+    assert not from_replica
+
+def test_recent_writer_reads_from_primary(replica_urls, monkeypatch):
+    monkeypatch.setattr(database, "replicas", ReplicaPool(replica_urls))
+
+    bind, from_replica = asyncio.run(_read_db_target(_request()))
+    assert from_replica and bind is not database.async_engine
+
+    pinned = _request(f"{PRIMARY_COOKIE}={time.time() + 5}")
+    bind, from_replica = asyncio.run(_read_db_target(pinned))
+    assert bind is database.async_engine and not from_replica
+
+    expired = _request(f"{PRIMARY_COOKIE}={time.time() - 5}")
+    assert asyncio.run(_read_db_target(expired))[1]
+
+def test_replica_reads_refilling_invalidated_entries_expire_quickly(monkeypatch):
+    import response_cache as rc
+    from cache import InMemoryCache
+
+    monkeypatch.setattr(rc, "response_cache", InMemoryCache(max_entries=100, default_ttl=30))
+    replica_request = _request()
+    replica_request.state.db_replica = True
+
+    async def ttl_after_write(event_id: int) -> float:
+        await rc.invalidate_events(1)
+        key = await rc.event_detail_key(event_id)
+        await rc.cache_response(replica_request, key, {"id": event_id})
+        return rc.response_cache._entries[key][0] - time.monotonic()
+
+    assert asyncio.run(ttl_after_write(1)) <= rc.READ_YOUR_WRITES_WINDOW  # just invalidated
+    assert asyncio.run(ttl_after_write(2)) > rc.READ_YOUR_WRITES_WINDOW   # untouched event
@@ -0,0 +1,53 @@
+from fastapi.testclient import TestClient
+
+import main
+
+LOCATION = "Cacheton"
+
+def _client_and_headers():
+    client = TestClient(main.app)
+    client.post("/auth/signup", json={"email": "cacher@example.com", "password": "secret123", "full_name": "Cacher"})
+    token = client.post("/auth/login", json={"email": "cacher@example.com", "password": "secret123"}).json()["access_token"]
+    return client, {"Authorization": f"Bearer {token}"}
+
+def _create_event(client: TestClient, headers: dict, name: str) -> dict:
+    response = client.post("/events", headers=headers, json={
+        "name": name, "location": LOCATION, "date_time": "2031-01-01T10:00:00", "capacity": 5
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def test_etag_revalidation_returns_304():
+    client, headers = _client_and_headers()
+    event = _create_event(client, headers, "Etag event")
+
+    first = client.get(f"/events/{event['id']}")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+
+    revalidated = client.get(f"/events/{event['id']}", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert client.get(f"/events/{event['id']}", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+def test_writes_invalidate_list_and_detail():
+    client, headers = _client_and_headers()
+    event = _create_event(client, headers, "Invalidated event")
+    list_params = {"location": LOCATION, "limit": 50}
+
+    listed = client.get("/events", params=list_params)
+    detail = client.get(f"/events/{event['id']}")
+    assert client.get("/events", params=list_params).headers["ETag"] == listed.headers["ETag"]  # served from cache
+
+    # A registration changes the event's count: both cached responses must go
+    assert client.post(f"/events/{event['id']}/register", headers=headers).status_code == 200
+    fresh_detail = client.get(f"/events/{event['id']}", headers={"If-None-Match": detail.headers["ETag"]})
+    assert fresh_detail.status_code == 200
+    assert fresh_detail.json()["registered_count"] == 1
+    fresh_list = client.get("/events", params=list_params)
+    assert fresh_list.headers["ETag"] != listed.headers["ETag"]
+    assert {e["id"]: e["registered_count"] for e in fresh_list.json()["events"]}[event["id"]] == 1
+
+    # A new event shows up in the cached listing straight away
+    added = _create_event(client, headers, "Added later")
+    assert added["id"] in [e["id"] for e in client.get("/events", params=list_params).json()["events"]]
@@ -0,0 +1,133 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import User, Event
+from schemas import EventCreate
+from search import inverted_index, tokenize
+import crud
+import geo
+
+WHEN = datetime.utcnow() + timedelta(days=7)
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    creator = User(email="searcher@example.com", full_name="S", hashed_password="x")
+    session.add(creator)
+    session.commit()
+    session.info["creator_id"] = creator.id
+    inverted_index.reset()  # the index is global: build it from this database
+    yield session
+    session.close()
+    engine.dispose()
+    inverted_index.reset()
+
+def _add(db, name, description=None) -> int:
+    event = Event(name=name, description=description, location="Hall", date_time=WHEN, capacity=10,
+                  created_by=db.info["creator_id"])
+    db.add(event)
+    db.commit()
+    return event.id
+
+def _ranked(db, query):
+    scores = inverted_index.scores(db, query)
+    return sorted(scores, key=scores.get, reverse=True)
+
+def test_tokenize_lowercases_unicode_words():
+    assert tokenize("Café-Night: JAZZ & Blues!") == ["café", "night", "jazz", "blues"]
+
+def test_bm25_prefers_frequent_terms_in_short_documents(db):
+    short = _add(db, "Jazz night")
+    frequent = _add(db, "Jazz jazz jazz", "Jazz all evening long with many guests and friends")
+    long = _add(db, "Evening gathering", "Some jazz among many other styles of music played all night long")
+    _add(db, "Rock concert")
+
+    ranked = _ranked(db, "jazz")
+    assert set(ranked) == {short, frequent, long}
+    assert ranked[-1] == long
+    assert ranked.index(frequent) < ranked.index(long)
+
+def test_rare_terms_weigh_more_than_common_ones(db):
+    both = _add(db, "Music festival")
+    common_only = _add(db, "Music evening")
+    for i in range(5):
+        _add(db, f"Music session {i}")
+    scores = inverted_index.scores(db, "music")
+    assert len(scores) == 7
+    # "festival" is rare, so it separates the event that has it
+    assert _ranked(db, "music festival") == [both]
+    assert inverted_index.scores(db, "festival")[both] > scores[common_only]
+
+def test_last_word_matches_as_prefix_below_exact_matches(db):
+    exact = _add(db, "Rock show")
+    completion = _add(db, "Rocket launch")
+    _add(db, "Jazz show")
+
+    assert _ranked(db, "rock") == [exact, completion]
+    assert set(_ranked(db, "roc")) == {exact, completion}
+    # Only the last word is a prefix; earlier words must match exactly
+    assert _ranked(db, "roc show") == []
+    assert _ranked(db, "rock sh") == [exact]
+
+def test_index_follows_commits_and_ignores_rollbacks(db):
+    first = _add(db, "Pottery class")
+    assert _ranked(db, "pottery") == [first]  # loads the index
+
+    second = _add(db, "Pottery fair")
+    assert set(_ranked(db, "pottery")) == {first, second}
+
+    db.get(Event, first).name = "Painting class"
+    db.commit()
+    assert _ranked(db, "pottery") == [second]
+    assert _ranked(db, "painting") == [first]
+
+    db.delete(db.get(Event, second))
+    db.commit()
+    assert _ranked(db, "pottery") == []
+
+    db.get(Event, first).name = "Sculpture class"
+    db.flush()
+    db.rollback()
+    assert _ranked(db, "sculpture") == []
+    assert _ranked(db, "painting") == [first]
+
+def test_bulk_inserts_reset_the_index(db):
+    _add(db, "Chess club")
+    assert len(_ranked(db, "chess")) == 1
+    assert inverted_index.loaded
+
+    crud.bulk_create_events(db, [EventCreate(name=f"Chess open {i}", location="Hall", date_time=WHEN, capacity=5)
+                                 for i in range(3)], db.info["creator_id"])
+    assert not inverted_index.loaded
+    assert len(_ranked(db, "chess")) == 4
+
+def test_match_sets_beyond_the_sql_variable_limit(db):
+    # Far fewer bound parameters than matches, on every connection from now on
+    engine = db.get_bind()
+    event.listen(engine, "connect", lambda connection, _: connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 250))
+    db.execute(insert(Event), [
+        {"name": f"Python meetup {i}", "location": "Hall" if i % 2 else "Annex", "date_time": WHEN + timedelta(minutes=i),
+         "capacity": 10, "created_by": db.info["creator_id"], "latitude": 52.52, "longitude": 13.40, "geohash": geo.encode(52.52, 13.40)}
+        for i in range(1200)
+    ])
+    db.commit()
+    engine.dispose()
+    inverted_index.reset()
+
+    page, has_more = crud.get_events_page(db, limit=5, query="python")
+    assert len(page) == 5 and has_more
+    assert crud.count_matching_events(db, query="python") == 1200
+    assert crud.count_matching_events(db, query="python", location="Annex") == 600
+    events, total = crud.search_events(db, query="python", location="Hall", limit=3)
+    assert total == 600 and len(events) == 3
+    ranked, has_more = crud.get_events_by_relevance(db, "python", limit=10, location="Annex")
+    assert len(ranked) == 10 and has_more and {e.location for e in ranked} == {"Annex"}
+    nearby = crud.get_nearby_events(db, 52.52, 13.40, radius_km=5, limit=4, query="python")
+    assert len(nearby) == 4
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from schemas import UserCreate, EventCreate
+import crud
+import stats
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def _snapshot(db):
+    today = stats.day_bucket()
+    return crud.get_stat_totals(db), {name: crud.get_daily_stats(db, name, today) for name in stats.DAILY}
+
+def test_incremental_stats_match_reconciliation(db):
+    users = [
+        crud.create_user(db, UserCreate(email=f"u{i}@example.com", full_name=f"U{i}", password="x" * 6), hashed_password="x")
+        for i in range(4)
+    ]
+    when = datetime.utcnow() + timedelta(days=3)
+    events = [
+        crud.create_event(db, EventCreate(name=f"E{i}", location="Hall", date_time=when, capacity=2), users[0].id)
+        for i in range(3)
+    ]
+    crud.bulk_create_events(db, [EventCreate(name="Bulk", location="Hall", date_time=when, capacity=5)] * 2, users[1].id)
+
+    for user in users:
+        for event in events:
+            crud.register_for_event(db, user.id, event.id)  # some are full
+    crud.register_for_event(db, users[0].id, events[0].id)  # duplicate
+    crud.unregister_from_event(db, users[0].id, events[1].id)
+    crud.update_event_fields(db, events[2].id, {"capacity": 7})
+    crud.delete_event(db, events[0].id)
+    crud.delete_user(db, users[3].id)
+
+    incremental = _snapshot(db)
+    crud.reconcile_stats(db)
+
+    assert incremental == _snapshot(db)
+    assert incremental[0] == {
+        stats.USERS: 3,
+        stats.EVENTS: 4,
+        stats.REGISTRATIONS: 3,
+        stats.CAPACITY: 2 + 7 + 5 + 5,
+    }
+
+def test_reconciliation_corrects_drift_in_place(db):
+    crud.create_user(db, UserCreate(email="drift@example.com", full_name="D", password="x" * 6), hashed_password="x")
+    expected = _snapshot(db)
+
+    stats.adjust(db, stats.USERS, stats.TOTAL, 5)
+    stats.adjust(db, stats.USERS, "2000-01-01", 2)
+    stats.adjust(db, stats.EVENTS, stats.day_bucket(), -1)
+    db.commit()
+    assert _snapshot(db) != expected
+
+    crud.reconcile_stats(db)
+    totals, daily = _snapshot(db)
+    # Corrections are increments, so buckets that shouldn't exist are left at zero
+    assert (totals, {name: {day: n for day, n in days.items() if n} for name, days in daily.items()}) == expected
+    assert crud.get_daily_stats(db, stats.USERS, "2000-01-01")["2000-01-01"] == 0
+
+def test_daily_buckets_use_the_stored_utc_timestamps(db):
+    user = crud.create_user(db, UserCreate(email="utc@example.com", full_name="U", password="x" * 6), hashed_password="x")
+    assert crud.get_daily_stats(db, stats.USERS, "2000-01-01") == {stats.day_bucket(user.created_at): 1}